@@ -4,6 +4,7 @@ Direct Lambda handler for API Gateway HTTP API events
 """
 import json
 import os
+import time
 import traceback
 from typing import Dict, Any
 
@@ -19,8 +20,19 @@ xray_recorder.configure(
     sampling=False  # Lambda handles sampling automatically
 )
 
+import base64
+
+from deadline import DeadlineExceeded
+import metrics
 from forecast_api import ForecastAPI
-from scoring import score_forecast
+from hourly import TIME_FORMATS
+from paging import MAX_PAGE_DAYS, parse_cursor
+from profiles import UnknownProfile
+from profiling import profile_request, requested_mode
+from region import GRID_FORMATS, encode_grid
+from ruleset import RulesetError
+from spots import UnknownSpot
+from upstream import UpstreamUnavailable
 
 
 # Initialize forecast API (reused across invocations)
@@ -33,17 +45,34 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Lambda handler for API Gateway HTTP API events
     Direct integration - routes are handled by API Gateway
     """
+    metrics.begin_request()
+    start = time.perf_counter()
+    # Extract path (strip stage prefix /default if present)
+    path = event.get('rawPath', '')
+    if path.startswith('/default'):
+        path = path[8:]  # Remove '/default'
+    if not path:
+        path = '/'
+    response = route(event, context, path)
+    # One EMF record per invocation: latency, stage timings, payload size, cache deltas
+    metrics.emit_emf(
+        path if path in ROUTES else metrics.UNMATCHED_ENDPOINT,
+        response['statusCode'],
+        time.perf_counter() - start,
+        len(response.get('body') or ''),
+        forecast_api.cache_stats(),
+    )
+    return response
+
+
+# Paths route() serves; anything else is reported to metrics as unmatched
+ROUTES = ('/', '/health', '/api/forecast', '/api/best-spots', '/api/region')
+
+
+def route(event: Dict[str, Any], context: Any, path: str) -> Dict[str, Any]:
+    """Dispatch one request to its handler"""
     try:
-        # Extract path and method (strip stage prefix if present)
-        path = event.get('rawPath', '')
         http_method = event.get('requestContext', {}).get('http', {}).get('method', '')
-        
-        # Remove stage prefix (/default) if present
-        if path.startswith('/default'):
-            path = path[8:]  # Remove '/default'
-        if not path:
-            path = '/'
-        
         print(f"Request: {http_method} {path}")
         
         # Handle CORS preflight requests
@@ -60,7 +89,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         elif path == '/health' and http_method == 'GET':
             return handle_health()
         elif path == '/api/forecast' and http_method == 'POST':
-            return handle_forecast(event)
+            return handle_forecast(event, context)
+        elif path == '/api/best-spots' and http_method == 'POST':
+            return handle_best_spots(event, context)
+        elif path == '/api/region' and http_method == 'POST':
+            return handle_region(event)
         else:
             print(f"Route not found: {http_method} {path}")
             return {
@@ -88,6 +121,8 @@ def handle_root() -> Dict[str, Any]:
             'version': '1.0.0',
             'endpoints': {
                 'forecast': '/api/forecast',
+                'best_spots': '/api/best-spots',
+                'region': '/api/region',
                 'health': '/health'
             }
         })
@@ -99,13 +134,35 @@ def handle_health() -> Dict[str, Any]:
     return {
         'statusCode': 200,
         'headers': get_cors_headers(),
-        'body': json.dumps({'status': 'healthy'})
+        'body': json.dumps({
+            'status': 'healthy',
+            'ruleset': forecast_api.rulesets.info(),
+            'caches': forecast_api.cache_stats(),
+            'upstream': forecast_api.upstream_stats(),
+        })
     }
 
 
 @xray_recorder.capture('handle_forecast')
-def handle_forecast(event: Dict[str, Any]) -> Dict[str, Any]:
+def handle_forecast(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
     """Handle POST /api/forecast - Get forecast with sports scores"""
+    # Opt-in profiling (PROFILE_REQUESTS=1 or an X-Profile header matching PROFILE_TOKEN)
+    mode = requested_mode((event.get('headers') or {}).get('x-profile'))
+    if mode is None:
+        return forecast_response(event, context)
+    with profile_request(mode, "forecast") as profile:
+        response = forecast_response(event, context)
+    if response['statusCode'] == 200:
+        body = json.loads(response['body'])
+        body['meta']['profile'] = profile.summary()
+        response['body'] = json.dumps(body)
+    return response
+
+
+def forecast_response(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Build the /api/forecast response"""
+    # Budget for the whole request, bounded by the invocation's remaining time
+    deadline = forecast_api.new_deadline(context)
     try:
         print("Starting forecast request processing")
         
@@ -114,38 +171,83 @@ def handle_forecast(event: Dict[str, Any]) -> Dict[str, Any]:
         print(f"Request body: {body}")
         if isinstance(body, str):
             body = json.loads(body)
+        time_format = body.get('time_format', 'iso')
+        if time_format not in TIME_FORMATS:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f'time_format must be one of {TIME_FORMATS}'})
+            }
+        days = body.get('days')
+        try:
+            cursor = parse_cursor(body.get('cursor'))
+            if days is not None and not (isinstance(days, int) and 1 <= days <= MAX_PAGE_DAYS):
+                raise ValueError(f"days must be an integer from 1 to {MAX_PAGE_DAYS}")
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': str(e)})
+            }
         
-        latitude = body.get('latitude')
-        longitude = body.get('longitude')
-        
-        # Use provided coordinates or defaults
-        if latitude is None:
-            latitude = forecast_api.app_config["test_geo"]["latitude"]
-        if longitude is None:
-            longitude = forecast_api.app_config["test_geo"]["longitude"]
+        # Resolve to a catalog spot when possible, else use provided coordinates or defaults
+        try:
+            with metrics.stage("forecast", "resolve"):
+                latitude, longitude, spot = forecast_api.resolve_location(
+                    latitude=body.get('latitude'),
+                    longitude=body.get('longitude'),
+                    spot_id=body.get('spot_id'),
+                )
+                # One ruleset snapshot per request (with the user's profile applied); a concurrent
+                # reload never changes it mid-request
+                ruleset = forecast_api.ruleset_for(profile_id=body.get('profile_id'), overlay=body.get('overlay'))
+        except RulesetError as e:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': str(e)})
+            }
+        except (UnknownSpot, UnknownProfile) as e:
+            return {
+                'statusCode': 404,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': str(e)})
+            }
         
-        print(f"Using coordinates: lat={latitude}, lon={longitude}")
+        print(f"Using coordinates: lat={latitude}, lon={longitude}, spot={spot['id'] if spot else None}")
         
-        # Get marine forecast
-        print("Fetching marine forecast...")
-        marine_forecast = forecast_api.get_forecast(latitude=latitude, longitude=longitude)
-        print("Parsing marine forecast response...")
-        marine_df = forecast_api.parse_api_response(marine_forecast)
+        # Marine forecast joined with weather (wind + UV)
+        print("Fetching marine + weather forecast...")
+        with metrics.stage("forecast", "fetch"):
+            marine_forecast, hourly, freshness = forecast_api.load_forecast(
+                latitude=latitude, longitude=longitude, deadline=deadline,
+            )
         
-        # Get weather forecast (UV index)
-        try:
-            weather_forecast = forecast_api.get_weather_forecast(latitude=latitude, longitude=longitude)
-            weather_df = forecast_api.parse_weather_response(weather_forecast)
-            # Merge UV index into marine data
-            marine_df = forecast_api.merge_weather_data(marine_df, weather_df)
-        except Exception as e:
-            # If weather API fails, continue without UV index
-            print(f"Warning: Could not fetch UV index: {e}")
-        
-        print("Converting to hourly JSON...")
-        hourly = forecast_api.to_hourly_json(marine_df)
         print(f"Scoring forecast for {len(hourly)} hours...")
-        scores = score_forecast(hourly, rules=forecast_api.CONDITION_RULESET)
+        score_start = time.perf_counter()
+        with metrics.stage("forecast", "score"):
+            if days is None:
+                window, page = hourly, None
+                scores = forecast_api.score_hourly(
+                    hourly,
+                    location_key=forecast_api.location_key(marine_forecast, spot),
+                    rules=ruleset.rules,
+                    deadline=deadline,
+                    time_format=time_format,
+                )
+            else:
+                # One page of local days; scored days are cached for the following pages
+                scores, window, page = forecast_api.score_page(
+                    hourly,
+                    location_key=forecast_api.location_key(marine_forecast, spot),
+                    utc_offset_seconds=marine_forecast.UtcOffsetSeconds(),
+                    days=days,
+                    cursor=cursor,
+                    rules=ruleset.rules,
+                    deadline=deadline,
+                    time_format=time_format,
+                )
+        metrics.observe_scoring("forecast", len(scores), time.perf_counter() - score_start)
         print("Forecast processing complete")
         
         # Build response
@@ -159,6 +261,17 @@ def handle_forecast(event: Dict[str, Any]) -> Dict[str, Any]:
                 },
                 "elevation_m_asl": marine_forecast.Elevation(),
                 "utc_offset_seconds": marine_forecast.UtcOffsetSeconds(),
+                "spot": spot,
+                "ruleset_version": ruleset.version,
+                "data": freshness,
+                # True when the deadline cut scoring short (scores cover only the leading hours)
+                "truncated": len(scores) < len(window),
+                "profile_id": body.get('profile_id'),
+                "time_format": time_format,
+                # Hour i of scores is start + i * interval_seconds (epoch seconds, UTC)
+                "time_axis": window.time_axis_meta(len(scores)),
+                # {"days": [...], "next_cursor": ...} for day-paged requests
+                "page": page,
             },
             "scores": scores,
         }
@@ -169,6 +282,18 @@ def handle_forecast(event: Dict[str, Any]) -> Dict[str, Any]:
             'body': json.dumps(payload)
         }
         
+    except UpstreamUnavailable as e:
+        return {
+            'statusCode': 503,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except DeadlineExceeded as e:
+        return {
+            'statusCode': 504,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
         print(f"Error: {str(e)}")
         traceback.print_exc()
@@ -179,6 +304,155 @@ def handle_forecast(event: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+@xray_recorder.capture('handle_best_spots')
+def handle_best_spots(event: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+    """Handle POST /api/best-spots - Rank nearby spots for one sport"""
+    try:
+        body = event.get('body', '{}')
+        if isinstance(body, str):
+            body = json.loads(body)
+        
+        latitude = body.get('latitude')
+        longitude = body.get('longitude')
+        if latitude is None:
+            latitude = forecast_api.app_config["test_geo"]["latitude"]
+        if longitude is None:
+            longitude = forecast_api.app_config["test_geo"]["longitude"]
+        sport = body.get('sport')
+        if not sport:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': "'sport' is required"})
+            }
+        
+        print(f"Ranking spots for {sport} around lat={latitude}, lon={longitude}")
+        payload = forecast_api.best_spots(
+            latitude=float(latitude),
+            longitude=float(longitude),
+            sport=sport,
+            radius_km=float(body.get('radius_km', 25.0)),
+            window_start=body.get('window_start'),
+            window_hours=max(1, min(int(body.get('window_hours', 24)), 168)),
+            metric=body.get('metric', 'peak'),
+            top_k=max(1, min(int(body.get('top_k', 5)), 20)),
+            deadline=forecast_api.new_deadline(context),
+        )
+        
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': json.dumps(payload)
+        }
+        
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except UpstreamUnavailable as e:
+        return {
+            'statusCode': 503,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except DeadlineExceeded as e:
+        return {
+            'statusCode': 504,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': f'Error ranking spots: {str(e)}'})
+        }
+
+
+@xray_recorder.capture('handle_region')
+def handle_region(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle POST /api/region - Score grid over a bounding box for map overlays"""
+    try:
+        body = event.get('body', '{}')
+        if isinstance(body, str):
+            body = json.loads(body)
+        
+        missing = [k for k in ('south', 'west', 'north', 'east') if body.get(k) is None]
+        if missing:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f'Missing bounding box fields: {missing}'})
+            }
+        grid_format = body.get('format', 'json')
+        if grid_format not in GRID_FORMATS:
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f'format must be one of {GRID_FORMATS}'})
+            }
+        
+        grid = forecast_api.region_grid(
+            south=float(body['south']),
+            west=float(body['west']),
+            north=float(body['north']),
+            east=float(body['east']),
+            step_deg=float(body.get('step_deg', 0.1)),
+            start=body.get('start'),
+            hours=int(body.get('hours', 24)),
+            sports=body.get('sports'),
+        )
+        
+        if grid_format == 'binary':
+            meta = {k: v for k, v in grid.items() if k != 'data'}
+            headers = get_cors_headers()
+            headers['Content-Type'] = 'application/octet-stream'
+            headers['X-Grid-Meta'] = json.dumps(meta)
+            return {
+                'statusCode': 200,
+                'headers': headers,
+                'isBase64Encoded': True,
+                'body': base64.b64encode(grid['data'].tobytes()).decode('ascii')
+            }
+        
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': json.dumps(encode_grid(grid))
+        }
+        
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except UpstreamUnavailable as e:
+        return {
+            'statusCode': 503,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except DeadlineExceeded as e:
+        return {
+            'statusCode': 504,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
+        }
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        traceback.print_exc()
+        return {
+            'statusCode': 500,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': f'Error building region grid: {str(e)}'})
+        }
+
+
 def get_cors_headers() -> Dict[str, str]:
     """Get CORS headers"""
     return {
@@ -0,0 +1,146 @@
+"""
+On-disk columnar forecast store shared by every worker on a host.
+
+One directory per grid cell, one run per fetch window (run_seconds, default one hour):
+
+    <root>/<lat>_<lon>/<run>.npy    float32, variables x hours (each variable one contiguous row)
+    <root>/<lat>_<lon>/<run>.json   variable names, time axis, location meta, fetched_at
+
+Runs are written to a temp file and os.replace()d into place, array first and header last,
+so readers only ever see complete runs. Readers memory-map the array, so uvicorn workers
+and warm Lambda containers share the page cache instead of each re-parsing flatbuffers,
+and a restarted process is warm without re-fetching.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, NamedTuple
+
+import numpy as np
+
+
+class StoredForecast(NamedTuple):
+    columns: dict[str, np.ndarray]  # read-only float32 views into the mapped file
+    time_axis: tuple[int, int, int]  # (start epoch s, interval s, length)
+    location: dict[str, float]
+    fetched_at: float
+
+
+class StoredResponse:
+    """The WeatherApiResponse accessors the API reads, backed by a stored run"""
+
+    def __init__(self, location: dict[str, float]):
+        self._location = location
+
+    def Latitude(self) -> float:
+        return self._location["latitude"]
+
+    def Longitude(self) -> float:
+        return self._location["longitude"]
+
+    def Elevation(self) -> float:
+        return self._location["elevation"]
+
+    def UtcOffsetSeconds(self) -> int:
+        return int(self._location["utc_offset_seconds"])
+
+
+class ColumnStore:
+    def __init__(self, root: str, *, cell_deg: float = 0.01, run_seconds: int = 3600, keep_runs: int = 2):
+        self.root = root
+        self.cell_deg = cell_deg
+        self.run_seconds = run_seconds
+        self.keep_runs = keep_runs
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "write_errors": 0}
+        os.makedirs(root, exist_ok=True)
+
+    def _cell_dir(self, latitude: float, longitude: float) -> str:
+        lat = round(latitude / self.cell_deg) * self.cell_deg
+        lon = round(longitude / self.cell_deg) * self.cell_deg
+        return os.path.join(self.root, f"{lat:.4f}_{lon:.4f}")
+
+    def _runs(self, cell_dir: str) -> list[int]:
+        """Committed runs (those with a header), newest first"""
+        try:
+            names = os.listdir(cell_dir)
+        except FileNotFoundError:
+            return []
+        return sorted((int(n[:-5]) for n in names if n.endswith(".json") and n[:-5].isdigit()), reverse=True)
+
+    @staticmethod
+    def _replace(path: str, write) -> None:
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def put(
+        self,
+        latitude: float,
+        longitude: float,
+        columns: dict[str, Any],
+        *,
+        time_axis: tuple[int, int, int],
+        location: dict[str, float],
+        fetched_at: float | None = None,
+    ) -> None:
+        """Write one run for the cell; failures are logged and ignored (the store is only a cache)"""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        run = int(fetched_at // self.run_seconds) * self.run_seconds
+        cell_dir = self._cell_dir(latitude, longitude)
+        try:
+            os.makedirs(cell_dir, exist_ok=True)
+            names = list(columns)
+            data = np.stack([np.asarray(columns[n], dtype=np.float32) for n in names])
+            header = {
+                "names": names,
+                "time_axis": [int(v) for v in time_axis],
+                "location": location,
+                "fetched_at": fetched_at,
+            }
+            base = os.path.join(cell_dir, str(run))
+            self._replace(base + ".npy", lambda f: np.save(f, data, allow_pickle=False))
+            self._replace(base + ".json", lambda f: f.write(json.dumps(header).encode("utf-8")))
+            self.stats["writes"] += 1
+            for old in self._runs(cell_dir)[self.keep_runs:]:
+                for ext in (".json", ".npy"):
+                    try:
+                        os.remove(os.path.join(cell_dir, f"{old}{ext}"))
+                    except FileNotFoundError:
+                        pass
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            print(f"Warning: could not write forecast store run {cell_dir}/{run}: {e}")
+
+    def get(self, latitude: float, longitude: float, *, max_age_seconds: float) -> StoredForecast | None:
+        """Newest run for the cell fetched within max_age_seconds, memory-mapped; else None"""
+        cell_dir = self._cell_dir(latitude, longitude)
+        runs = self._runs(cell_dir)
+        stored = self._read(os.path.join(cell_dir, str(runs[0])), max_age_seconds) if runs else None
+        self.stats["hits" if stored is not None else "misses"] += 1
+        return stored
+
+    @staticmethod
+    def _read(base: str, max_age_seconds: float) -> StoredForecast | None:
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                header = json.load(f)
+            if time.time() - header["fetched_at"] > max_age_seconds:
+                return None
+            data = np.load(base + ".npy", mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError, KeyError):
+            # Pruned or replaced by another worker between listing and opening
+            return None
+        if data.shape != (len(header["names"]), header["time_axis"][2]):
+            return None  # header and array from different writes of the same run
+        return StoredForecast(
+            columns={name: data[i] for i, name in enumerate(header["names"])},
+            time_axis=tuple(header["time_axis"]),
+            location=header["location"],
+            fetched_at=header["fetched_at"],
+        )
@@ -0,0 +1,240 @@
+"""
+Request, stage, upstream and cache metrics.
+
+Histograms and counters live in this process; render() turns them (plus the cache and
+upstream counters ForecastAPI already keeps) into Prometheus text for GET /metrics. Lambda has
+nothing to scrape, so emit_emf() prints one CloudWatch Embedded Metric Format record per
+invocation instead, with the request's stage timings and the cache counter deltas.
+
+    with stage("forecast", "fetch"):
+        ...
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+RATE_BUCKETS = (1e2, 1e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 1e6)
+# Cache stats that are levels rather than running totals
+_GAUGE_STATS = {"size", "max_entries", "hit_rate"}
+
+
+# Endpoint label for requests no route matched, so unknown URLs don't each add a series
+UNMATCHED_ENDPOINT = "unmatched"
+
+
+def _escape(value: Any) -> str:
+    """Label value escaped for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            row[bisect_left(self.buckets, value)] += 1
+            row[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for labels, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le_label)} {cumulative:g}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {row[-1]:g}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative:g}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("surfingpal_request_seconds", "End-to-end request latency", ("endpoint", "status"))
+STAGE_SECONDS = Histogram("surfingpal_stage_seconds", "Latency of one request stage", ("endpoint", "stage"))
+UPSTREAM_SECONDS = Histogram("surfingpal_upstream_seconds", "Open-Meteo call latency", ("host", "outcome"))
+RESPONSE_BYTES = Histogram("surfingpal_response_bytes", "Response body size", ("endpoint",), BYTES_BUCKETS)
+SCORING_RATE = Histogram(
+    "surfingpal_scoring_hours_per_second", "Hours scored per second of the score stage", ("endpoint",), RATE_BUCKETS,
+)
+HOURS_SCORED = Counter("surfingpal_hours_scored_total", "Scored hours returned", ("endpoint",))
+_METRICS = (REQUEST_SECONDS, STAGE_SECONDS, UPSTREAM_SECONDS, RESPONSE_BYTES, SCORING_RATE, HOURS_SCORED)
+
+_request = threading.local()
+
+
+def begin_request() -> None:
+    """Start collecting this thread's stage timings (for the per-invocation EMF record)"""
+    _request.stages = {}
+
+
+@contextmanager
+def stage(endpoint: str, name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        STAGE_SECONDS.observe(seconds, endpoint, name)
+        stages = getattr(_request, "stages", None)
+        if stages is not None:
+            stages[name] = stages.get(name, 0.0) + seconds
+
+
+def observe_scoring(endpoint: str, hours: int, seconds: float) -> None:
+    HOURS_SCORED.inc(endpoint, amount=hours)
+    if seconds > 0 and hours:
+        SCORING_RATE.observe(hours / seconds, endpoint)
+        stages = getattr(_request, "stages", None)
+        if stages is not None:
+            stages["hours_per_second"] = hours / seconds
+
+
+def observe_upstream(host: str, seconds: float, ok: bool) -> None:
+    """UpstreamClient on_call hook"""
+    UPSTREAM_SECONDS.observe(seconds, host, "ok" if ok else "error")
+
+
+def observe_request(endpoint: str, status: int, seconds: float, response_bytes: int) -> None:
+    REQUEST_SECONDS.observe(seconds, endpoint, str(status))
+    RESPONSE_BYTES.observe(response_bytes, endpoint)
+
+
+def _flatten(prefix: str, stats: Any, out: dict[str, float]) -> None:
+    if isinstance(stats, dict):
+        for k, v in stats.items():
+            _flatten(f"{prefix}.{k}" if prefix else str(k), v, out)
+    elif isinstance(stats, (int, float)) and not isinstance(stats, bool):
+        out[prefix] = float(stats)
+
+
+def render(cache_stats: dict[str, Any], upstream_stats: dict[str, dict]) -> str:
+    """Prometheus text exposition of everything above plus the pulled cache / upstream stats"""
+    lines: list[str] = []
+    for metric in _METRICS:
+        lines += metric.render()
+
+    flat: dict[str, float] = {}
+    _flatten("", cache_stats, flat)
+    lines += ["# HELP surfingpal_cache_events_total Cache counters", "# TYPE surfingpal_cache_events_total counter"]
+    lines += [
+        f'surfingpal_cache_events_total{_labels(("cache", "event"), tuple(k.rsplit(".", 1)))} {v:g}'
+        for k, v in flat.items() if k.rsplit(".", 1)[-1] not in _GAUGE_STATS
+    ]
+    lines += ["# HELP surfingpal_cache Cache levels", "# TYPE surfingpal_cache gauge"]
+    lines += [
+        f'surfingpal_cache{_labels(("cache", "stat"), tuple(k.rsplit(".", 1)))} {v:g}'
+        for k, v in flat.items() if k.rsplit(".", 1)[-1] in _GAUGE_STATS
+    ]
+
+    lines += ["# HELP surfingpal_upstream_events_total Upstream calls by outcome",
+              "# TYPE surfingpal_upstream_events_total counter"]
+    for host, s in upstream_stats.items():
+        for event in ("calls", "failures", "short_circuited", "hedged", "hedge_wins", "breaker_opens"):
+            lines.append(f'surfingpal_upstream_events_total{_labels(("host", "event"), (host, event))} {s.get(event, 0):g}')
+    lines += ["# HELP surfingpal_upstream_breaker_open 1 while the host's circuit is open",
+              "# TYPE surfingpal_upstream_breaker_open gauge"]
+    lines += [f'surfingpal_upstream_breaker_open{_labels(("host",), (host,))} {int(s["breaker"] == "open")}'
+              for host, s in upstream_stats.items()]
+    return "\n".join(lines) + "\n"
+
+
+_last_counters: dict[str, float] = {}
+
+
+def emit_emf(
+    endpoint: str,
+    status: int,
+    seconds: float,
+    response_bytes: int,
+    cache_stats: dict[str, Any],
+    *,
+    namespace: str = "SurfingPal",
+) -> None:
+    """
+    Print one CloudWatch EMF record for this invocation (stage timings, sizes, cache deltas).
+    endpoint becomes a dimension: pass the route, or UNMATCHED_ENDPOINT, never a raw path.
+    """
+    observe_request(endpoint, status, seconds, response_bytes)
+    values: dict[str, float] = {"RequestLatency": seconds * 1000, "ResponseBytes": response_bytes}
+    units = {"RequestLatency": "Milliseconds", "ResponseBytes": "Bytes"}
+    for name, value in (getattr(_request, "stages", None) or {}).items():
+        if name == "hours_per_second":
+            values["HoursScoredPerSecond"] = value
+            units["HoursScoredPerSecond"] = "Count/Second"
+        else:
+            key = "Stage_" + name
+            values[key] = value * 1000
+            units[key] = "Milliseconds"
+
+    # Cache counters as deltas since the previous invocation of this container
+    flat: dict[str, float] = {}
+    _flatten("", cache_stats, flat)
+    for k, v in flat.items():
+        if k.rsplit(".", 1)[-1] in _GAUGE_STATS:
+            continue
+        delta = v - _last_counters.get(k, 0.0)
+        _last_counters[k] = v
+        if delta:
+            key = "Cache_" + k.replace(".", "_")
+            values[key] = delta
+            units[key] = "Count"
+
+    record = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": namespace,
+                "Dimensions": [["Endpoint"]],
+                "Metrics": [{"Name": k, "Unit": units[k]} for k in values],
+            }],
+        },
+        "Endpoint": endpoint,
+        "StatusCode": status,
+        **values,
+    }
+    _request.stages = None
+    print(json.dumps(record))
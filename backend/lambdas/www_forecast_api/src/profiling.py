@@ -0,0 +1,149 @@
+"""
+Opt-in profiling of single forecast requests.
+
+A request is profiled when PROFILE_REQUESTS=1, or when it carries an `X-Profile` header equal to
+PROFILE_TOKEN (no token configured = header ignored). PROFILE_MODE picks the profiler:
+
+- "cprofile" (default): deterministic profile of the request thread, saved as a .prof file
+  (pstats; open with snakeviz, or convert with flameprof for a flamegraph).
+- "sample": a sampling profiler over the request thread and the upstream fetch threads,
+  saved as collapsed stacks ("frame;frame;frame count"), the input format of flamegraph.pl
+  and speedscope.
+
+Files go to PROFILE_DIR; the top functions are printed to the log and returned by summary().
+Settings are read once at import, so an unprofiled request costs one function call.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+PROFILE_ALL = os.environ.get('PROFILE_REQUESTS') == '1'
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN') or None
+PROFILE_MODE = os.environ.get('PROFILE_MODE', 'cprofile')
+PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'surfingpal-profiles')
+SAMPLE_INTERVAL_SECONDS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', '2')) / 1000.0
+TOP_N = 15
+
+# Threads besides the request thread that do a request's work (see ForecastAPI / UpstreamClient)
+_WORKER_PREFIXES = ("fetch", "upstream-hedge")
+# Leaf frames of pool threads that are just waiting for work
+_IDLE_FILES = ("threading.py", "queue.py", "thread.py")
+
+
+def requested_mode(header_token: str | None = None) -> str | None:
+    """Profiler to use for this request, or None (the common case) to run it unprofiled"""
+    if PROFILE_ALL:
+        return PROFILE_MODE
+    if header_token and PROFILE_TOKEN and hmac.compare_digest(header_token, PROFILE_TOKEN):
+        return PROFILE_MODE
+    return None
+
+
+class RequestProfile:
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.path: str | None = None
+        self.elapsed_ms = 0.0
+        self.top: list[dict[str, Any]] = []
+
+    def summary(self) -> dict[str, Any]:
+        return {"mode": self.mode, "path": self.path, "elapsed_ms": self.elapsed_ms, "top": self.top}
+
+    def log(self) -> None:
+        print(f"Profile of {self.label} ({self.mode}, {self.elapsed_ms} ms) saved to {self.path}")
+        for row in self.top:
+            print("  " + "  ".join(f"{k}={v}" for k, v in row.items()))
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class _Sampler(threading.Thread):
+    """Periodically records the stacks of the request thread and the fetch worker threads"""
+
+    def __init__(self, request_thread: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.request_thread = request_thread
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.leaves: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                is_request = ident == self.request_thread
+                if not is_request and not name.startswith(_WORKER_PREFIXES):
+                    continue
+                if not is_request and os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.leaves[stack[0]] += 1
+                self.stacks[";".join(["request" if is_request else name.split("_")[0]] + stack[::-1])] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+@contextmanager
+def profile_request(mode: str, label: str) -> Iterator[RequestProfile]:
+    """Profile the body of the with-block; the profile is saved and logged on exit"""
+    profile = RequestProfile(mode, label)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, f"{label}-{int(time.time() * 1000)}-{os.getpid()}")
+    start = time.perf_counter()
+    if mode == "sample":
+        sampler = _Sampler(threading.get_ident(), SAMPLE_INTERVAL_SECONDS)
+        sampler.start()
+        try:
+            yield profile
+        finally:
+            sampler.stop()
+            profile.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            profile.path = base + ".collapsed"
+            with open(profile.path, "w", encoding="utf-8") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in sampler.stacks.items())
+            total = sum(sampler.leaves.values()) or 1
+            profile.top = [
+                {"function": fn, "samples": n, "self_pct": round(100.0 * n / total, 1)}
+                for fn, n in sampler.leaves.most_common(TOP_N)
+            ]
+            profile.log()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profile
+        finally:
+            profiler.disable()
+            profile.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            profile.path = base + ".prof"
+            stats = pstats.Stats(profiler)
+            stats.dump_stats(profile.path)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:TOP_N]
+            profile.top = [
+                {
+                    "function": f"{fn} ({os.path.basename(file)}:{line})",
+                    "calls": nc,
+                    "self_ms": round(tt * 1000, 2),
+                    "cumulative_ms": round(ct * 1000, 2),
+                }
+                for (file, line, fn), (cc, nc, tt, ct, callers) in rows
+            ]
+            profile.log()
@@ -0,0 +1,196 @@
+"""
+Regional score grids for map overlays.
+
+A bounding box is sampled on a regular lat/lon grid that is split into fixed tiles of
+TILE_CELLS x TILE_CELLS cells. Each tile is fetched with chunked multi-location calls
+(marine, plus weather when the sports read wind or UV, joined on by time as for a forecast),
+scored for all sports at once with vectorized.score_columns (cells x hours x sports),
+quantized to uint8 and cached, so overlapping map views reuse tiles.
+"""
+import base64
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+from hourly import align_columns, response_columns
+from ruleset import required_variables, score_variables
+from vectorized import score_columns
+
+TILE_CELLS = 16
+# Scores are stored as round(score * SCORE_SCALE); NODATA marks land / missing model data
+SCORE_SCALE = 254
+NODATA = 255
+# "json": base64 data in a JSON body; "binary": the raw uint8 array as the body
+GRID_FORMATS = ("json", "binary")
+
+
+def grid_index(value: float, origin: float, step_deg: float) -> int:
+    return int(round((value - origin) / step_deg))
+
+
+def columns_from_responses(responses: list) -> tuple[int, int, dict[str, np.ndarray]]:
+    """
+    Stack hourly variables of several responses into (cells x hours) arrays, by variable name.
+    Responses of one multi-location call share a time axis; shorter ones are NaN-padded.
+    """
+    first = responses[0].Hourly()
+    start, interval = first.Time(), first.Interval()
+    hours = max(int((r.Hourly().TimeEnd() - r.Hourly().Time()) // interval) for r in responses)
+    columns: dict[str, np.ndarray] = {}
+    for row, response in enumerate(responses):
+        hourly = response.Hourly()
+        offset = int((hourly.Time() - start) // interval)
+        for name, values in response_columns(hourly).items():
+            if name not in columns:
+                columns[name] = np.full((len(responses), hours), np.nan, dtype=np.float32)
+            n = min(len(values), hours - offset)
+            if n > 0:
+                columns[name][row, offset:offset + n] = values[:n]
+    return start, interval, columns
+
+
+def quantize_scores(scores: np.ndarray) -> np.ndarray:
+    out = np.full(scores.shape, NODATA, dtype=np.uint8)
+    valid = ~np.isnan(scores)
+    out[valid] = np.rint(scores[valid] * SCORE_SCALE).astype(np.uint8)
+    return out
+
+
+class RegionGrid:
+    """Tile-cached cells x hours x sports score grids"""
+
+    def __init__(
+        self,
+        fetch: Callable[[list[tuple[float, float]], list[str]], list],
+        params: list[str],
+        *,
+        fetch_weather: Callable[[list[tuple[float, float]], list[str]], list] | None = None,
+        weather_params: list[str] = (),
+        max_tiles: int = 64,
+        ttl_seconds: int = 3600,
+        dtype: type = np.float64,
+    ):
+        self.fetch = fetch
+        self.params = params
+        # Wind / UV from the weather API, joined onto the marine columns like a forecast's
+        self.fetch_weather = fetch_weather
+        self.weather_params = list(weather_params) if fetch_weather is not None else []
+        # Scoring precision; float32 stays within one uint8 step of float64
+        self.dtype = dtype
+        self.max_tiles = max_tiles
+        self.ttl_seconds = ttl_seconds
+        self._tiles: OrderedDict[tuple, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"tile_hits": 0, "tile_misses": 0}
+
+    def _tile(self, ti: int, tj: int, step_deg: float, sports: tuple[str, ...], rules: dict, version: str) -> dict[str, Any]:
+        key = (ti, tj, step_deg, sports, version)
+        now = time.time()
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None and now - tile["created"] < self.ttl_seconds:
+                self._tiles.move_to_end(key)
+                self.stats["tile_hits"] += 1
+                return tile
+
+        lat_idx = np.arange(ti * TILE_CELLS, (ti + 1) * TILE_CELLS)
+        lon_idx = np.arange(tj * TILE_CELLS, (tj + 1) * TILE_CELLS)
+        lats = np.round(-90 + lat_idx * step_deg, 4)
+        lons = np.round(((-180 + lon_idx * step_deg + 180) % 360) - 180, 4)
+        valid_lat = (lats >= -90) & (lats <= 90)
+        locations = [(float(a), float(b)) for a in lats[valid_lat] for b in lons]
+
+        # Only the variables these sports read (wave_height also marks land cells)
+        needed = required_variables(rules, list(sports)) | {"wave_height"}
+        responses = self.fetch(locations, [p for p in self.params if p in needed])
+        start, interval, columns = columns_from_responses(responses)
+        hours = next(iter(columns.values())).shape[1]
+        complete = True
+        # Weather only when the scores read it (wind sports); UV feeds tips, which grids don't have
+        scored = score_variables(rules, list(sports))
+        weather_vars = [p for p in self.weather_params if p in scored]
+        if weather_vars:
+            try:
+                w_start, w_interval, weather = columns_from_responses(self.fetch_weather(locations, weather_vars))
+                w_hours = next(iter(weather.values())).shape[1]
+                columns.update(align_columns(weather, (w_start, w_interval, w_hours), (start, interval, hours)))
+            except Exception as e:
+                # Wind sports fall back to the wind-wave proxy; the tile is not cached
+                print(f"Warning: Could not fetch weather data for region tile: {e}")
+                complete = False
+        scores = np.full((TILE_CELLS, TILE_CELLS, hours, len(sports)), NODATA, dtype=np.uint8)
+        rows = int(valid_lat.sum())
+        for s, sport in enumerate(sports):
+            raw = score_columns(columns, sport_key=sport, rules=rules, dtype=self.dtype)
+            # No wave model data (land) means no score rather than a zero score
+            raw = np.where(np.isnan(columns["wave_height"]), np.nan, raw)
+            scores[valid_lat, :, :, s] = quantize_scores(raw).reshape(rows, TILE_CELLS, hours)
+
+        tile = {"created": now, "start": start, "interval": interval, "scores": scores}
+        if not complete:
+            return tile
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+            self.stats["tile_misses"] += 1
+        return tile
+
+    def grid(
+        self,
+        *,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        step_deg: float,
+        start_epoch: int,
+        hours: int,
+        sports: list[str],
+        rules: dict[str, Any],
+        version: str,
+    ) -> dict[str, Any]:
+        """uint8 scores with shape (n_lat, n_lon, hours, sports) for the box and hour range"""
+        i0, i1 = grid_index(south, -90, step_deg), grid_index(north, -90, step_deg)
+        j0, j1 = grid_index(west, -180, step_deg), grid_index(east, -180, step_deg)
+        n_lat, n_lon = i1 - i0 + 1, j1 - j0 + 1
+        out = np.full((n_lat, n_lon, hours, len(sports)), NODATA, dtype=np.uint8)
+        interval = 3600
+
+        for ti in range(math.floor(i0 / TILE_CELLS), math.floor(i1 / TILE_CELLS) + 1):
+            for tj in range(math.floor(j0 / TILE_CELLS), math.floor(j1 / TILE_CELLS) + 1):
+                tile = self._tile(ti, tj, step_deg, tuple(sports), rules, version)
+                interval = tile["interval"]
+                # Overlap of this tile with the box, in tile-local and output coordinates
+                a0, a1 = max(i0, ti * TILE_CELLS), min(i1, (ti + 1) * TILE_CELLS - 1)
+                b0, b1 = max(j0, tj * TILE_CELLS), min(j1, (tj + 1) * TILE_CELLS - 1)
+                # Align the tile's time axis with the requested window
+                offset = int((start_epoch - tile["start"]) // interval)
+                h0, h1 = max(offset, 0), min(offset + hours, tile["scores"].shape[2])
+                if h1 <= h0:
+                    continue
+                out[a0 - i0:a1 - i0 + 1, b0 - j0:b1 - j0 + 1, h0 - offset:h1 - offset] = \
+                    tile["scores"][a0 - ti * TILE_CELLS:a1 - ti * TILE_CELLS + 1,
+                                   b0 - tj * TILE_CELLS:b1 - tj * TILE_CELLS + 1, h0:h1]
+
+        return {
+            "lats": [round(-90 + i * step_deg, 4) for i in range(i0, i1 + 1)],
+            "lons": [round(((-180 + j * step_deg + 180) % 360) - 180, 4) for j in range(j0, j1 + 1)],
+            "time": {"start": start_epoch, "interval": interval, "length": hours},
+            "sports": list(sports),
+            "shape": list(out.shape),
+            "dtype": "uint8",
+            "scale": SCORE_SCALE,
+            "nodata": NODATA,
+            "data": out,
+        }
+
+
+def encode_grid(grid: dict[str, Any]) -> dict[str, Any]:
+    """JSON-friendly form of grid(): the uint8 array as base64 (row-major, C order)"""
+    return {**grid, "data": base64.b64encode(grid["data"].tobytes()).decode("ascii")}
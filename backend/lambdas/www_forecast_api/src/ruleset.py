@@ -0,0 +1,224 @@
+"""
+Hot-reloadable scoring ruleset.
+
+The built-in ForecastAPI.CONDITION_RULESET is the default. When RULESET_PATH points to a
+JSON file, it is validated, compiled (JSON pairs become tuples) and swapped in atomically;
+the file is re-checked at most every RULESET_RELOAD_SECONDS. Requests take one snapshot
+via current() and keep using it, so a swap never blocks or changes an in-flight request.
+
+    python ruleset.py export rules.json     # write the built-in ruleset as JSON
+    python ruleset.py validate rules.json   # check a file without deploying it
+"""
+import copy
+import json
+import os
+import threading
+import time
+from typing import Any, NamedTuple
+
+from scoring import hard_limit_metric, ruleset_version
+
+# Threshold keys whose values are (low, high) pairs
+_PAIR_KEYS = ("ideal", "ok_range")
+# Upstream variables behind each threshold / hard-limit metric
+METRIC_VARIABLES = {
+    "wave_height_m": ("wave_height",),
+    "wave_period_s": ("wave_period",),
+    "wind_wave_height_m": ("wind_wave_height",),
+    "wind_wave_period_s": ("wind_wave_period",),
+    "swell_share": ("swell_wave_height", "wave_height"),
+    "current_velocity_kmh": ("ocean_current_velocity",),
+    "wind_speed_kmh": ("wind_speed_10m",),
+    "wind_gusts_kmh": ("wind_gusts_10m",),
+}
+# Read for every sport: current penalty, wetsuit / UV / chop tips
+COMMON_VARIABLES = ("ocean_current_velocity", "sea_surface_temperature", "uv_index", "wind_wave_height")
+
+
+class RulesetError(ValueError):
+    """Raised when a ruleset fails validation"""
+
+
+class LoadedRuleset(NamedTuple):
+    rules: dict[str, Any]
+    version: str
+    source: str
+    loaded_at: float
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def validate_ruleset(rules: Any) -> None:
+    """Check the structure score_hour_for_sport relies on; raises RulesetError on the first problem"""
+    if not isinstance(rules, dict):
+        raise RulesetError("ruleset must be an object")
+    for key in ("scoring", "sports"):
+        if not isinstance(rules.get(key), dict):
+            raise RulesetError(f"ruleset.{key} must be an object")
+
+    thresholds = rules["scoring"].get("output", {}).get("label_thresholds")
+    if not isinstance(thresholds, dict) or not thresholds:
+        raise RulesetError("scoring.output.label_thresholds must be a non-empty object")
+    for label, t in thresholds.items():
+        if not _is_number(t) or not 0 <= t <= 1:
+            raise RulesetError(f"label threshold '{label}' must be a number in [0, 1]")
+    for name, cfg in rules["scoring"].get("penalties", {}).items():
+        if not isinstance(cfg, dict) or not all(_is_number(v) for v in cfg.values()):
+            raise RulesetError(f"scoring.penalties.{name} must map to numbers")
+
+    if not rules["sports"]:
+        raise RulesetError("ruleset.sports must define at least one sport")
+    for sport_key, sport in rules["sports"].items():
+        where = f"sports.{sport_key}"
+        if not isinstance(sport, dict):
+            raise RulesetError(f"{where} must be an object")
+        weights = sport.get("weights")
+        if not isinstance(weights, dict) or not weights:
+            raise RulesetError(f"{where}.weights must be a non-empty object")
+        for k, w in weights.items():
+            if not _is_number(w) or w < 0:
+                raise RulesetError(f"{where}.weights.{k} must be a non-negative number")
+        for section in ("thresholds", "hard_limits"):
+            for metric, cfg in sport.get(section, {}).items():
+                if not isinstance(cfg, dict):
+                    raise RulesetError(f"{where}.{section}.{metric} must be an object")
+                for k, v in cfg.items():
+                    if k in _PAIR_KEYS:
+                        if not (isinstance(v, (list, tuple)) and len(v) == 2
+                                and all(_is_number(x) for x in v) and v[0] <= v[1]):
+                            raise RulesetError(f"{where}.{section}.{metric}.{k} must be a [low, high] pair")
+                    elif not _is_number(v):
+                        raise RulesetError(f"{where}.{section}.{metric}.{k} must be a number")
+        for list_key in ("inputs", "context_fields"):
+            values = sport.get(list_key, [])
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise RulesetError(f"{where}.{list_key} must be a list of strings")
+
+
+def compile_ruleset(rules: dict[str, Any]) -> dict[str, Any]:
+    """Validated private copy with pairs as tuples, ready for score_hour_for_sport"""
+    validate_ruleset(rules)
+    compiled = copy.deepcopy(rules)
+    for sport in compiled["sports"].values():
+        for section in ("thresholds", "hard_limits"):
+            for cfg in sport.get(section, {}).values():
+                for k in _PAIR_KEYS:
+                    if k in cfg:
+                        cfg[k] = tuple(cfg[k])
+    return compiled
+
+
+def score_variables(rules: dict[str, Any], sports: list[str] | None = None) -> set[str]:
+    """Upstream variables the scores themselves can read (not tips or context), e.g. for region grids"""
+    if sports is None:
+        sports = [k for k, v in rules["sports"].items() if v.get("enabled", True)]
+    # The current penalty applies to every sport
+    needed = {"ocean_current_velocity"}
+    for sport_key in sports:
+        sport = rules["sports"][sport_key]
+        for metric in sport.get("thresholds", {}):
+            needed.update(METRIC_VARIABLES.get(metric, ()))
+        for metric in sport.get("hard_limits", {}):
+            # Keys without a derived metric are checked against the hour field itself
+            needed.update(METRIC_VARIABLES.get(metric, (hard_limit_metric(metric),)))
+    return needed
+
+
+def required_variables(rules: dict[str, Any], sports: list[str] | None = None) -> set[str]:
+    """Upstream variables scoring can read for the given sports (all enabled sports by default)"""
+    if sports is None:
+        sports = [k for k, v in rules["sports"].items() if v.get("enabled", True)]
+    needed = set(COMMON_VARIABLES) | score_variables(rules, sports)
+    for sport_key in sports:
+        sport = rules["sports"][sport_key]
+        needed.update(sport.get("inputs", ()))
+        needed.update(sport.get("context_fields", ()))
+    return needed
+
+
+class RulesetStore:
+    """Holds the active ruleset and swaps it when the backing file changes"""
+
+    def __init__(self, default_rules: dict[str, Any], *, path: str | None = None, reload_seconds: float = 30.0):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.last_error: str | None = None
+        self._swap_lock = threading.Lock()
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        compiled = compile_ruleset(default_rules)
+        self._current = LoadedRuleset(compiled, ruleset_version(compiled), "builtin", time.time())
+        if path:
+            self.reload()
+
+    def current(self) -> LoadedRuleset:
+        """Snapshot of the active ruleset (re-checks the file when the interval has passed)"""
+        if self.path and time.time() - self._checked_at >= self.reload_seconds:
+            self.reload()
+        return self._current
+
+    def swap(self, rules: dict[str, Any], *, source: str = "api") -> LoadedRuleset:
+        """Validate, compile and atomically activate a ruleset; raises RulesetError if invalid"""
+        compiled = compile_ruleset(rules)
+        loaded = LoadedRuleset(compiled, ruleset_version(compiled), source, time.time())
+        # A single reference assignment: readers see either the old or the new ruleset
+        self._current = loaded
+        print(f"Ruleset {loaded.version} activated from {source}")
+        return loaded
+
+    def reload(self) -> bool:
+        """Load the ruleset file if it changed; keeps the active ruleset on any error"""
+        if not self._swap_lock.acquire(blocking=False):
+            return False  # another thread is already reloading
+        try:
+            self._checked_at = time.time()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError as e:
+                self.last_error = f"Could not stat ruleset file: {e}"
+                return False
+            if mtime == self._mtime:
+                return False
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    rules = json.load(f)
+                self.swap(rules, source=self.path)
+                self.last_error = None
+                return True
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                print(f"Warning: keeping ruleset {self._current.version}, could not load {self.path}: {e}")
+                return False
+            finally:
+                self._mtime = mtime
+        finally:
+            self._swap_lock.release()
+
+    def info(self) -> dict[str, Any]:
+        current = self._current
+        return {
+            "version": current.version,
+            "source": current.source,
+            "loaded_at": current.loaded_at,
+            "last_error": self.last_error,
+        }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "validate"):
+        print("usage: python ruleset.py export|validate <path.json>")
+        sys.exit(2)
+    command, target = sys.argv[1], sys.argv[2]
+    if command == "export":
+        from forecast_api import ForecastAPI
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(ForecastAPI.CONDITION_RULESET, f, indent=2, ensure_ascii=False)
+        print(f"Wrote built-in ruleset to {target}")
+    else:
+        with open(target, encoding="utf-8") as f:
+            loaded = compile_ruleset(json.load(f))
+        print(f"{target} is valid (version {ruleset_version(loaded)})")
@@ -0,0 +1,159 @@
+"""
+Scored results shared by every worker process on a host.
+
+A fixed-size slot table in one mmap'd file (on /dev/shm by default, so it lives in memory),
+named after its layout (<path>-<slots>x<slot_bytes>) so workers started with different settings
+(e.g. during a rolling restart) use separate files. A file in use is never shrunk, since other
+workers have it mapped and would crash (SIGBUS) touching a slot past its end; a corrupt file is
+replaced by a fresh one instead, and workers still mapping the old one keep it until they exit.
+
+    header   magic, version, slot count, slot size
+    slot i   key digest (16 B) | stored_at (f8) | payload length (u4) | crc32 (u4) | payload
+
+A key hashes to a set of WAYS consecutive slots; a write takes the matching, empty or
+expired slot in that set, else evicts the oldest. Payloads are zlib-compressed JSON.
+Access is serialized with flock() on the file (shared for reads, exclusive for writes) plus a
+thread lock, since flock does not exclude threads of the same process. Readers copy the
+payload out under the lock and decode outside it; the crc catches anything torn.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process cache
+    fcntl = None
+
+_MAGIC = b"SPSCORE1"
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+_SLOT = struct.Struct("<16sdII")
+WAYS = 4
+
+
+class SharedScoreCache:
+    def __init__(self, path: str, *, slots: int = 512, slot_bytes: int = 128 * 1024, ttl_seconds: float = 3600):
+        if fcntl is None:
+            raise RuntimeError("SharedScoreCache needs fcntl (POSIX)")
+        self.path = f"{path}-{slots}x{slot_bytes}"
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.ttl_seconds = ttl_seconds
+        self.capacity = slot_bytes - _SLOT.size
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "too_large": 0}
+        self._thread_lock = threading.Lock()
+
+        size = _HEADER_SIZE + slots * slot_bytes
+        header = _HEADER.pack(_MAGIC, 1, slots, slot_bytes)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                ready = self._prepare(fd, size, header)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except BaseException:
+                os.close(fd)
+                raise
+            if ready:
+                break
+            os.close(fd)
+        self._fd = fd
+        self._mm = mmap.mmap(self._fd, size)
+
+    def _prepare(self, fd: int, size: int, header: bytes) -> bool:
+        """Under the file lock: True once fd holds a table of this layout, False to reopen the path"""
+        stat = os.fstat(fd)
+        try:
+            if os.stat(self.path).st_ino != stat.st_ino:
+                return False  # replaced while we waited for the lock
+        except FileNotFoundError:
+            return False
+        if stat.st_size == 0:
+            # New file: nobody has mapped it yet, so it can be sized in place
+            os.ftruncate(fd, size)
+            os.pwrite(fd, header, 0)
+            return True
+        if stat.st_size == size and os.pread(fd, _HEADER.size, 0) == header:
+            return True
+        # Corrupt (or an older format): swap in an empty table rather than resizing a mapped file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        tmp_fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(tmp_fd, size)
+            os.pwrite(tmp_fd, header, 0)
+        finally:
+            os.close(tmp_fd)
+        os.replace(tmp, self.path)
+        return False
+
+    @contextmanager
+    def _locked(self, mode: int):
+        with self._thread_lock:
+            fcntl.flock(self._fd, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _ways(self, digest: bytes) -> list[int]:
+        first = int.from_bytes(digest[:8], "little") % self.slots
+        return [_HEADER_SIZE + ((first + i) % self.slots) * self.slot_bytes for i in range(min(WAYS, self.slots))]
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: str) -> Any | None:
+        digest = self._digest(key)
+        payload = crc = None
+        with self._locked(fcntl.LOCK_SH):
+            for offset in self._ways(digest):
+                slot_key, stored_at, length, slot_crc = _SLOT.unpack_from(self._mm, offset)
+                if slot_key == digest and length:
+                    if time.time() - stored_at <= self.ttl_seconds:
+                        start = offset + _SLOT.size
+                        payload, crc = self._mm[start:start + length], slot_crc
+                    break
+        if payload is None or zlib.crc32(payload) != crc:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store value (JSON-serializable); returns False if it does not fit in a slot"""
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), 1)
+        if len(payload) > self.capacity:
+            self.stats["too_large"] += 1
+            return False
+        digest = self._digest(key)
+        now = time.time()
+        with self._locked(fcntl.LOCK_EX):
+            target = victim = None
+            oldest = float("inf")
+            for offset in self._ways(digest):
+                slot_key, stored_at, length, _ = _SLOT.unpack_from(self._mm, offset)
+                if slot_key == digest or not length or now - stored_at > self.ttl_seconds:
+                    target = offset
+                    break
+                if stored_at < oldest:
+                    oldest, victim = stored_at, offset
+            if target is None:
+                target = victim
+                self.stats["evictions"] += 1
+            start = target + _SLOT.size
+            # Invalidate, write the payload, then publish the slot header
+            _SLOT.pack_into(self._mm, target, b"\0" * 16, 0.0, 0, 0)
+            self._mm[start:start + len(payload)] = payload
+            _SLOT.pack_into(self._mm, target, digest, now, len(payload), zlib.crc32(payload))
+        self.stats["writes"] += 1
+        return True
+
@@ -0,0 +1,186 @@
+"""
+Spot catalog: named breaks with coordinates, orientation and preferred sports.
+
+Spots are loaded from a local JSON file (SPOT_CATALOG_PATH, default spots.json next
+to this module) and indexed in fixed-size lat/lon buckets, so nearest-spot and radius
+queries only look at a handful of buckets regardless of catalog size.
+"""
+import json
+import math
+import os
+from typing import Any, Iterable
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spots.json')
+
+
+class UnknownSpot(LookupError):
+    """Raised for a spot_id that is not in the catalog"""
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km"""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _validate_spot(raw: dict[str, Any]) -> dict[str, Any]:
+    for field in ("id", "name", "latitude", "longitude"):
+        if field not in raw:
+            raise ValueError(f"spot is missing required field '{field}': {raw}")
+    lat = float(raw["latitude"])
+    lon = float(raw["longitude"])
+    if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        raise ValueError(f"spot '{raw['id']}' has invalid coordinates {lat}, {lon}")
+    orientation = raw.get("orientation_deg")
+    return {
+        "id": str(raw["id"]),
+        "name": str(raw["name"]),
+        "latitude": lat,
+        "longitude": lon,
+        # Direction the beach faces (degrees, 0 = N); swell from this direction hits it square on
+        "orientation_deg": float(orientation) % 360 if orientation is not None else None,
+        "sports": list(raw.get("sports", [])),
+    }
+
+
+class SpotCatalog:
+    """In-memory spot catalog backed by a lat/lon bucket index"""
+
+    def __init__(self, spots: Iterable[dict[str, Any]] = (), *, cell_deg: float = 0.25):
+        self.cell_deg = cell_deg
+        self._by_id: dict[str, dict[str, Any]] = {}
+        self._buckets: dict[tuple[int, int], list[dict[str, Any]]] = {}
+        self._lon_cells = max(1, math.ceil(360 / cell_deg))
+        for raw in spots:
+            self.add(raw)
+
+    @classmethod
+    def load(cls, path: str | None = None) -> 'SpotCatalog':
+        """Load a catalog from a JSON list of spots (or {"spots": [...]}); a missing file gives an empty catalog."""
+        path = path or os.environ.get('SPOT_CATALOG_PATH') or DEFAULT_CATALOG_PATH
+        if not os.path.exists(path):
+            print(f"Warning: spot catalog not found at {path}, starting empty")
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("spots", [])
+        return cls(data)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor((lat + 90) / self.cell_deg),
+                math.floor((lon + 180) / self.cell_deg) % self._lon_cells)
+
+    def add(self, raw: dict[str, Any]) -> dict[str, Any]:
+        spot = _validate_spot(raw)
+        if spot["id"] in self._by_id:
+            raise ValueError(f"duplicate spot id '{spot['id']}'")
+        self._by_id[spot["id"]] = spot
+        self._buckets.setdefault(self._cell(spot["latitude"], spot["longitude"]), []).append(spot)
+        return spot
+
+    def get(self, spot_id: str) -> dict[str, Any] | None:
+        return self._by_id.get(spot_id)
+
+    def _ring(self, lat: float, lon: float, ring: int) -> Iterable[dict[str, Any]]:
+        """Spots in the square ring of buckets `ring` cells away from the query cell"""
+        ci, cj = self._cell(lat, lon)
+        n = self._lon_cells
+        # Longitude wraps: once a ring spans every column, its sides were visited by inner rings
+        full = range(cj - ring, cj + ring + 1) if 2 * ring + 1 <= n else range(n)
+        sides = {(cj - ring) % n, (cj + ring) % n} if 2 * ring <= n else ()
+        for i in range(ci - ring, ci + ring + 1):
+            for j in full if i in (ci - ring, ci + ring) else sides:
+                yield from self._buckets.get((i, j % n), ())
+
+    def _ring_min_km(self, lat: float, ring: int) -> float:
+        """Lower bound on the distance to anything in ring+1 or beyond"""
+        if 2 * ring + 1 >= self._lon_cells:
+            # The rings already span every longitude; further rings only add latitude rows
+            return ring * self.cell_deg * 110.57
+        lon_km = 111.32 * max(math.cos(math.radians(min(abs(lat) + (ring + 1) * self.cell_deg, 90.0))), 0.0)
+        return ring * self.cell_deg * min(110.57, lon_km)
+
+    def _box(self, lat: float, lon: float, radius_km: float) -> Iterable[dict[str, Any]]:
+        """
+        Spots in the buckets of the lat/lon box around every point within radius_km. Rows stop
+        at the radius in degrees of latitude; a box reaching a pole spans all longitudes.
+        """
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        i0, _ = self._cell(max(lat - dlat, -90.0), lon)
+        i1, _ = self._cell(min(lat + dlat, 90.0), lon)
+        ratio = math.sin(min(angle, math.pi / 2)) / max(math.cos(math.radians(lat)), 1e-12)
+        if abs(lat) + dlat >= 90.0 or ratio >= 1.0:
+            columns: Iterable[int] = range(self._lon_cells)
+        else:
+            dlon = math.degrees(math.asin(ratio))
+            j0 = math.floor((lon - dlon + 180) / self.cell_deg)
+            j1 = math.floor((lon + dlon + 180) / self.cell_deg)
+            columns = range(self._lon_cells) if j1 - j0 + 1 >= self._lon_cells else range(j0, j1 + 1)
+        for i in range(i0, i1 + 1):
+            for j in columns:
+                yield from self._buckets.get((i, j % self._lon_cells), ())
+
+    def within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        *,
+        sport: str | None = None,
+    ) -> list[tuple[float, dict[str, Any]]]:
+        """(distance_km, spot) pairs within radius_km, nearest first"""
+        out: list[tuple[float, dict[str, Any]]] = []
+        for spot in self._box(latitude, longitude, radius_km):
+            if sport is not None and spot["sports"] and sport not in spot["sports"]:
+                continue
+            d = haversine_km(latitude, longitude, spot["latitude"], spot["longitude"])
+            if d <= radius_km:
+                out.append((d, spot))
+        out.sort(key=lambda pair: pair[0])
+        return out
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        *,
+        max_km: float | None = None,
+        sport: str | None = None,
+    ) -> tuple[float, dict[str, Any]] | None:
+        """Closest spot (optionally within max_km / supporting sport), or None"""
+        if not self._by_id:
+            return None
+        if max_km is not None:
+            # Bounded (e.g. the per-request snap): one box scan, however sparse the catalog
+            matches = self.within(latitude, longitude, max_km, sport=sport)
+            return matches[0] if matches else None
+        best: tuple[float, dict[str, Any]] | None = None
+        ring = 0
+        max_ring = math.ceil(180 / self.cell_deg)
+        while ring <= max_ring:
+            for spot in self._ring(latitude, longitude, ring):
+                if sport is not None and spot["sports"] and sport not in spot["sports"]:
+                    continue
+                d = haversine_km(latitude, longitude, spot["latitude"], spot["longitude"])
+                if best is None or d < best[0]:
+                    best = (d, spot)
+            # Anything further out is at least this far away
+            bound = self._ring_min_km(latitude, ring)
+            if best is not None and best[0] <= bound:
+                break
+            ring += 1
+        return best
+
+    @staticmethod
+    def cache_key(spot: dict[str, Any]) -> str:
+        return f"spot:{spot['id']}"
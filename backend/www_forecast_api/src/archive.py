@@ -0,0 +1,192 @@
+"""
+Append-only archive of every upstream fetch and its scores, for analysis and
+forecast-vs-actual checks.
+
+Layout, partitioned by location and forecast day (UTC):
+
+    <root>/<lat>_<lon>/<YYYY-MM-DD>/<fetched_at_ms>-<pid>.npz
+
+Each file holds one fetch's hours for that day: "time" (epoch s), "col.<variable>" inputs,
+"score.<sport>" scores (compressed, float32) and "ruleset_version", the version of the ruleset
+active at fetch time that produced them (a 0-d string array). Files are
+written once (temp file + os.replace) and never modified. A range query only lists the day
+directories of the requested location and dates, and only decompresses the members it needs.
+
+Writes are queued and done by a background thread so they never add request latency; when
+the queue is full the fetch is dropped from the archive (counted in stats) rather than block.
+
+    python archive.py query <lat,lon|spot_id> <start YYYY-MM-DD> <end YYYY-MM-DD> [sport]
+"""
+import datetime as dt
+import os
+import queue
+import threading
+import time
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from scoring import ruleset_version
+from vectorized import score_columns
+
+
+def archive_key(latitude: float, longitude: float) -> str:
+    return f"{latitude:.4f}_{longitude:.4f}"
+
+
+def _day(epoch: int) -> str:
+    return dt.datetime.fromtimestamp(epoch, tz=dt.timezone.utc).strftime("%Y-%m-%d")
+
+
+def _utc(value: str) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class ForecastArchive:
+    def __init__(self, root: str, *, max_queue: int = 256, dtype: type = np.float64):
+        self.root = root
+        # Scoring precision of the archived scores (stored as float32 either way)
+        self.dtype = dtype
+        self.stats = {"queued": 0, "written_files": 0, "dropped": 0, "errors": 0}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._run, name="forecast-archive", daemon=True)
+        self._writer.start()
+
+    def submit(
+        self,
+        key: str,
+        columns: dict[str, np.ndarray],
+        *,
+        time_axis: tuple[int, int, int],
+        rules: dict[str, Any],
+        fetched_at: float | None = None,
+    ) -> bool:
+        """Queue one fetch for archiving (scoring and compression happen on the writer thread)"""
+        job = (key, columns, time_axis, rules, time.time() if fetched_at is None else fetched_at)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued fetch is written (for scripts and shutdown)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                self._write(*job)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Warning: could not archive forecast for {job[0]}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, key: str, columns: dict[str, np.ndarray], time_axis: tuple[int, int, int],
+               rules: dict[str, Any], fetched_at: float) -> None:
+        start, interval, length = time_axis
+        times = start + interval * np.arange(length, dtype=np.int64)
+        data = {f"col.{name}": np.asarray(values, dtype=np.float32) for name, values in columns.items()}
+        # Scores are only comparable between fetches scored under the same ruleset
+        version = np.array(ruleset_version(rules))
+        for sport_key, sport in rules["sports"].items():
+            if sport.get("enabled", True):
+                data[f"score.{sport_key}"] = score_columns(
+                    columns, sport_key=sport_key, rules=rules, dtype=self.dtype,
+                ).astype(np.float32, copy=False)
+
+        day_ids = times // 86400
+        for day_id in np.unique(day_ids):
+            lo, hi = (int(i) for i in np.searchsorted(day_ids, [day_id, day_id + 1]))
+            day = _day(int(day_id) * 86400)
+            part_dir = os.path.join(self.root, key, day)
+            os.makedirs(part_dir, exist_ok=True)
+            path = os.path.join(part_dir, f"{int(fetched_at * 1000)}-{os.getpid()}.npz")
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez_compressed(
+                    f, time=times[lo:hi], ruleset_version=version, **{k: v[lo:hi] for k, v in data.items()},
+                )
+            os.replace(tmp, path)
+            self.stats["written_files"] += 1
+
+    def query(
+        self,
+        key: str,
+        start: str,
+        end: str,
+        *,
+        sports: list[str] | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Archived rows for one location with start <= time < end (ISO dates or datetimes, UTC).
+        One row per (fetched_at, time); includes every fetch that covered those hours, with the
+        ruleset_version its scores were computed under (None for files archived without one).
+        Only the requested sports' scores / input columns are read (all when None).
+        """
+        t0 = int(_utc(start).timestamp())
+        t1 = int(_utc(end).timestamp())
+        frames = []
+        # Only the partitions (days) overlapping [start, end) are listed at all
+        for day_id in range(t0 // 86400, (t1 - 1) // 86400 + 1):
+            part_dir = os.path.join(self.root, key, _day(day_id * 86400))
+            if not os.path.isdir(part_dir):
+                continue
+            for name in sorted(os.listdir(part_dir)):
+                if not name.endswith(".npz"):
+                    continue
+                with np.load(os.path.join(part_dir, name)) as npz:
+                    times = npz["time"]
+                    mask = (times >= t0) & (times < t1)
+                    if not mask.any():
+                        continue
+                    row: dict[str, Any] = {
+                        "time": pd.to_datetime(times[mask], unit="s", utc=True),
+                        "fetched_at": pd.to_datetime(int(name.split("-", 1)[0]), unit="ms", utc=True),
+                        "ruleset_version": str(npz["ruleset_version"]) if "ruleset_version" in npz.files else None,
+                    }
+                    for member in npz.files:
+                        kind, _, field = member.partition(".")
+                        if (kind == "score" and (sports is None or field in sports)) or \
+                                (kind == "col" and (columns is None or field in columns)):
+                            row[member.replace(".", "_", 1)] = npz[member][mask]
+                frames.append(pd.DataFrame(row))
+        if not frames:
+            return pd.DataFrame(columns=["time", "fetched_at", "ruleset_version"])
+        return pd.concat(frames, ignore_index=True).sort_values(["time", "fetched_at"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (5, 6) or sys.argv[1] != "query":
+        print("usage: python archive.py query <lat,lon|spot_id> <start> <end> [sport]")
+        sys.exit(2)
+    where, start_arg, end_arg = sys.argv[2:5]
+    if "," in where:
+        lat_s, lon_s = where.split(",", 1)
+        location = archive_key(float(lat_s), float(lon_s))
+    else:
+        from spots import SpotCatalog
+        spot = SpotCatalog.load().get(where)
+        if spot is None:
+            print(f"Unknown spot_id '{where}'")
+            sys.exit(1)
+        location = archive_key(spot["latitude"], spot["longitude"])
+    archive_root = os.environ.get("ARCHIVE_DIR", ".forecast_archive")
+    result = ForecastArchive(archive_root).query(
+        location, start_arg, end_arg, sports=sys.argv[5:6] or None,
+    )
+    print(result.to_csv(index=False), end="")
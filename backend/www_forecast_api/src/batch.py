@@ -0,0 +1,315 @@
+"""
+Offline batch scoring of many spots, for nightly jobs.
+
+Spots (CSV with latitude / longitude and optional id / name columns, or a JSON list like
+spots.json) are fetched in chunks of one multi-location upstream call each, with a bounded
+number of chunks in flight, then scored (on the SCORE_WORKERS process pool when set) and
+streamed to the output chunk by chunk:
+
+    ndjson    one line per spot: {"spot": ..., "ruleset_version": ..., "scores": [...]}
+    parquet   a directory of part files, one row per spot x hour x sport (needs pyarrow)
+
+After each chunk is durably written its spot ids go to the checkpoint file. --resume skips the
+spots already recorded, drops anything written after the last checkpoint (a partial NDJSON
+tail or an unrecorded part file) and appends the rest, so an interrupted or partly failed run
+is finished by running it again with --resume.
+
+    python batch.py spots.csv scores.ndjson --concurrency 4
+    python batch.py spots.json scores.parquet --sports surfing,sup --hours 168 --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import numpy as np
+
+from hourly import HourlyFrame
+from parallel import json_scores
+
+FORMATS = ("ndjson", "parquet")
+
+
+def load_spots(path: str) -> list[dict[str, Any]]:
+    """Spots from a CSV or JSON file; each gets an id (its own, else "lat,lon")"""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            data = json.load(f)
+            records = data.get("spots", []) if isinstance(data, dict) else data
+
+    spots = []
+    seen: set[str] = set()
+    for n, record in enumerate(records, start=1):
+        try:
+            latitude, longitude = float(record["latitude"]), float(record["longitude"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{path}: spot {n} needs numeric latitude and longitude") from None
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError(f"{path}: spot {n} is out of range ({latitude}, {longitude})")
+        spot = {**record, "latitude": latitude, "longitude": longitude}
+        spot["id"] = str(record.get("id") or f"{latitude:.4f},{longitude:.4f}")
+        if spot["id"] in seen:
+            raise ValueError(f"{path}: duplicate spot id '{spot['id']}'")
+        seen.add(spot["id"])
+        spots.append(spot)
+    return spots
+
+
+def score_table(rows: list[dict[str, Any]]) -> tuple[list[str], np.ndarray, list[list[str]]]:
+    """encode for score_many: (sports, hours x sports float32 scores, hours x sports labels)"""
+    sports = list(rows[0]["sports"]) if rows else []
+    scores = np.array([[r["sports"][s].score for s in sports] for r in rows], dtype=np.float32)
+    labels = [[r["sports"][s].label for s in sports] for r in rows]
+    return sports, scores.reshape(len(rows), len(sports)), labels
+
+
+class Checkpoint:
+    """Append-only JSON lines: one entry per durably written chunk"""
+
+    def __init__(self, path: str, *, resume: bool):
+        self.path = path
+        self.entries: list[dict[str, Any]] = []
+        if resume and os.path.exists(path):
+            valid = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            break
+                        self.entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break
+                    valid += len(line)
+            # A torn last line means that chunk was never recorded
+            os.truncate(path, valid)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @property
+    def done(self) -> set[str]:
+        return {spot_id for e in self.entries for spot_id in e["ids"]}
+
+    def record(self, ids: list[str], **state: Any) -> None:
+        entry = {"ids": ids, **state}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries.append(entry)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _missing_output(path: str) -> RuntimeError:
+    return RuntimeError(
+        f"{path} is missing or shorter than its checkpoint records; "
+        "restore it, or rerun without --resume to start over"
+    )
+
+
+def _spot_fields(spot: dict[str, Any]) -> dict[str, Any]:
+    return {k: v for k, v in spot.items() if not k.startswith("_")}
+
+
+class NdjsonWriter:
+    encode = staticmethod(json_scores)
+
+    def __init__(self, path: str, version: str, checkpoint: Checkpoint):
+        self.version = version
+        last = checkpoint.entries[-1]["offset"] if checkpoint.entries else 0
+        if checkpoint.entries and (not os.path.exists(path) or os.path.getsize(path) < last):
+            raise _missing_output(path)
+        self._file = open(path, "r+b" if checkpoint.entries else "wb")
+        # Anything past the last checkpoint belongs to a chunk that was never recorded
+        self._file.truncate(last)
+        self._file.seek(last)
+
+    def write(self, spots: list[dict], frames: list[HourlyFrame], payloads: list[bytes]) -> dict[str, Any]:
+        version = json.dumps(self.version).encode("utf-8")
+        for spot, payload in zip(spots, payloads):
+            head = json.dumps(_spot_fields(spot), separators=(",", ":")).encode("utf-8")
+            self._file.write(b'{"spot":' + head + b',"ruleset_version":' + version + b',"scores":' + payload + b"}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return {"offset": self._file.tell()}
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _import_pyarrow():
+    """(pyarrow, pyarrow.parquet); pyarrow is optional and only needed for parquet output"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("parquet output needs pyarrow (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetWriter:
+    encode = staticmethod(score_table)
+
+    def __init__(self, directory: str, version: str, checkpoint: Checkpoint):
+        self._pa, self._pq = _import_pyarrow()
+        self.directory = directory
+        self.version = version
+        recorded = {e["part"] for e in checkpoint.entries}
+        if not all(os.path.exists(os.path.join(directory, name)) for name in recorded):
+            raise _missing_output(directory)
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith("part-") and name not in recorded:
+                os.remove(os.path.join(directory, name))
+
+    def write(self, spots: list[dict], frames: list[HourlyFrame], payloads: list[tuple]) -> dict[str, Any]:
+        pa = self._pa
+        spot_ids, times, sports, scores, labels = [], [], [], [], []
+        for spot, frame, (names, values, hour_labels) in zip(spots, frames, payloads):
+            n = values.size
+            spot_ids.extend([spot["id"]] * n)
+            times.append(np.repeat(frame.times()[:len(values)], len(names)))
+            sports.extend(names * len(values))
+            scores.append(values.ravel())
+            labels.extend(label for hour in hour_labels for label in hour)
+        table = pa.table({
+            "spot_id": pa.array(spot_ids, pa.string()).dictionary_encode(),
+            "time": pa.array(np.concatenate(times) if times else [], pa.int64()).cast(pa.timestamp("s", tz="UTC")),
+            "sport": pa.array(sports, pa.string()).dictionary_encode(),
+            "score": pa.array(np.concatenate(scores) if scores else [], pa.float32()),
+            "label": pa.array(labels, pa.string()).dictionary_encode(),
+        })
+        table = table.replace_schema_metadata({"ruleset_version": self.version})
+        name = f"part-{spots[0]['_index']:08d}.parquet"
+        path = os.path.join(self.directory, name)
+        self._pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        return {"part": name}
+
+    def close(self) -> None:
+        pass
+
+
+def run_batch(
+    api,
+    spots: list[dict[str, Any]],
+    writer: NdjsonWriter | ParquetWriter,
+    checkpoint: Checkpoint,
+    *,
+    sports: list[str] | None = None,
+    hours: int | None = None,
+    chunk_size: int = 100,
+    concurrency: int = 4,
+) -> dict[str, int]:
+    """
+    Fetch, score and write every spot not yet in the checkpoint. A chunk whose marine or
+    weather fetch fails is skipped (left for --resume) rather than written with wind / UV
+    missing; returns counts of spots already done, written and failed.
+    """
+    rules = api.rulesets.current().rules
+    done = checkpoint.done
+    todo = [s for s in spots if s["id"] not in done]
+    chunks = deque(todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size))
+    stats = {"spots": len(spots), "already_done": len(spots) - len(todo), "written": 0, "failed": 0}
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-fetch") as pool:
+        in_flight: deque = deque()
+
+        def submit_next() -> None:
+            if chunks:
+                chunk = chunks.popleft()
+                locations = [(s["latitude"], s["longitude"]) for s in chunk]
+                in_flight.append((chunk, pool.submit(api.load_hourly_many, locations, sports=sports, require_weather=True)))
+
+        for _ in range(concurrency):
+            submit_next()
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            # Keep `concurrency` fetches going while this chunk is scored and written
+            submit_next()
+            try:
+                fetched = future.result()
+            except Exception as e:
+                print(f"Warning: fetch failed for {len(chunk)} spots ({chunk[0]['id']}...): {e}")
+                stats["failed"] += len(chunk)
+                continue
+            frames = [frame.slice(0, hours) if hours else frame for _, frame in fetched]
+            payloads = api.score_many(frames, rules=rules, sports=sports, encode=writer.encode)
+            state = writer.write(chunk, frames, payloads)
+            checkpoint.record([s["id"] for s in chunk], **state)
+            stats["written"] += len(chunk)
+            print(f"{stats['already_done'] + stats['written']}/{len(spots)} spots written")
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score many spots into NDJSON or Parquet")
+    parser.add_argument("spots", help="CSV or JSON file of spots (latitude, longitude, optional id / name)")
+    parser.add_argument("output", help="NDJSON file, or directory of Parquet part files")
+    parser.add_argument("--format", choices=FORMATS, help="default: parquet if output ends in .parquet")
+    parser.add_argument("--sports", help="comma-separated sports (default: all enabled)")
+    parser.add_argument("--hours", type=int, help="score only the first N forecast hours")
+    parser.add_argument("--chunk-size", type=int, help="spots per upstream call (default: multi_location_chunk)")
+    parser.add_argument("--concurrency", type=int, default=4, help="upstream calls in flight (default 4)")
+    parser.add_argument("--checkpoint", help="default: <output>.checkpoint")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    args = parser.parse_args(argv)
+
+    from forecast_api import ForecastAPI
+
+    spots = load_spots(args.spots)
+    for i, spot in enumerate(spots):
+        spot["_index"] = i
+    fmt = args.format or ("parquet" if args.output.endswith(".parquet") else "ndjson")
+    api = ForecastAPI()
+    ruleset = api.rulesets.current()
+    sports = args.sports.split(",") if args.sports else None
+    enabled = [k for k, v in ruleset.rules["sports"].items() if v.get("enabled", True)]
+    unknown = [s for s in sports or () if s not in enabled]
+    if unknown:
+        parser.error(f"unknown or disabled sports: {unknown}")
+    if args.hours is not None and args.hours < 1:
+        parser.error("--hours must be >= 1")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if fmt == "parquet":
+        # Before the checkpoint is opened (without --resume that truncates it)
+        try:
+            _import_pyarrow()
+        except RuntimeError as e:
+            parser.error(str(e))
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint", resume=args.resume)
+    writer_cls = ParquetWriter if fmt == "parquet" else NdjsonWriter
+    try:
+        writer = writer_cls(args.output, ruleset.version, checkpoint)
+    except RuntimeError as e:
+        checkpoint.close()
+        parser.error(str(e))
+    try:
+        stats = run_batch(
+            api, spots, writer, checkpoint,
+            sports=sports,
+            hours=args.hours,
+            chunk_size=args.chunk_size or api.app_config["multi_location_chunk"],
+            concurrency=args.concurrency,
+        )
+    finally:
+        writer.close()
+        checkpoint.close()
+        if api.parallel is not None:
+            api.parallel.close()
+    print(json.dumps(stats))
+    if stats["failed"]:
+        print("Some chunks failed; rerun with --resume to finish them")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
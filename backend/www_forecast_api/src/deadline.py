@@ -0,0 +1,66 @@
+"""
+Per-request time budget.
+
+A Deadline is created once per request (on Lambda from the invocation's remaining time,
+minus a reserve for serializing the response) and passed down through fetch, parse and
+scoring. Required steps fail with DeadlineExceeded when it runs out; optional enrichments
+(weather / UV) get only a share of what is left and are dropped from the response past it.
+Upstream calls also get an HTTP timeout from the budget (timeout()), so a call the request
+stopped waiting on ends by itself instead of holding a fetch worker.
+"""
+import time
+from concurrent.futures import Executor, Future, wait
+from typing import Any, Callable
+
+
+# Lower bound for call timeouts, so a nearly spent budget still gets a usable HTTP timeout
+MIN_CALL_TIMEOUT_SECONDS = 0.1
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a required step cannot finish within the request budget"""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.budget_seconds = max(0.0, seconds)
+        self.expires_at = time.monotonic() + self.budget_seconds
+
+    @classmethod
+    def from_lambda_context(cls, context: Any, *, max_seconds: float, reserve_seconds: float = 1.0) -> 'Deadline':
+        """Budget bounded by the Lambda's remaining time (context may be None when run locally)"""
+        get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+        if get_remaining is None:
+            return cls(max_seconds)
+        return cls(min(max_seconds, get_remaining() / 1000.0 - reserve_seconds))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def share(self, fraction: float) -> float:
+        """Seconds an optional step may use: a fraction of the remaining budget"""
+        return self.remaining() * fraction
+
+    def timeout(self, fraction: float = 1.0) -> float:
+        """HTTP timeout for a call that must end within a fraction of the remaining budget"""
+        return max(MIN_CALL_TIMEOUT_SECONDS, self.share(fraction))
+
+    def wait(self, future: Future, timeout: float | None = None) -> Any:
+        """
+        Result of future, waiting at most timeout (default: the rest of the budget).
+        Raises DeadlineExceeded if it is not done by then; the work itself keeps running.
+        """
+        timeout = self.remaining() if timeout is None else min(timeout, self.remaining())
+        done, _ = wait([future], timeout=timeout)
+        if not done:
+            raise DeadlineExceeded(f"Request budget of {self.budget_seconds:.1f}s exceeded")
+        return future.result()
+
+    def run(self, executor: Executor, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(*args, **kwargs) on executor, bounded by the rest of the budget"""
+        if self.expired():
+            raise DeadlineExceeded(f"Request budget of {self.budget_seconds:.1f}s exceeded")
+        return self.wait(executor.submit(fn, *args, **kwargs))
@@ -1,5 +1,11 @@
 import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import openmeteo_requests
 
 import pandas as pd
@@ -7,7 +13,24 @@ import requests_cache
 from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
 from requests_cache import CachedSession
 from retry_requests import retry
-from scoring import score_forecast
+from archive import ForecastArchive, archive_key
+from column_store import ColumnStore, StoredResponse
+from deadline import Deadline, DeadlineExceeded
+from hourly import HourlyFrame, align_columns, response_columns
+from incremental import IncrementalScorer
+from paging import DayCache, local_days, select_page
+from parallel import ParallelScorer
+from metrics import observe_upstream
+from ranking import RANK_METRICS, gather_candidates, summarize_window, window_bounds
+from region import RegionGrid
+from profiles import ProfileStore
+from ruleset import LoadedRuleset, RulesetStore, required_variables
+from shared_cache import SharedScoreCache
+from scoring import ScoreMemo, ruleset_version, score_forecast, scores_to_json
+from spots import SpotCatalog, UnknownSpot
+from swr import Cached, SWRCache
+from upstream import UpstreamClient, UpstreamUnavailable, raise_rate_limited
+from vectorized import NUMERIC_DTYPES
 
 
 class ForecastAPI:
@@ -17,6 +40,36 @@ class ForecastAPI:
             'latitude': 32.3442996,
             'longitude': 34.8636596,
         },
+        # Requests within this distance of a catalog spot are resolved to that spot
+        'spot_snap_km': float(os.environ.get('SPOT_SNAP_KM', '2.0')),
+        'weather_api_url': 'https://api.open-meteo.com/v1/forecast',
+        # Weather variables available to rulesets, joined onto the marine columns (wind in km/h).
+        # Only those the selected sports read are requested (see upstream_variables)
+        'weather_params': ['wind_speed_10m', 'wind_gusts_10m', 'wind_direction_10m', 'uv_index'],
+        # Max coordinates per multi-location upstream call
+        'multi_location_chunk': 100,
+        'ranking': {
+            'max_radius_km': 200.0,
+            'max_candidates': 50,
+        },
+        'region': {
+            'max_cells': 10000,
+            'min_step_deg': 0.05,
+            'max_hours': 168,
+        },
+        # Per-request time budget (on Lambda also bounded by the invocation's remaining time)
+        'deadline': {
+            'budget_seconds': float(os.environ.get('REQUEST_BUDGET_SECONDS', '10')),
+            'reserve_seconds': 1.0,
+            # Max share of the remaining budget the optional weather / UV fetch may wait for
+            'weather_share': 0.5,
+        },
+        # Precision of the vectorized (region grid, archive) scoring. float32 is opt-in: it halves
+        # the working memory but scores may differ from float64 by up to
+        # vectorized.FLOAT32_TOLERANCE (one step in the last rounded digit). Per-hour scoring
+        # (/api/forecast, best-spots, batch) always uses Python floats
+        'numeric_dtype': os.environ.get('NUMERIC_DTYPE', 'float64'),
+        # Marine variables available to rulesets; requests ask for the subset the sports read
         'params': 
             ['wave_height', 'wave_direction', 'wave_period', 'wave_peak_period', 'wind_wave_height',
              'wind_wave_direction', 'wind_wave_period', 'wind_wave_peak_period', 'swell_wave_direction',
@@ -30,7 +83,7 @@ class ForecastAPI:
             "source": "open-meteo marine weather api",
             "notes": [
                 "wave_direction is direction waves come FROM; ocean_current_direction is direction current flows TO.",
-                "windsurf/kite scoring here uses wind_wave_* as a proxy; for real decisions add wind_speed_10m + wind_gusts_10m from Open-Meteo Weather API.",
+                "windsurf/kite scoring uses wind_speed_10m / wind_gusts_10m from the Open-Meteo Weather API (km/h); wind_wave_* is only a fallback proxy when wind is missing.",
             ],
         },
 
@@ -180,10 +233,11 @@ class ForecastAPI:
                 ],
             },
 
-            # 4) Windsurfing (wave/water-state proxy — add real wind later)
+            # 4) Windsurfing (real wind; wave/water-state proxy when wind is missing)
             "windsurfing": {
                 "enabled": True,
                 "inputs": [
+                    "wind_speed_10m", "wind_gusts_10m",
                     "wind_wave_height", "wind_wave_period",
                     "wave_height", "wave_period",
                     "ocean_current_velocity",
@@ -191,8 +245,11 @@ class ForecastAPI:
                 "hard_limits": {
                     "wave_height_m": {"bad_from": 4.5},  # too dangerous
                     "current_velocity_kmh": {"bad_from": 7.0},
+                    "wind_gusts_kmh": {"bad_from": 75.0},  # gale-force gusts
                 },
                 "thresholds": {
+                    # Planing starts around 18 km/h; above ~60 km/h is survival sailing
+                    "wind_speed_kmh": {"min": 15.0, "ideal": (22.0, 45.0), "max": 60.0},
                     # Using wind_wave_height as "there is wind energy on the surface"
                     "wind_wave_height_m": {"min": 0.25, "ideal": (0.4, 1.2), "max": 2.0},
                     # Too short => messy slop; too big => advanced conditions
@@ -204,11 +261,15 @@ class ForecastAPI:
                     "current_velocity_kmh": {"warn_from": 3.0, "bad_from": 6.0},
                 },
                 "weights": {
+                    # only one of wind / wind_proxy is present for a given hour
+                    "wind": 0.55,
                     "wind_proxy": 0.55,
                     "sea_state": 0.25,
                     "current": 0.20,
                 },
                 "context_fields": [
+                    "wind_speed_10m",
+                    "wind_gusts_10m",
                     "wave_height",
                     "wave_period",
                     "wind_wave_height",
@@ -216,14 +277,15 @@ class ForecastAPI:
                     "uv_index",
                 ],
                 "ux": {
-                    "primary_message": "This uses wind-waves as a wind proxy. Add wind_speed_10m for reliable windsurf calls.",
+                    "primary_message": "Scored on 10 m wind speed and gusts; falls back to wind-waves as a proxy when wind data is missing.",
                 },
             },
 
-            # 5) Kitesurfing (wave/water-state proxy — add real wind later)
+            # 5) Kitesurfing (real wind; wave/water-state proxy when wind is missing)
             "kitesurfing": {
                 "enabled": True,
                 "inputs": [
+                    "wind_speed_10m", "wind_gusts_10m",
                     "wind_wave_height", "wind_wave_period",
                     "wave_height",
                     "ocean_current_velocity",
@@ -231,8 +293,11 @@ class ForecastAPI:
                 "hard_limits": {
                     "wave_height_m": {"bad_from": 4.0},  # too dangerous
                     "current_velocity_kmh": {"bad_from": 7.0},
+                    "wind_gusts_kmh": {"bad_from": 65.0},  # gusts that overpower any kite
                 },
                 "thresholds": {
+                    # ~12-25 knots is the usable range for most kites
+                    "wind_speed_kmh": {"min": 18.0, "ideal": (22.0, 40.0), "max": 55.0},
                     # Many kite sessions happen in choppy but manageable sea states
                     "wind_wave_height_m": {"min": 0.2, "ideal": (0.3, 0.9), "max": 1.6},
                     "wind_wave_period_s": {"min": 1.8, "ideal": (2.2, 4.5), "max": 6.5},
@@ -240,48 +305,121 @@ class ForecastAPI:
                     "current_velocity_kmh": {"warn_from": 3.0, "bad_from": 6.0},
                 },
                 "weights": {
+                    # only one of wind / wind_proxy is present for a given hour
+                    "wind": 0.60,
                     "wind_proxy": 0.60,
                     "sea_state": 0.20,
                     "current": 0.20,
                 },
                 "context_fields": [
+                    "wind_speed_10m",
+                    "wind_gusts_10m",
                     "wave_height",
                     "wind_wave_height",
                     "ocean_current_velocity",
                     "uv_index",
                 ],
                 "ux": {
-                    "primary_message": "Proxy-based. For kite, wind strength & gusts matter most — combine with Weather API wind.",
+                    "primary_message": "Scored on 10 m wind speed and gusts; falls back to wind-waves as a proxy when wind data is missing.",
                 },
             },
         },
     }
 
     def __init__(self):
+        # Process pool for scoring many locations at once (batch jobs, best-spots); SCORE_WORKERS=0
+        # (the default) scores in-process. Started before anything else starts threads (see
+        # parallel.py). Needs /dev/shm, so leave it off on Lambda
+        score_workers = int(os.environ.get('SCORE_WORKERS', '0'))
+        self.parallel = ParallelScorer(workers=score_workers) if score_workers > 0 else None
+        if self.parallel is not None:
+            self.parallel.start()
         cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
         retry_session = retry(cache_session, retries=3, backoff_factor=0.2)
-        self.client = openmeteo_requests.Client(session=retry_session)
+        # Hedged duplicates make a single attempt, so a slow host never gets a second retry sequence
+        hedge_session = requests_cache.CachedSession('.cache', expire_after=3600)
+        for session in (retry_session, hedge_session):
+            session.hooks['response'].append(raise_rate_limited)
+        # Per-host circuit breaker + hedged duplicates around the Open-Meteo client
+        self.client = UpstreamClient(
+            openmeteo_requests.Client(session=retry_session),
+            hedge_client=openmeteo_requests.Client(session=hedge_session),
+            failure_threshold=int(os.environ.get('UPSTREAM_BREAKER_FAILURES', '5')),
+            reset_seconds=float(os.environ.get('UPSTREAM_BREAKER_RESET_SECONDS', '30')),
+            hedge_percentile=float(os.environ.get('UPSTREAM_HEDGE_PERCENTILE', '95')),
+            on_call=observe_upstream,
+        )
+        # Optional memo of identical (quantized) sea states; SCORE_MEMO_SIZE=0 disables it
+        memo_size = int(os.environ.get('SCORE_MEMO_SIZE', '10000'))
+        self.memo = ScoreMemo(max_entries=memo_size) if memo_size > 0 else None
+        # Previous scored result per location, so refreshes only rescore changed hours
+        self.incremental = IncrementalScorer(memo=self.memo)
+        # Scored local days per fetch, so later pages of a day-paged forecast are only serialized
+        self.day_pages = DayCache(max_entries=int(os.environ.get('DAY_PAGE_CACHE_SIZE', '2048')))
+        self.spots = SpotCatalog.load()
+        # Active ruleset: CONDITION_RULESET unless RULESET_PATH points to a (hot-reloaded) JSON file
+        self.rulesets = RulesetStore(
+            self.CONDITION_RULESET,
+            path=os.environ.get('RULESET_PATH'),
+            reload_seconds=float(os.environ.get('RULESET_RELOAD_SECONDS', '30')),
+        )
+        # Named/inline per-user overlays, compiled once per (ruleset, overlay) and LRU-bounded
+        self.profiles = ProfileStore.load()
+        # Parsed upstream data per location, served stale-while-revalidate
+        self.forecast_cache = SWRCache(
+            self._fetch_forecast,
+            # A background refresh outlives the request that triggered it: give it its own budget
+            refresh_kwargs=lambda kwargs: {**kwargs, 'deadline': self.new_deadline()},
+            fresh_seconds=float(os.environ.get('FORECAST_FRESH_SECONDS', '3600')),
+            stale_seconds=float(os.environ.get('FORECAST_STALE_SECONDS', '10800')),
+        )
+        # Parsed columns on local disk, shared by all workers/containers on the host and across
+        # restarts; FORECAST_STORE_RUNS=0 disables it
+        store_runs = int(os.environ.get('FORECAST_STORE_RUNS', '2'))
+        store_dir = os.environ.get('FORECAST_STORE_DIR') or (
+            '/tmp/forecast_store' if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.forecast_store'
+        )
+        self.column_store = ColumnStore(store_dir, keep_runs=store_runs) if store_runs > 0 else None
+        self.shared_scores = self._open_shared_scores()
+        # Every upstream fetch and its scores, written off the request path. Off on Lambda
+        # unless ARCHIVE_DIR points somewhere persistent (e.g. EFS); ARCHIVE_DIR=off disables it
+        archive_dir = os.environ.get('ARCHIVE_DIR') or (
+            None if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') else '.forecast_archive'
+        )
+        dtype = NUMERIC_DTYPES[self.app_config['numeric_dtype']]
+        self.archive = ForecastArchive(archive_dir, dtype=dtype) if archive_dir and archive_dir != 'off' else None
+        # Tile cache of quantized cells x hours x sports grids for map overlays. Each tile fetch
+        # gets its own request budget, so a slow host can't hold the caller past it
+        self.region = RegionGrid(
+            lambda locations, variables: self.get_forecasts(
+                locations, variables=variables, deadline=self.new_deadline(),
+            ),
+            self.app_config['params'],
+            fetch_weather=lambda locations, variables: self.get_weather_forecasts(
+                locations, variables=variables, deadline=self.new_deadline(),
+            ),
+            weather_params=self.app_config['weather_params'],
+            dtype=dtype,
+        )
+        # Runs upstream calls so a request can stop waiting on them at its deadline
+        self._fetch_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch")
 
     def __call__(self, event: dict, *args, **kwargs):
-        latitude = event.get('latitude',self.app_config["test_geo"]["latitude"])
-        longitude = event.get('longitude',self.app_config["test_geo"]["longitude"])
-        
-        # Get marine forecast
-        marine_forecast = self.get_forecast(latitude=latitude, longitude=longitude)
-        df = self.parse_api_response(marine_forecast)
-        
-        # Get weather forecast (UV index)
-        try:
-            weather_forecast = self.get_weather_forecast(latitude=latitude, longitude=longitude)
-            weather_df = self.parse_weather_response(weather_forecast)
-            # Merge UV index into marine data
-            df = self.merge_weather_data(df, weather_df)
-        except Exception as e:
-            # If weather API fails, continue without UV index
-            print(f"Warning: Could not fetch UV index: {e}")
+        deadline = self.new_deadline()
+        latitude, longitude, spot = self.resolve_location(
+            latitude=event.get('latitude'),
+            longitude=event.get('longitude'),
+            spot_id=event.get('spot_id'),
+        )
         
-        hourly = self.to_hourly_json(df)
-        scores = score_forecast(hourly, rules=self.CONDITION_RULESET)
+        # Marine forecast joined with weather (wind + UV)
+        marine_forecast, hourly, freshness = self.load_forecast(latitude=latitude, longitude=longitude, deadline=deadline)
+        ruleset = self.ruleset_for(profile_id=event.get('profile_id'), overlay=event.get('overlay'))
+        time_format = event.get('time_format', 'iso')
+        scores = self.score_hourly(
+            hourly, location_key=self.location_key(marine_forecast, spot), rules=ruleset.rules, deadline=deadline,
+            time_format=time_format,
+        )
         payload = {
             "meta": {
                 "source": "open-meteo marine weather api",
@@ -292,6 +430,12 @@ class ForecastAPI:
                 },
                 "elevation_m_asl": marine_forecast.Elevation(),
                 "utc_offset_seconds": marine_forecast.UtcOffsetSeconds(),
+                "spot": spot,
+                "ruleset_version": ruleset.version,
+                "data": freshness,
+                "truncated": len(scores) < len(hourly),
+                "time_format": time_format,
+                "time_axis": hourly.time_axis_meta(len(scores)),
             },
             # "hourly": hourly,  # raw hourly (charts/debug)
             "scores": scores,  # UX-ready scoring output
@@ -300,81 +444,585 @@ class ForecastAPI:
         print(response)
         return response
 
-    def get_forecast(self, *, latitude: float, longitude: float) -> WeatherApiResponse:
+    def resolve_location(
+        self,
+        *,
+        latitude: float | None = None,
+        longitude: float | None = None,
+        spot_id: str | None = None,
+    ) -> tuple[float, float, dict | None]:
+        """
+        Resolve a request to the coordinates to fetch and the catalog spot they belong to.
+        An explicit spot_id wins (raises UnknownSpot if it is not in the catalog); otherwise
+        coordinates within spot_snap_km of a spot snap to it.
+        """
+        if spot_id is not None:
+            spot = self.spots.get(spot_id)
+            if spot is None:
+                raise UnknownSpot(f"Unknown spot_id '{spot_id}'")
+            return spot['latitude'], spot['longitude'], spot
+
+        if latitude is None:
+            latitude = self.app_config["test_geo"]["latitude"]
+        if longitude is None:
+            longitude = self.app_config["test_geo"]["longitude"]
+        match = self.spots.nearest(latitude, longitude, max_km=self.app_config['spot_snap_km'])
+        if match is not None:
+            spot = match[1]
+            return spot['latitude'], spot['longitude'], spot
+        return latitude, longitude, None
+
+    @staticmethod
+    def location_key(response: WeatherApiResponse, spot: dict | None = None) -> str:
+        """Key for per-location caches: the catalog spot, else the upstream grid point the request resolved to."""
+        if spot is not None:
+            return SpotCatalog.cache_key(spot)
+        return f"{response.Latitude():.4f},{response.Longitude():.4f}"
+
+    def ruleset_for(self, *, profile_id: str | None = None, overlay: dict | None = None) -> LoadedRuleset:
+        """
+        Ruleset snapshot for one request: the active ruleset, with a named profile and/or
+        inline overlay compiled on top (raises UnknownProfile / RulesetError).
+        """
+        return self.profiles.resolve(self.rulesets.current(), profile_id=profile_id, overlay=overlay)
+
+    def score_hourly(
+        self,
+        hourly: HourlyFrame,
+        *,
+        location_key: str,
+        rules: dict | None = None,
+        deadline: Deadline | None = None,
+        time_format: str = "iso",
+    ) -> list[dict]:
+        """
+        Score an hourly frame, reusing unchanged hours from the previous fetch of this location.
+        With a deadline, scoring stops when it runs out and fewer rows than hours are returned.
+        Rows come back in their JSON shape; the per-hour results stay compact SportResult
+        objects in the incremental / memo caches and are converted only here.
+        time_format "epoch" leaves dates out: row i is hour i of hourly.time_axis_meta().
+        """
+        if rules is None:
+            rules = self.rulesets.current().rules
+        # Keyed per ruleset too, so users with different profiles don't evict each other
+        key = f"{location_key}@{ruleset_version(rules)}"
+        shared_key = None
+        if self.shared_scores is not None:
+            # Same inputs + ruleset => same scores, whichever worker computed them
+            shared_key = f"{key}#{hourly.digest()}#{time_format}"
+            scores = self.shared_scores.get(shared_key)
+            if scores is not None:
+                return scores
+        scores = scores_to_json(
+            self.incremental.score(key, hourly, rules=rules, deadline=deadline), dates=time_format != "epoch",
+        )
+        if shared_key is not None and len(scores) == len(hourly):
+            self.shared_scores.put(shared_key, scores)
+        return scores
+
+    def score_page(
+        self,
+        hourly: HourlyFrame,
+        *,
+        location_key: str,
+        utc_offset_seconds: int,
+        days: int,
+        cursor: str | None = None,
+        rules: dict | None = None,
+        deadline: Deadline | None = None,
+        time_format: str = "iso",
+    ) -> tuple[list[dict], HourlyFrame, dict]:
+        """
+        Score one page of local days (see paging) and return (rows, page hours, page meta).
+        Days already scored for this fetch come from the day cache. If the deadline runs out,
+        the page ends after the last complete day and next_cursor resumes from there.
+        Raises ValueError for a malformed cursor.
+        """
+        if rules is None:
+            rules = self.rulesets.current().rules
+        page, next_cursor = select_page(local_days(hourly, utc_offset_seconds), cursor, days)
+        version = ruleset_version(rules)
+        rows: list[dict] = []
+        done = 0
+        for day in page:
+            key = (location_key, version, hourly.digest(), day.date, time_format)
+            day_rows = self.day_pages.get(key)
+            if day_rows is None:
+                if deadline is not None and deadline.expired():
+                    break
+                day_scores = score_forecast(hourly.slice(day.lo, day.hi), rules=rules, memo=self.memo)
+                day_rows = scores_to_json(day_scores, dates=time_format != "epoch")
+                self.day_pages.put(key, day_rows)
+            rows.extend(day_rows)
+            done += 1
+        if done < len(page):
+            next_cursor = page[done].date
+        lo, hi = (page[0].lo, page[-1].hi) if page else (0, 0)
+        meta = {"days": [d.date for d in page[:done]], "next_cursor": next_cursor}
+        return rows, hourly.slice(lo, hi), meta
+
+    @staticmethod
+    def _open_shared_scores() -> SharedScoreCache | None:
+        """
+        Host-wide scored-result cache for multi-worker uvicorn. Off on Lambda (one process per
+        container) and where flock is unavailable; SHARED_SCORE_SLOTS=0 disables it.
+        """
+        on_lambda = bool(os.environ.get('AWS_LAMBDA_FUNCTION_NAME'))
+        slots = int(os.environ.get('SHARED_SCORE_SLOTS', '0' if on_lambda else '512'))
+        if slots <= 0:
+            return None
+        path = os.environ.get('SHARED_SCORE_PATH') or os.path.join(
+            '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'surfingpal-scores',
+        )
+        try:
+            return SharedScoreCache(path, slots=slots)
+        except (OSError, RuntimeError) as e:
+            print(f"Warning: shared score cache disabled ({path}): {e}")
+            return None
+
+    def cache_stats(self) -> dict:
+        """Counters for the in-process scoring caches"""
+        return {
+            "incremental": dict(self.incremental.stats),
+            "day_pages": dict(self.day_pages.stats),
+            "score_memo": self.memo.stats() if self.memo is not None else None,
+            "region_tiles": dict(self.region.stats),
+            "profiles": dict(self.profiles.stats),
+            "forecast_data": dict(self.forecast_cache.stats),
+            "forecast_store": dict(self.column_store.stats) if self.column_store is not None else None,
+            "shared_scores": dict(self.shared_scores.stats) if self.shared_scores is not None else None,
+            "archive": dict(self.archive.stats) if self.archive is not None else None,
+            "parallel": dict(self.parallel.stats) if self.parallel is not None else None,
+        }
+
+    def upstream_stats(self) -> dict:
+        """Circuit breaker state and hedge counters per upstream host"""
+        return self.client.stats()
+
+    def new_deadline(self, context=None) -> Deadline:
+        """Budget for one request; pass the Lambda context to respect the invocation timeout"""
+        cfg = self.app_config['deadline']
+        return Deadline.from_lambda_context(
+            context, max_seconds=cfg['budget_seconds'], reserve_seconds=cfg['reserve_seconds'],
+        )
+
+    def upstream_variables(
+        self,
+        rules: dict | None = None,
+        sports: list[str] | None = None,
+    ) -> tuple[list[str], list[str]]:
+        """
+        (marine, weather) variables to request for the sports (all enabled by default) of the
+        ruleset (the active one by default), in catalog order. Names a ruleset declares that
+        neither API offers are left out.
+        """
+        needed = required_variables(rules or self.rulesets.current().rules, sports)
+        return (
+            [p for p in self.app_config['params'] if p in needed],
+            [p for p in self.app_config['weather_params'] if p in needed],
+        )
+
+    def score_many(
+        self,
+        frames: list[HourlyFrame],
+        *,
+        rules: dict,
+        sports: list[str] | None = None,
+        encode=None,
+    ) -> list:
+        """score_forecast of each frame in order, on the process pool when SCORE_WORKERS is set"""
+        if self.parallel is not None:
+            return self.parallel.score_many(frames, rules=rules, sports=sports, memo=self.memo, encode=encode)
+        scored = [score_forecast(frame, rules=rules, sports=sports, memo=self.memo) for frame in frames]
+        return scored if encode is None else [encode(rows) for rows in scored]
+
+    def load_forecast(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        deadline: Deadline | None = None,
+    ) -> tuple[WeatherApiResponse, HourlyFrame, dict]:
+        """
+        Marine forecast + weather columns for one location, stale-while-revalidate.
+        Returns (response, frame, freshness); freshness goes into meta["data"]. While the
+        upstream circuit is open, the last cached forecast is served with state "expired".
+        freshness["omitted"] lists optional parts (weather) left out by the deadline or an error.
+        The cached frame is shared between requests and must not be modified. Only the
+        variables the active ruleset's sports read are fetched.
+        """
+        marine_vars, weather_vars = self.upstream_variables()
+        key = (round(latitude, 4), round(longitude, 4), tuple(marine_vars), tuple(weather_vars))
+        try:
+            cached = self.forecast_cache.get(
+                key, latitude=latitude, longitude=longitude,
+                marine_vars=marine_vars, weather_vars=weather_vars, deadline=deadline,
+            )
+        except UpstreamUnavailable as e:
+            # Upstream circuit is open: serve the last forecast we had, however old - from this
+            # process's cache, else from the column store (another worker's or a past run)
+            cached = self.forecast_cache.peek(key) or self._stored_fallback(
+                latitude, longitude, (*marine_vars, *weather_vars),
+            )
+            if cached is None:
+                raise
+            print(f"Warning: serving expired forecast for {key}: {e}")
+        marine_forecast, frame, omitted = cached.value
+        if omitted:
+            # Incomplete data: keep serving it but refresh in the background on the next request
+            self.forecast_cache.mark_stale(key)
+        freshness = {"state": cached.state, "age_seconds": round(cached.age_seconds), "omitted": omitted}
+        return marine_forecast, frame, freshness
+
+    def _stored_fallback(self, latitude: float, longitude: float, variables: tuple[str, ...]) -> Cached | None:
+        """The column store's newest run for the location, of any age, if it has every variable"""
+        if self.column_store is None:
+            return None
+        stored = self.column_store.get(latitude, longitude, max_age_seconds=math.inf)
+        if stored is None or not all(v in stored.columns for v in variables):
+            return None
+        value = (StoredResponse(stored.location), HourlyFrame(stored.columns, stored.time_axis), [])
+        return Cached(value, time.time() - stored.fetched_at, "expired")
+
+    def _fetch_forecast(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        marine_vars: list[str] | None = None,
+        weather_vars: list[str] | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[WeatherApiResponse, HourlyFrame, list[dict]]:
+        """
+        Marine forecast for one location with weather columns joined on.
+        A recent run in the column store is used without calling upstream if it has every
+        requested variable. Weather is optional: it runs alongside the marine call and is dropped
+        (listed in the returned omitted parts) if it fails or does not finish within its share of
+        the budget.
+        """
+        if marine_vars is None:
+            marine_vars = self.app_config['params']
+        if weather_vars is None:
+            weather_vars = self.app_config['weather_params']
+        if self.column_store is not None:
+            stored = self.column_store.get(latitude, longitude, max_age_seconds=self.forecast_cache.fresh_seconds)
+            if stored is not None and all(v in stored.columns for v in (*marine_vars, *weather_vars)):
+                return StoredResponse(stored.location), HourlyFrame(stored.columns, stored.time_axis), []
+        if deadline is None:
+            deadline = self.new_deadline()
+        # Each call times out with its share of the budget, so one the request stops waiting on
+        # doesn't keep holding a _fetch_pool worker
+        weather_share = self.app_config['deadline']['weather_share']
+        weather_future = self._fetch_pool.submit(
+            self.get_weather_forecast, latitude=latitude, longitude=longitude, variables=weather_vars,
+            timeout=deadline.timeout(weather_share),
+        ) if weather_vars else None
+        marine_forecast = deadline.run(
+            self._fetch_pool, self.get_forecast, latitude=latitude, longitude=longitude, variables=marine_vars,
+            timeout=deadline.timeout(),
+        )
+        frame = self.parse_api_response(marine_forecast)
+        omitted: list[dict] = []
+        try:
+            if weather_future is not None:
+                weather_forecast = deadline.wait(weather_future, deadline.share(weather_share))
+                frame = self.merge_weather_data(frame, self.parse_weather_response(weather_forecast))
+        except DeadlineExceeded:
+            print("Warning: Skipping weather data, request budget exhausted")
+            omitted.append({"part": "weather", "reason": "deadline"})
+        except Exception as e:
+            # If weather API fails, continue without wind / UV index
+            print(f"Warning: Could not fetch weather data: {e}")
+            omitted.append({"part": "weather", "reason": "error"})
+        if not omitted:
+            self.store_forecast(latitude, longitude, marine_forecast, frame)
+        if self.archive is not None:
+            self.archive.submit(
+                archive_key(latitude, longitude),
+                frame.columns,
+                time_axis=frame.time_axis,
+                rules=self.rulesets.current().rules,
+            )
+        return marine_forecast, frame, omitted
+
+    def store_forecast(self, latitude: float, longitude: float, response: WeatherApiResponse, frame: HourlyFrame) -> None:
+        """Write a parsed frame to the column store for other workers and restarts"""
+        if self.column_store is None:
+            return
+        self.column_store.put(
+            latitude,
+            longitude,
+            frame.columns,
+            time_axis=frame.time_axis,
+            location={
+                'latitude': response.Latitude(),
+                'longitude': response.Longitude(),
+                'elevation': response.Elevation(),
+                'utc_offset_seconds': response.UtcOffsetSeconds(),
+            },
+        )
+
+    def get_forecast(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        variables: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> WeatherApiResponse:
         response = self.client.weather_api(
             self.app_config['api_url'],
             params={
                 'latitude': latitude,
                 'longitude': longitude,
-                'hourly': self.app_config['params']
-            }
+                'hourly': variables or self.app_config['params']
+            },
+            timeout=timeout,
             )
         return response[0]
     
-    def get_weather_forecast(self, *, latitude: float, longitude: float) -> WeatherApiResponse:
-        """Fetch UV index and other weather data from Open-Meteo Weather API"""
-        weather_api_url = 'https://api.open-meteo.com/v1/forecast'
+    def get_weather_forecast(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        variables: list[str] | None = None,
+        timeout: float | None = None,
+    ) -> WeatherApiResponse:
+        """Fetch wind (speed, gusts, direction) and UV index from Open-Meteo Weather API"""
         response = self.client.weather_api(
-            weather_api_url,
+            self.app_config['weather_api_url'],
             params={
                 'latitude': latitude,
                 'longitude': longitude,
-                'hourly': ['uv_index']  # UV index for tips
-            }
+                'hourly': variables or self.app_config['weather_params'],
+            },
+            timeout=timeout,
         )
         return response[0]
     
-    def parse_weather_response(self, response: WeatherApiResponse) -> pd.DataFrame:
-        """Parse weather API response to extract UV index"""
-        hourly = response.Hourly()
-        dates = pd.date_range(
-            start=pd.to_datetime(hourly.Time(), unit='s', utc=True),
-            end=pd.to_datetime(hourly.TimeEnd(), unit='s', utc=True),
-            freq=pd.Timedelta(seconds=hourly.Interval()),
-            inclusive='left'
+    def _get_many(
+        self,
+        url: str,
+        hourly: list[str],
+        locations: list[tuple[float, float]],
+        deadline: Deadline | None = None,
+    ) -> list[WeatherApiResponse]:
+        """
+        One multi-location upstream call per chunk; responses come back in request order.
+        With a deadline each chunk times out with the rest of the budget, and no chunk starts
+        once it is spent.
+        """
+        out: list[WeatherApiResponse] = []
+        chunk = self.app_config['multi_location_chunk']
+        for i in range(0, len(locations), chunk):
+            if deadline is not None and deadline.expired():
+                raise DeadlineExceeded(f"Request budget of {deadline.budget_seconds:.1f}s exceeded")
+            part = locations[i:i + chunk]
+            out.extend(self.client.weather_api(
+                url,
+                params={
+                    'latitude': [lat for lat, _ in part],
+                    'longitude': [lon for _, lon in part],
+                    'hourly': hourly,
+                },
+                timeout=deadline.timeout() if deadline is not None else None,
+            ))
+        return out
+
+    def get_forecasts(
+        self,
+        locations: list[tuple[float, float]],
+        *,
+        variables: list[str] | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[WeatherApiResponse]:
+        """Marine forecasts for many (latitude, longitude) pairs"""
+        return self._get_many(self.app_config['api_url'], variables or self.app_config['params'], locations, deadline)
+
+    def get_weather_forecasts(
+        self,
+        locations: list[tuple[float, float]],
+        *,
+        variables: list[str] | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[WeatherApiResponse]:
+        """Wind and UV index for many (latitude, longitude) pairs"""
+        return self._get_many(
+            self.app_config['weather_api_url'], variables or self.app_config['weather_params'], locations, deadline,
         )
-        data: dict[str, object] = {'date': dates}
-        
-        # Extract UV index - since we only request uv_index, it's at index 0
-        if hourly.VariablesLength() > 0:
-            data['uv_index'] = hourly.Variables(0).ValuesAsNumpy()
-        
-        return pd.DataFrame(data)
 
-    def parse_api_response(self, response: WeatherApiResponse) -> pd.DataFrame:
-        hourly = response.Hourly()
-        dates = pd.date_range(
-            start=pd.to_datetime(hourly.Time(), unit='s', utc=True),
-            end=pd.to_datetime(hourly.TimeEnd(), unit='s', utc=True),
-            freq=pd.Timedelta(seconds=hourly.Interval()),
-            inclusive='left'
+    def load_hourly_many(
+        self,
+        locations: list[tuple[float, float]],
+        *,
+        sports: list[str] | None = None,
+        require_weather: bool = False,
+        deadline: Deadline | None = None,
+    ) -> list[tuple[WeatherApiResponse, HourlyFrame]]:
+        """
+        Fetch, parse and merge marine + weather data for many locations with batched upstream
+        calls, requesting only the variables the sports (all enabled by default) read.
+        require_weather: raise when the weather fetch fails instead of leaving wind / UV out
+        deadline: request budget (None for batch jobs); unless required, weather only gets its
+        share of what the marine calls leave
+        """
+        marine_vars, weather_vars = self.upstream_variables(sports=sports)
+        marine = self.get_forecasts(locations, variables=marine_vars, deadline=deadline)
+        frames = [self.parse_api_response(r) for r in marine]
+        weather_deadline = deadline
+        if deadline is not None and not require_weather:
+            weather_deadline = Deadline(deadline.share(self.app_config['deadline']['weather_share']))
+        try:
+            if weather_vars:
+                weather = self.get_weather_forecasts(locations, variables=weather_vars, deadline=weather_deadline)
+                frames = [self.merge_weather_data(f, self.parse_weather_response(w)) for f, w in zip(frames, weather)]
+        except Exception as e:
+            if require_weather:
+                raise
+            # If weather API fails, continue without wind / UV index
+            print(f"Warning: Could not fetch weather data: {e}")
+        return list(zip(marine, frames))
+
+    def best_spots(
+        self,
+        *,
+        latitude: float,
+        longitude: float,
+        sport: str,
+        radius_km: float = 25.0,
+        window_start: str | None = None,
+        window_hours: int = 24,
+        metric: str = 'peak',
+        top_k: int = 5,
+        deadline: Deadline | None = None,
+    ) -> dict:
+        """
+        Rank spots (or grid cells) around a location for one sport over a time window.
+        All candidates are fetched in one batched upstream call and scored with score_forecast.
+        The upstream calls are bounded by deadline (default: a fresh request budget).
+        """
+        ruleset = self.rulesets.current()
+        rules = ruleset.rules
+        if sport not in rules['sports'] or not rules['sports'][sport].get('enabled', True):
+            raise ValueError(f"Unknown or disabled sport '{sport}'")
+        if metric not in RANK_METRICS:
+            raise ValueError(f"metric must be one of {RANK_METRICS}")
+        radius_km = min(radius_km, self.app_config['ranking']['max_radius_km'])
+
+        candidates = gather_candidates(
+            self.spots, latitude, longitude, radius_km,
+            sport=sport, limit=self.app_config['ranking']['max_candidates'],
         )
-        data: dict[str, object] = {'date': dates}
-        for i, name in enumerate(self.app_config['params']):
-            data[name] = hourly.Variables(i).ValuesAsNumpy()
+        start, end = window_bounds(window_start, window_hours)
+        window_start_epoch, window_end_epoch = int(pd.Timestamp(start).timestamp()), int(pd.Timestamp(end).timestamp())
+        locations = [(c['latitude'], c['longitude']) for _, c in candidates]
+        if deadline is None:
+            deadline = self.new_deadline()
+        fetched = self.load_hourly_many(locations, sports=[sport], deadline=deadline) if candidates else []
 
-        return pd.DataFrame(data)
+        scoreable = []
+        for (distance_km, candidate), (_, hourly) in zip(candidates, fetched):
+            window = hourly.window(window_start_epoch, window_end_epoch)
+            if 'wave_height' not in window.valid or not window.valid['wave_height'].any():
+                continue  # land cell or outside the marine model
+            scoreable.append((distance_km, candidate, window))
+        scored = self.score_many([w for _, _, w in scoreable], rules=rules, sports=[sport])
 
-    @staticmethod
-    def to_hourly_json(df: pd.DataFrame) -> list[dict]:
-        out = df.copy()
-        out["date"] = out["date"].dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-        return out.to_dict(orient="records")
-    
-    def merge_weather_data(self, marine_df: pd.DataFrame, weather_df: pd.DataFrame) -> pd.DataFrame:
-        """Merge UV index from weather API into marine forecast DataFrame"""
-        # Merge on date - only merge uv_index column
-        uv_cols = ['date']
-        if 'uv_index' in weather_df.columns:
-            uv_cols.append('uv_index')
-        
-        merged = marine_df.merge(
-            weather_df[uv_cols],
-            on='date',
-            how='left'
+        results = []
+        for (distance_km, candidate, _), rows in zip(scoreable, scored):
+            summary = summarize_window(rows, sport)
+            if summary is None:
+                continue
+            results.append({
+                "spot": candidate,
+                "distance_km": round(distance_km, 2),
+                "score": summary['peak_score'] if metric == 'peak' else summary['mean_score'],
+                **summary,
+            })
+        results.sort(key=lambda r: (-r['score'], r['distance_km']))
+        for rank, r in enumerate(results, start=1):
+            r['rank'] = rank
+
+        return {
+            "meta": {
+                "source": "open-meteo marine weather api",
+                "origin": {"latitude": latitude, "longitude": longitude},
+                "radius_km": radius_km,
+                "sport": sport,
+                "metric": metric,
+                "window": {"start": start, "end": end},
+                "candidates": len(candidates),
+                "ruleset_version": ruleset.version,
+            },
+            "results": results[:top_k],
+        }
+
+    def region_grid(
+        self,
+        *,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        step_deg: float = 0.1,
+        start: str | None = None,
+        hours: int = 24,
+        sports: list[str] | None = None,
+    ) -> dict:
+        """Score grid over a bounding box; see region.RegionGrid.grid for the layout"""
+        ruleset = self.rulesets.current()
+        rules = ruleset.rules
+        limits = self.app_config['region']
+        enabled = [k for k, v in rules['sports'].items() if v.get('enabled', True)]
+        sports = list(sports) if sports else enabled
+        unknown = [s for s in sports if s not in enabled]
+        if unknown:
+            raise ValueError(f"Unknown or disabled sports: {unknown}")
+        if not (-90 <= south < north <= 90 and -180 <= west < east <= 180):
+            raise ValueError("Bounding box must satisfy south < north and west < east")
+        if step_deg < limits['min_step_deg']:
+            raise ValueError(f"step_deg must be >= {limits['min_step_deg']}")
+        cells = (round((north - south) / step_deg) + 1) * (round((east - west) / step_deg) + 1)
+        if cells > limits['max_cells']:
+            raise ValueError(f"Grid has {cells} cells; max is {limits['max_cells']} (increase step_deg)")
+        hours = max(1, min(hours, limits['max_hours']))
+        window_start, _ = window_bounds(start, hours)
+        start_epoch = int(pd.Timestamp(window_start).timestamp())
+
+        grid = self.region.grid(
+            south=south, west=west, north=north, east=east, step_deg=step_deg,
+            start_epoch=start_epoch, hours=hours, sports=sports,
+            rules=rules, version=ruleset.version,
         )
-        
-        return merged
+        grid["ruleset_version"] = ruleset.version
+        grid["label_thresholds"] = rules["scoring"]["output"]["label_thresholds"]
+        return grid
+
+    def parse_weather_response(self, response: WeatherApiResponse) -> HourlyFrame:
+        """Parse weather API response into one column per returned weather variable"""
+        hourly = response.Hourly()
+        return HourlyFrame(response_columns(hourly), self._time_axis(hourly))
+
+    def parse_api_response(self, response: WeatherApiResponse) -> HourlyFrame:
+        """Marine variables by name, as views over the response buffers (no copies)"""
+        hourly = response.Hourly()
+        return HourlyFrame(response_columns(hourly), self._time_axis(hourly))
+
+    @staticmethod
+    def _time_axis(hourly) -> tuple[int, int, int]:
+        """(start epoch s, interval s, length) of a regular hourly grid"""
+        interval = hourly.Interval()
+        return hourly.Time(), interval, (hourly.TimeEnd() - hourly.Time()) // interval
+
+    @staticmethod
+    def to_hourly_json(frame: HourlyFrame) -> list[dict]:
+        """One dict per hour (date + variables, None where missing), for code that wants records"""
+        return frame.records()
+
+    def merge_weather_data(self, marine: HourlyFrame, weather: HourlyFrame) -> HourlyFrame:
+        """Join weather columns (wind, UV index) onto the marine frame, aligned by time (see align_columns)"""
+        return marine.with_columns(align_columns(weather.columns, weather.time_axis, marine.time_axis))
 
 if __name__ == "__main__":
     api = ForecastAPI()
@@ -0,0 +1,176 @@
+"""
+Struct-of-arrays hourly forecast, the interchange format between ForecastAPI and scoring.
+
+One float array per variable over a shared regular time axis (start epoch s, interval s,
+length). Columns are the arrays they were built from, not copies: the ValuesAsNumpy()
+views over the upstream flatbuffers, or the memory-mapped column store. Validity masks
+(finite values) are computed once when the frame is built.
+
+Row access for per-hour code (frame[i], iteration) builds a small dict of Python floats,
+None where the value is missing, from per-column lists converted once per frame, so no
+per-value NaN checks are repeated downstream. ISO dates are formatted in one vectorized call,
+also once per frame, and every row and result refers to those same strings. Frames are shared
+between requests through the forecast cache and must be treated as read-only.
+
+Upstream columns are named from each variable's own metadata (variable + altitude), not from
+its position in the request, so responses can carry any subset of variables in any order.
+"""
+import hashlib
+from typing import Any, Iterator
+
+import numpy as np
+from openmeteo_sdk.Variable import Variable
+
+# "iso": a date on every row; "epoch": meta.time_axis (start + interval) and no per-row dates
+TIME_FORMATS = ("iso", "epoch")
+
+_VARIABLE_NAMES = {value: name for name, value in vars(Variable).items() if not name.startswith("_")}
+
+
+def variable_name(variable) -> str:
+    """Request name of one response variable, e.g. wind_speed at 10 m is wind_speed_10m"""
+    name = _VARIABLE_NAMES.get(variable.Variable(), "undefined")
+    altitude = variable.Altitude()
+    return f"{name}_{altitude}m" if altitude else name
+
+
+def response_columns(hourly) -> dict[str, np.ndarray]:
+    """Every variable of a response's Hourly() block by name, as views over the response buffer"""
+    columns = {}
+    for i in range(hourly.VariablesLength()):
+        variable = hourly.Variables(i)
+        columns[variable_name(variable)] = variable.ValuesAsNumpy()
+    return columns
+
+
+def align_columns(
+    columns: dict[str, np.ndarray],
+    source_axis: tuple[int, int, int],
+    target_axis: tuple[int, int, int],
+) -> dict[str, np.ndarray]:
+    """
+    Columns on source_axis re-laid onto target_axis along their last axis (hours), NaN where
+    they don't overlap. On the usual aligned grids the arrays are sliced into place by time
+    offset; otherwise hours are matched by timestamp.
+    """
+    (t_start, t_interval, t_len), (s_start, s_interval, s_len) = target_axis, source_axis
+    if t_interval == s_interval and (s_start - t_start) % t_interval == 0:
+        # Hour i of the source lines up with hour i + offset of the target
+        offset = (s_start - t_start) // t_interval
+        lo, hi = max(offset, 0), min(offset + s_len, t_len)
+        src = slice(lo - offset, hi - offset)
+        dst = slice(lo, hi)
+    else:
+        # Irregular or misaligned grids: exact timestamp matches only
+        t_times = t_start + t_interval * np.arange(t_len, dtype=np.int64)
+        s_times = s_start + s_interval * np.arange(s_len, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(s_times, t_times), max(s_len - 1, 0))
+        dst = np.flatnonzero(s_times[idx] == t_times) if s_len else np.empty(0, dtype=np.int64)
+        src = idx[dst]
+        lo, hi = 0, len(dst)
+    out = {}
+    for name, values in columns.items():
+        aligned = np.full((*values.shape[:-1], t_len), np.nan, dtype=np.result_type(values.dtype, np.float32))
+        if hi > lo:
+            aligned[..., dst] = values[..., src]
+        out[name] = aligned
+    return out
+
+
+class HourlyFrame:
+    __slots__ = ("columns", "time_axis", "valid", "_lists", "_dates", "_digest")
+
+    def __init__(self, columns: dict[str, np.ndarray], time_axis: tuple[int, int, int]):
+        self.columns = columns
+        self.time_axis = tuple(int(v) for v in time_axis)
+        self.valid = {name: np.isfinite(values) for name, values in columns.items()}
+        self._lists: dict[str, list[float | None]] | None = None
+        self._dates: list[str] | None = None
+        self._digest: str | None = None
+
+    def __len__(self) -> int:
+        return self.time_axis[2]
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.columns)
+
+    def times(self) -> np.ndarray:
+        """Epoch seconds of every hour"""
+        start, interval, length = self.time_axis
+        return start + interval * np.arange(length, dtype=np.int64)
+
+    @property
+    def dates(self) -> list[str]:
+        """ISO-8601 UTC timestamps of every hour (formatted once per frame)"""
+        if self._dates is None:
+            seconds = self.times().astype("datetime64[s]")
+            self._dates = np.datetime_as_string(seconds, unit="s", timezone="UTC").tolist()
+        return self._dates
+
+    def time_axis_meta(self, length: int | None = None) -> dict[str, int]:
+        """Time axis for a response covering the first `length` hours (all by default)"""
+        start, interval, total = self.time_axis
+        return {"start": start, "interval_seconds": interval, "length": total if length is None else length}
+
+    def _values(self) -> dict[str, list[float | None]]:
+        if self._lists is None:
+            lists = {}
+            for name, values in self.columns.items():
+                column = values.tolist()
+                for i in np.flatnonzero(~self.valid[name]).tolist():
+                    column[i] = None
+                lists[name] = column
+            self._lists = lists
+        return self._lists
+
+    def __getitem__(self, i: int) -> dict[str, Any]:
+        """One hour as {"date": ..., variable: float | None, ...}"""
+        row: dict[str, Any] = {"date": self.dates[i]}
+        for name, column in self._values().items():
+            row[name] = column[i]
+        return row
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def records(self) -> list[dict[str, Any]]:
+        return list(self)
+
+    def fingerprint(self, i: int) -> tuple:
+        """Hashable view of one hour's inputs, in column order"""
+        return tuple(column[i] for column in self._values().values())
+
+    def digest(self) -> str:
+        """Content hash of the time axis and every column (computed once per frame)"""
+        if self._digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr((self.time_axis, self.names)).encode("utf-8"))
+            for values in self.columns.values():
+                h.update(np.ascontiguousarray(values).tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def slice(self, lo: int, hi: int) -> "HourlyFrame":
+        """Hours [lo, hi) as a frame over views of the same arrays"""
+        lo = min(max(0, lo), len(self))
+        hi = min(max(lo, hi), len(self))
+        start, interval, _ = self.time_axis
+        out = HourlyFrame.__new__(HourlyFrame)
+        out.columns = {name: values[lo:hi] for name, values in self.columns.items()}
+        out.time_axis = (start + lo * interval, interval, hi - lo)
+        out.valid = {name: mask[lo:hi] for name, mask in self.valid.items()}
+        out._lists = None if self._lists is None else {n: c[lo:hi] for n, c in self._lists.items()}
+        out._dates = None if self._dates is None else self._dates[lo:hi]
+        out._digest = None
+        return out
+
+    def window(self, start_epoch: int, end_epoch: int) -> "HourlyFrame":
+        """Hours with start_epoch <= time < end_epoch"""
+        start, interval, _ = self.time_axis
+        return self.slice(-(-(start_epoch - start) // interval), -(-(end_epoch - start) // interval))
+
+    def with_columns(self, columns: dict[str, np.ndarray]) -> "HourlyFrame":
+        """New frame with extra (or replaced) columns of the same length"""
+        return HourlyFrame({**self.columns, **columns}, self.time_axis)
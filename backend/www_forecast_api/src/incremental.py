@@ -0,0 +1,100 @@
+"""
+Incremental rescoring across upstream refreshes.
+
+Between two fetches of the same location most hours carry identical inputs and
+past hours simply drop off the front. IncrementalScorer keeps the last scored
+result per location and only reruns score_hour_for_sport for hours that are
+new or whose inputs changed, then splices the reused rows back in order.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from deadline import Deadline
+from hourly import HourlyFrame
+from scoring import ScoreMemo, ruleset_version, score_hour_for_sport
+
+
+class IncrementalScorer:
+    """
+    Per-location memory of the previous scored forecast.
+    Entries are keyed by location and invalidated whenever the ruleset or sport list changes.
+    """
+
+    def __init__(self, max_locations: int = 256, memo: ScoreMemo | None = None):
+        self.max_locations = max_locations
+        self.memo = memo
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hours_scored": 0, "hours_reused": 0}
+
+    def score(
+        self,
+        location_key: str,
+        hourly: HourlyFrame,
+        *,
+        rules: dict[str, Any],
+        sports: Iterable[str] | None = None,
+        deadline: Deadline | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Same output as score_forecast(), rescoring only changed or new hours.
+        If the deadline runs out, returns the leading hours scored so far.
+        """
+        sports_list = list(sports) if sports is not None else [
+            k for k, v in rules["sports"].items() if v.get("enabled", True)
+        ]
+        # Fingerprints are in column order, so a different column set is a different scope
+        scope = (ruleset_version(rules), tuple(sports_list), tuple(hourly.names))
+        score_hour = self.memo.score_hour if self.memo is not None else score_hour_for_sport
+
+        with self._lock:
+            entry = self._entries.get(location_key)
+            if entry is not None:
+                self._entries.move_to_end(location_key)
+        previous: dict[str, tuple[tuple, dict[str, Any]]] = (
+            entry["hours"] if entry is not None and entry["scope"] == scope else {}
+        )
+
+        hours: dict[str, tuple[tuple, dict[str, Any]]] = {}
+        out: list[dict[str, Any]] = []
+        scored = reused = 0
+        dates = hourly.dates
+        stopped_at = None
+        for i in range(len(hourly)):
+            date = dates[i]
+            fingerprint = hourly.fingerprint(i)
+            cached = previous.get(date)
+            if cached is not None and cached[0] == fingerprint:
+                row = cached[1]
+                reused += 1
+            else:
+                if deadline is not None and deadline.expired():
+                    stopped_at = i
+                    break
+                hour = hourly[i]
+                row = {
+                    "date": date,
+                    "sports": {s: score_hour(hour, sport_key=s, rules=rules, normalized=True) for s in sports_list},
+                }
+                scored += 1
+            hours[date] = (fingerprint, row)
+            out.append(row)
+
+        if stopped_at is not None:
+            # Keep the previous rows for hours the deadline cut off, so the next request only
+            # rescores what actually changed (their fingerprints are still checked then)
+            for i in range(stopped_at, len(hourly)):
+                cached = previous.get(dates[i])
+                if cached is not None:
+                    hours[dates[i]] = cached
+
+        with self._lock:
+            # Hours no longer in the fetch (the past) are dropped by rebuilding from this fetch only
+            self._entries[location_key] = {"scope": scope, "hours": hours}
+            self._entries.move_to_end(location_key)
+            while len(self._entries) > self.max_locations:
+                self._entries.popitem(last=False)
+            self.stats["hours_scored"] += scored
+            self.stats["hours_reused"] += reused
+        return out
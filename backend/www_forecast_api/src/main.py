@@ -1,11 +1,24 @@
-from fastapi import FastAPI, HTTPException
+import json
+
+import time
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional
 import uvicorn
 
+from deadline import DeadlineExceeded
+import metrics
 from forecast_api import ForecastAPI
-from scoring import score_forecast
+from hourly import TIME_FORMATS
+from paging import MAX_PAGE_DAYS, parse_cursor
+from profiles import UnknownProfile
+from profiling import profile_request, requested_mode
+from region import GRID_FORMATS, encode_grid
+from ruleset import RulesetError
+from spots import UnknownSpot
+from upstream import UpstreamUnavailable
 
 app = FastAPI(
     title="SurfingPal Forecast API",
@@ -39,6 +52,81 @@ class ForecastRequest(BaseModel):
         ge=-180,
         le=180
     )
+    spot_id: Optional[str] = Field(
+        None,
+        description="Catalog spot id; takes precedence over coordinates"
+    )
+    profile_id: Optional[str] = Field(
+        None,
+        description="Named sport profile to score with"
+    )
+    overlay: Optional[dict] = Field(
+        None,
+        description="Inline sport overlay, e.g. {\"surfing\": {\"thresholds\": {\"wave_height_m\": {\"ideal\": [0.5, 1.4]}}}}"
+    )
+    time_format: str = Field(
+        "iso",
+        description="'iso' (date on every row) or 'epoch' (meta.time_axis start + interval, no per-row dates)"
+    )
+    days: Optional[int] = Field(
+        None,
+        description="Return a page of this many local days instead of the full horizon",
+        ge=1,
+        le=MAX_PAGE_DAYS
+    )
+    cursor: Optional[str] = Field(
+        None,
+        description="meta.page.next_cursor of the previous page (a local YYYY-MM-DD date)"
+    )
+
+
+class BestSpotsRequest(BaseModel):
+    latitude: Optional[float] = Field(
+        None,
+        description="Latitude of the user (defaults to test location if not provided)",
+        ge=-90,
+        le=90
+    )
+    longitude: Optional[float] = Field(
+        None,
+        description="Longitude of the user (defaults to test location if not provided)",
+        ge=-180,
+        le=180
+    )
+    sport: str = Field(..., description="Sport to rank spots for, e.g. surfing")
+    radius_km: float = Field(25.0, description="Search radius in km", gt=0, le=200)
+    window_start: Optional[str] = Field(None, description="ISO start of the time window (defaults to now)")
+    window_hours: int = Field(24, description="Length of the time window in hours", ge=1, le=168)
+    metric: str = Field("peak", description="Rank by 'peak' or 'mean' score within the window")
+    top_k: int = Field(5, description="Number of spots to return", ge=1, le=20)
+
+
+class RegionRequest(BaseModel):
+    south: float = Field(..., ge=-90, le=90)
+    west: float = Field(..., ge=-180, le=180)
+    north: float = Field(..., ge=-90, le=90)
+    east: float = Field(..., ge=-180, le=180)
+    step_deg: float = Field(0.1, description="Grid spacing in degrees", gt=0)
+    start: Optional[str] = Field(None, description="ISO start of the hour range (defaults to now)")
+    hours: int = Field(24, description="Number of hours", ge=1, le=168)
+    sports: Optional[list[str]] = Field(None, description="Sports to score (defaults to all enabled)")
+    format: str = Field("json", description="'json' (base64 data) or 'binary' (raw uint8 body)")
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Latency and response size per endpoint (sizes from Content-Length, no re-serialization)"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    # The matched route's template, so arbitrary (e.g. 404) URLs can't add label values
+    route = request.scope.get("route")
+    metrics.observe_request(
+        getattr(route, "path", None) or metrics.UNMATCHED_ENDPOINT,
+        response.status_code,
+        time.perf_counter() - start,
+        int(response.headers.get("content-length", 0)),
+    )
+    return response
 
 
 @app.get("/")
@@ -48,44 +136,102 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "forecast": "/api/forecast",
-            "health": "/health"
+            "best_spots": "/api/best-spots",
+            "region": "/api/region",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "ruleset": forecast_api.rulesets.info(),
+        "caches": forecast_api.cache_stats(),
+        "upstream": forecast_api.upstream_stats(),
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of request, stage, upstream and cache metrics"""
+    return Response(
+        content=metrics.render(forecast_api.cache_stats(), forecast_api.upstream_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
 
 
 @app.post("/api/forecast")
-async def get_forecast(request: ForecastRequest):
+def get_forecast(request: ForecastRequest, x_profile: Optional[str] = Header(None)):
     """
     Get marine weather forecast for water sports.
     
     Returns forecast data with scores for all enabled sports (surfing, SUP, windsurfing, kitesurfing, etc.)
     """
+    # Opt-in profiling (PROFILE_REQUESTS=1 or an X-Profile header matching PROFILE_TOKEN)
+    mode = requested_mode(x_profile)
+    if mode is None:
+        return forecast_payload(request)
+    with profile_request(mode, "forecast") as profile:
+        payload = forecast_payload(request)
+    payload["meta"]["profile"] = profile.summary()
+    return payload
+
+
+def forecast_payload(request: ForecastRequest) -> dict:
+    """Response body for /api/forecast; errors are raised as HTTPException"""
+    # Budget for the whole request: fetch, parse and scoring stop waiting when it runs out
+    deadline = forecast_api.new_deadline()
+    if request.time_format not in TIME_FORMATS:
+        raise HTTPException(status_code=400, detail=f"time_format must be one of {TIME_FORMATS}")
     try:
-        # Use provided coordinates or defaults
-        latitude = request.latitude if request.latitude is not None else forecast_api.app_config["test_geo"]["latitude"]
-        longitude = request.longitude if request.longitude is not None else forecast_api.app_config["test_geo"]["longitude"]
-        
-        # Get marine forecast
-        marine_forecast = forecast_api.get_forecast(latitude=latitude, longitude=longitude)
-        marine_df = forecast_api.parse_api_response(marine_forecast)
+        cursor = parse_cursor(request.cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        with metrics.stage("forecast", "resolve"):
+            # Resolve to a catalog spot when possible, else use provided coordinates or defaults
+            latitude, longitude, spot = forecast_api.resolve_location(
+                latitude=request.latitude,
+                longitude=request.longitude,
+                spot_id=request.spot_id,
+            )
+            # One ruleset snapshot per request (with the user's profile applied); a concurrent
+            # reload never changes it mid-request
+            ruleset = forecast_api.ruleset_for(profile_id=request.profile_id, overlay=request.overlay)
         
-        # Get weather forecast (UV index)
-        try:
-            weather_forecast = forecast_api.get_weather_forecast(latitude=latitude, longitude=longitude)
-            weather_df = forecast_api.parse_weather_response(weather_forecast)
-            # Merge UV index into marine data
-            marine_df = forecast_api.merge_weather_data(marine_df, weather_df)
-        except Exception as e:
-            # If weather API fails, continue without UV index
-            print(f"Warning: Could not fetch UV index: {e}")
+        # Marine forecast joined with weather (wind + UV)
+        with metrics.stage("forecast", "fetch"):
+            marine_forecast, hourly, freshness = forecast_api.load_forecast(
+                latitude=latitude, longitude=longitude, deadline=deadline,
+            )
         
-        hourly = forecast_api.to_hourly_json(marine_df)
-        scores = score_forecast(hourly, rules=forecast_api.CONDITION_RULESET)
+        score_start = time.perf_counter()
+        with metrics.stage("forecast", "score"):
+            if request.days is None:
+                window, page = hourly, None
+                scores = forecast_api.score_hourly(
+                    hourly,
+                    location_key=forecast_api.location_key(marine_forecast, spot),
+                    rules=ruleset.rules,
+                    deadline=deadline,
+                    time_format=request.time_format,
+                )
+            else:
+                # One page of local days; scored days are cached for the following pages
+                scores, window, page = forecast_api.score_page(
+                    hourly,
+                    location_key=forecast_api.location_key(marine_forecast, spot),
+                    utc_offset_seconds=marine_forecast.UtcOffsetSeconds(),
+                    days=request.days,
+                    cursor=cursor,
+                    rules=ruleset.rules,
+                    deadline=deadline,
+                    time_format=request.time_format,
+                )
+        metrics.observe_scoring("forecast", len(scores), time.perf_counter() - score_start)
         
         # Build response
         payload = {
@@ -98,15 +244,105 @@ async def get_forecast(request: ForecastRequest):
                 },
                 "elevation_m_asl": marine_forecast.Elevation(),
                 "utc_offset_seconds": marine_forecast.UtcOffsetSeconds(),
+                "spot": spot,
+                "ruleset_version": ruleset.version,
+                "data": freshness,
+                # True when the deadline cut scoring short (scores cover only the leading hours)
+                "truncated": len(scores) < len(window),
+                "profile_id": request.profile_id,
+                "time_format": request.time_format,
+                # Hour i of scores is start + i * interval_seconds (epoch seconds, UTC)
+                "time_axis": window.time_axis_meta(len(scores)),
+                # {"days": [...], "next_cursor": ...} for day-paged requests
+                "page": page,
             },
             "scores": scores,
         }
         
         return payload
         
+    except (UnknownSpot, UnknownProfile) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RulesetError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching forecast: {str(e)}")
 
 
+@app.post("/api/best-spots")
+def best_spots(request: BestSpotsRequest):
+    """
+    Rank nearby spots for one sport by peak or mean score within a time window.
+
+    Candidates are fetched with one multi-location upstream call and scored in a single pass.
+    """
+    latitude = request.latitude if request.latitude is not None else forecast_api.app_config["test_geo"]["latitude"]
+    longitude = request.longitude if request.longitude is not None else forecast_api.app_config["test_geo"]["longitude"]
+    try:
+        return forecast_api.best_spots(
+            latitude=latitude,
+            longitude=longitude,
+            sport=request.sport,
+            radius_km=request.radius_km,
+            window_start=request.window_start,
+            window_hours=request.window_hours,
+            metric=request.metric,
+            top_k=request.top_k,
+            deadline=forecast_api.new_deadline(),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error ranking spots: {str(e)}")
+
+
+@app.post("/api/region")
+def region(request: RegionRequest):
+    """
+    Score grid over a bounding box for map overlays.
+
+    Scores are uint8 (score * scale, nodata for land) with shape [lats, lons, hours, sports].
+    With format=binary the body is the raw array and the layout is in the X-Grid-Meta header.
+    """
+    if request.format not in GRID_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {GRID_FORMATS}")
+    try:
+        grid = forecast_api.region_grid(
+            south=request.south,
+            west=request.west,
+            north=request.north,
+            east=request.east,
+            step_deg=request.step_deg,
+            start=request.start,
+            hours=request.hours,
+            sports=request.sports,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error building region grid: {str(e)}")
+
+    if request.format == "binary":
+        meta = {k: v for k, v in grid.items() if k != "data"}
+        return Response(
+            content=grid["data"].tobytes(),
+            media_type="application/octet-stream",
+            headers={"X-Grid-Meta": json.dumps(meta)},
+        )
+    return encode_grid(grid)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
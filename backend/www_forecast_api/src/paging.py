@@ -0,0 +1,86 @@
+"""
+Day-paged forecast responses.
+
+A forecast is split into local days (by the location's UTC offset); a page is one or more
+consecutive days, and its cursor is the local date (YYYY-MM-DD) the next page starts on.
+Cursors stay valid across upstream refreshes: a date that has already passed starts from the
+first day still in the forecast, one beyond the horizon gives an empty page.
+
+Scored days are cached per (location, ruleset, fetch, day), so later pages of the same fetch
+only cost serialization.
+"""
+import datetime as dt
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from hourly import HourlyFrame
+
+MAX_PAGE_DAYS = 16
+
+
+class LocalDay(NamedTuple):
+    date: str  # local calendar date, YYYY-MM-DD
+    lo: int  # first hour index in the frame
+    hi: int  # one past the last hour index
+
+
+def local_days(frame: HourlyFrame, utc_offset_seconds: int) -> list[LocalDay]:
+    """Hour ranges of each local calendar day in the frame"""
+    if not len(frame):
+        return []
+    day_ids = (frame.times() + utc_offset_seconds) // 86400
+    bounds = np.flatnonzero(np.diff(day_ids)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(frame)]))
+    labels = np.datetime_as_string((day_ids[starts] * 86400).astype("datetime64[s]"), unit="D").tolist()
+    return [LocalDay(label, int(lo), int(hi)) for label, lo, hi in zip(labels, starts.tolist(), ends.tolist())]
+
+
+def parse_cursor(cursor: str | None) -> str | None:
+    """Validated cursor (a local date); raises ValueError for anything else"""
+    if cursor is None:
+        return None
+    try:
+        return dt.date.fromisoformat(cursor).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}' (expected a YYYY-MM-DD date)") from None
+
+
+def select_page(days: list[LocalDay], cursor: str | None, count: int) -> tuple[list[LocalDay], str | None]:
+    """The page's days (starting at cursor, else the first day) and the next page's cursor"""
+    start = parse_cursor(cursor)
+    first = 0 if start is None else next((i for i, d in enumerate(days) if d.date >= start), len(days))
+    page = days[first:first + count]
+    rest = days[first + count:]
+    return page, rest[0].date if rest else None
+
+
+class DayCache:
+    """Bounded LRU of serialized scored days"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, list[dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: tuple) -> list[dict[str, Any]] | None:
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return rows
+
+    def put(self, key: tuple, rows: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
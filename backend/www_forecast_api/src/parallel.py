@@ -0,0 +1,194 @@
+"""
+Process-pool scoring for batch workloads (many locations x many hours x all sports).
+
+score_forecast is per-hour Python, so one process scores on one core. ParallelScorer copies
+the frames' columns once into a shared-memory block, splits the locations into contiguous
+shards and scores each shard in a worker process over zero-copy views of that block. Only the
+layout (offsets, variable names, time axes), the ruleset and the results cross the process
+boundary. Results come back in input order, identical to score_forecast on each frame.
+
+Shipping results back is not free: ~100k SportResults cost about as much to unpickle in the
+parent as to score. Callers that only serialize them pass encode (e.g. json_scores), which
+runs in the workers so the parent just receives bytes.
+
+On Linux workers are forked, all at once by start(); call it before the process starts other
+threads (ForecastAPI does so first thing) so no lock held by another thread is copied into a
+worker, and the workers never re-import the main script. Elsewhere they are spawned, and as
+with any spawned pool the main script must be import-safe. Shared memory needs /dev/shm, so
+this is not for Lambda.
+
+    scorer = ParallelScorer(workers=8)
+    per_location = scorer.score_many(frames, rules=rules)
+    payloads = scorer.score_many(frames, rules=rules, encode=json_scores)
+"""
+import gc
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Iterable, NamedTuple
+
+import numpy as np
+
+from hourly import HourlyFrame
+from scoring import ScoreMemo, score_forecast, scores_to_json
+
+
+class _Layout(NamedTuple):
+    offset: int  # first element of the frame's (variables x hours) block
+    names: tuple[str, ...]
+    time_axis: tuple[int, int, int]
+
+
+def json_scores(rows: list[dict[str, Any]]) -> bytes:
+    """encode for score_many: the scores_to_json payload as compact UTF-8 JSON"""
+    return json.dumps(scores_to_json(rows), separators=(",", ":")).encode("utf-8")
+
+
+# Per-worker memo, kept across shards (nearby spots and days repeat sea states)
+_memo: ScoreMemo | None = None
+
+
+def _init_worker() -> None:
+    # Keep the collector off the heap a forked worker inherits (it never changes here, and
+    # walking it costs time and copy-on-write page copies)
+    gc.freeze()
+
+
+def _score_frames(
+    buf: memoryview,
+    layouts: list[_Layout],
+    rules: dict[str, Any],
+    sports: list[str] | None,
+    encode: Callable | None,
+) -> list:
+    global _memo
+    if _memo is None:
+        _memo = ScoreMemo()
+    data = np.frombuffer(buf, dtype=np.float32)
+    out = []
+    for layout in layouts:
+        hours = layout.time_axis[2]
+        columns = {
+            name: data[layout.offset + i * hours:layout.offset + (i + 1) * hours]
+            for i, name in enumerate(layout.names)
+        }
+        rows = score_forecast(HourlyFrame(columns, layout.time_axis), rules=rules, sports=sports, memo=_memo)
+        out.append(rows if encode is None else encode(rows))
+    return out
+
+
+def _score_shard(
+    block_name: str,
+    layouts: list[_Layout],
+    rules: dict[str, Any],
+    sports: list[str] | None,
+    encode: Callable | None,
+) -> list:
+    """Worker entry point: score a shard of frames laid out in the named shared-memory block"""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        # Views into the block are gone once _score_frames returns, so it can be closed
+        return _score_frames(block.buf, layouts, rules, sports, encode)
+    finally:
+        block.close()
+
+
+def _context() -> multiprocessing.context.BaseContext:
+    return multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+
+
+class ParallelScorer:
+    """score_forecast over many frames, sharded across a lazily started process pool"""
+
+    def __init__(self, workers: int | None = None, *, shards_per_worker: int = 4, min_frames: int = 2):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # Several shards per worker so uneven shards (long / short frames) still balance
+        self.shards_per_worker = shards_per_worker
+        # Below this many frames the pool round trip costs more than it saves
+        self.min_frames = min_frames
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "frames": 0, "shards": 0, "serial": 0}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                resource_tracker.ensure_running()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=_context(), initializer=_init_worker,
+                )
+            return self._pool
+
+    def start(self) -> None:
+        """Start the workers now (a forking pool starts all of them on its first task)"""
+        # Forked workers must share the parent's tracker; their own would unlink blocks on exit
+        resource_tracker.ensure_running()
+        self._executor().submit(os.getpid).result()
+
+    def score_many(
+        self,
+        frames: list[HourlyFrame],
+        *,
+        rules: dict[str, Any],
+        sports: Iterable[str] | None = None,
+        memo: ScoreMemo | None = None,
+        encode: Callable[[list[dict[str, Any]]], Any] | None = None,
+    ) -> list:
+        """
+        score_forecast of every frame, in order, or encode() of it when given (a module-level
+        function, so workers can unpickle it). memo is only used when scoring in-process.
+        """
+        sports = list(sports) if sports is not None else None
+        if len(frames) < self.min_frames:
+            self.stats["serial"] += 1
+            scored = [score_forecast(f, rules=rules, sports=sports, memo=memo) for f in frames]
+            return scored if encode is None else [encode(rows) for rows in scored]
+
+        layouts: list[_Layout] = []
+        total = 0
+        for frame in frames:
+            layouts.append(_Layout(total, tuple(frame.names), frame.time_axis))
+            total += len(frame.names) * len(frame)
+        block = shared_memory.SharedMemory(create=True, size=max(total, 1) * 4)
+        try:
+            data = np.frombuffer(block.buf, dtype=np.float32, count=total)
+            for frame, layout in zip(frames, layouts):
+                hours = len(frame)
+                for i, values in enumerate(frame.columns.values()):
+                    data[layout.offset + i * hours:layout.offset + (i + 1) * hours] = values
+            del data
+
+            count = min(len(frames), self.workers * self.shards_per_worker)
+            bounds = np.linspace(0, len(frames), count + 1).astype(int).tolist()
+            pool = self._executor()
+            futures = [
+                pool.submit(_score_shard, block.name, layouts[lo:hi], rules, sports, encode)
+                for lo, hi in zip(bounds, bounds[1:]) if hi > lo
+            ]
+            out: list = []
+            try:
+                for future in futures:
+                    out.extend(future.result())
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        finally:
+            block.close()
+            block.unlink()
+
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["frames"] += len(frames)
+            self.stats["shards"] += len(futures)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
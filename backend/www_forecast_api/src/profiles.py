@@ -0,0 +1,117 @@
+"""
+Per-user sport profiles.
+
+A profile is an overlay of sport settings merged onto the active ruleset, e.g. a
+longboarder's smaller wave_height_m.ideal:
+
+    {"surfing": {"thresholds": {"wave_height_m": {"ideal": [0.5, 1.4]}}}}
+
+Named profiles are loaded from PROFILES_PATH (default profiles.json next to this module);
+requests may also send an inline overlay. Each distinct (ruleset version, overlay) pair is
+compiled once and kept in a bounded LRU, so repeated profiles never recompile. Upstream
+data is untouched - only scoring differs.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from ruleset import LoadedRuleset, RulesetError, compile_ruleset
+from scoring import ruleset_version
+
+DEFAULT_PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles.json')
+# Only these parts of a sport may be overridden by a profile
+OVERLAY_SECTIONS = ("thresholds", "hard_limits", "weights")
+
+
+class UnknownProfile(LookupError):
+    """Raised for a profile_id that is not in the store"""
+
+
+def _merge(base: dict[str, Any], overlay: dict[str, Any]) -> dict[str, Any]:
+    out = dict(base)
+    for k, v in overlay.items():
+        out[k] = _merge(out[k], v) if isinstance(v, dict) and isinstance(out.get(k), dict) else v
+    return out
+
+
+def apply_overlay(rules: dict[str, Any], overlay: dict[str, Any]) -> dict[str, Any]:
+    """Ruleset with the overlay merged into rules["sports"]; raises RulesetError for bad overlays"""
+    if not isinstance(overlay, dict):
+        raise RulesetError("profile overlay must be an object keyed by sport")
+    merged = copy.deepcopy(rules)
+    for sport_key, sport_overlay in overlay.items():
+        if sport_key not in merged["sports"]:
+            raise RulesetError(f"profile overlay references unknown sport '{sport_key}'")
+        if not isinstance(sport_overlay, dict):
+            raise RulesetError(f"profile overlay for '{sport_key}' must be an object")
+        extra = set(sport_overlay) - set(OVERLAY_SECTIONS)
+        if extra:
+            raise RulesetError(f"profile overlay for '{sport_key}' may only set {OVERLAY_SECTIONS}, got {sorted(extra)}")
+        merged["sports"][sport_key] = _merge(merged["sports"][sport_key], sport_overlay)
+    return merged
+
+
+def overlay_hash(overlay: dict[str, Any]) -> str:
+    blob = json.dumps(overlay, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:12]
+
+
+class ProfileStore:
+    """Named profiles plus an LRU of compiled (ruleset, overlay) scoring plans"""
+
+    def __init__(self, profiles: dict[str, dict[str, Any]] | None = None, *, max_compiled: int = 512):
+        self.profiles = dict(profiles or {})
+        self.max_compiled = max_compiled
+        self._compiled: OrderedDict[tuple[str, str], LoadedRuleset] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "compiles": 0, "evictions": 0}
+
+    @classmethod
+    def load(cls, path: str | None = None, **kwargs) -> 'ProfileStore':
+        path = path or os.environ.get('PROFILES_PATH') or DEFAULT_PROFILES_PATH
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get("profiles", data), **kwargs)
+
+    def resolve(
+        self,
+        base: LoadedRuleset,
+        *,
+        profile_id: str | None = None,
+        overlay: dict[str, Any] | None = None,
+    ) -> LoadedRuleset:
+        """Ruleset for a request: base, a named profile, and/or an inline overlay on top"""
+        if profile_id is None and not overlay:
+            return base
+        combined: dict[str, Any] = {}
+        if profile_id is not None:
+            if profile_id not in self.profiles:
+                raise UnknownProfile(f"Unknown profile_id '{profile_id}'")
+            combined = self.profiles[profile_id]
+        if overlay:
+            combined = _merge(combined, overlay)
+
+        key = (base.version, overlay_hash(combined))
+        with self._lock:
+            cached = self._compiled.get(key)
+            if cached is not None:
+                self._compiled.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached
+
+        compiled = compile_ruleset(apply_overlay(base.rules, combined))
+        label = f"profile:{profile_id}" if profile_id is not None else "overlay"
+        loaded = LoadedRuleset(compiled, ruleset_version(compiled), f"{base.source}+{label}", base.loaded_at)
+        with self._lock:
+            self._compiled[key] = loaded
+            self.stats["compiles"] += 1
+            while len(self._compiled) > self.max_compiled:
+                self._compiled.popitem(last=False)
+                self.stats["evictions"] += 1
+        return loaded
@@ -0,0 +1,89 @@
+"""
+"Best spot near me" ranking helpers.
+
+Candidates come from the spot catalog, or from a coarse grid around the user when the
+catalog has nothing in range. Scoring reuses score_forecast; only the requested sport
+and the hours inside the time window are scored.
+"""
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from spots import SpotCatalog, haversine_km
+
+RANK_METRICS = ("peak", "mean")
+
+
+def grid_candidates(
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    *,
+    step_deg: float = 0.1,
+    limit: int = 50,
+) -> list[tuple[float, dict[str, Any]]]:
+    """(distance_km, cell) pairs for grid points within radius_km, nearest first"""
+    lat_steps = int(radius_km / (110.57 * step_deg)) + 1
+    lon_km = 111.32 * max(math.cos(math.radians(latitude)), 1e-6)
+    lon_steps = min(int(radius_km / (lon_km * step_deg)) + 1, int(180 / step_deg))
+    base_lat = round(latitude / step_deg) * step_deg
+    base_lon = round(longitude / step_deg) * step_deg
+
+    cells: list[tuple[float, dict[str, Any]]] = []
+    for i in range(-lat_steps, lat_steps + 1):
+        lat = round(base_lat + i * step_deg, 4)
+        if not -90 <= lat <= 90:
+            continue
+        for j in range(-lon_steps, lon_steps + 1):
+            lon = round(((base_lon + j * step_deg + 180) % 360) - 180, 4)
+            d = haversine_km(latitude, longitude, lat, lon)
+            if d <= radius_km:
+                cells.append((d, {"id": f"grid:{lat:.4f},{lon:.4f}", "name": None, "latitude": lat, "longitude": lon}))
+    cells.sort(key=lambda pair: pair[0])
+    return cells[:limit]
+
+
+def gather_candidates(
+    catalog: SpotCatalog,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    *,
+    sport: str,
+    limit: int = 50,
+) -> list[tuple[float, dict[str, Any]]]:
+    """Catalog spots in range that list the sport (or list none); grid cells if there are none"""
+    candidates = catalog.within(latitude, longitude, radius_km, sport=sport)
+    if not candidates:
+        candidates = grid_candidates(latitude, longitude, radius_km, limit=limit)
+    return candidates[:limit]
+
+
+def window_bounds(window_start: str | None, window_hours: int) -> tuple[str, str]:
+    """[start, end) of the window as ISO strings comparable with HourlyFrame.dates"""
+    if window_start:
+        start = datetime.fromisoformat(window_start.replace("Z", "+00:00"))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        start = start.astimezone(timezone.utc)
+    else:
+        start = datetime.now(timezone.utc)
+    start = start.replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=window_hours)
+    fmt = "%Y-%m-%dT%H:%M:%SZ"
+    return start.strftime(fmt), end.strftime(fmt)
+
+
+def summarize_window(scores: list[dict[str, Any]], sport: str) -> dict[str, Any] | None:
+    """Peak/mean score of one sport over scored hours; None if nothing was scorable"""
+    results = [row["sports"][sport] for row in scores if sport in row["sports"]]
+    if not results:
+        return None
+    best = max(results, key=lambda r: r.score)
+    return {
+        "peak_score": best.score,
+        "mean_score": round(sum(r.score for r in results) / len(results), 3),
+        "best_hour": best.date,
+        "best_label": best.label,
+        "hours": len(results),
+    }
@@ -1,6 +1,163 @@
 
+import hashlib
+import json
 import math
-from typing import Any, Iterable
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Iterable, NamedTuple
+
+from hourly import HourlyFrame
+
+# Hour fields score_hour_for_sport actually reads; anything else can't change a result
+SCORING_FIELDS = (
+    "wave_height",
+    "wave_period",
+    "wind_wave_height",
+    "wind_wave_period",
+    "swell_wave_height",
+    "ocean_current_velocity",
+    "sea_surface_temperature",
+    "uv_index",
+    "wind_speed_10m",
+    "wind_gusts_10m",
+)
+
+# Hard-limit keys that name a metric other than the hour field of the same name
+_HARD_LIMIT_METRICS = {
+    "wave_height_m": "wave_height",
+    "wind_wave_height_m": "wind_wave_height",
+    "current_velocity_kmh": "ocean_current_velocity_kmh",
+    "wind_gusts_kmh": "wind_gust_kmh",
+}
+# Metrics score_hour_for_sport derives from SCORING_FIELDS
+_DERIVED_METRICS = {"ocean_current_velocity_kmh", "wind_speed_kmh", "wind_gust_kmh", "swell_share"}
+
+# Bounded: custom profiles create many short-lived rulesets
+_RULESET_VERSIONS: OrderedDict[int, tuple[dict[str, Any], str]] = OrderedDict()
+_RULESET_VERSIONS_MAX = 1024
+
+
+def ruleset_version(rules: dict[str, Any]) -> str:
+    """
+    Short content hash of a ruleset, used to key cached scores.
+    Computed once per ruleset object (the reference is kept so the id can't be reused).
+    """
+    cached = _RULESET_VERSIONS.get(id(rules))
+    if cached is not None and cached[0] is rules:
+        return cached[1]
+    blob = json.dumps(rules, sort_keys=True, default=str, ensure_ascii=False)
+    version = hashlib.sha256(blob.encode("utf-8")).hexdigest()[:12]
+    _RULESET_VERSIONS[id(rules)] = (rules, version)
+    while len(_RULESET_VERSIONS) > _RULESET_VERSIONS_MAX:
+        _RULESET_VERSIONS.popitem(last=False)
+    return version
+
+
+class Tip(NamedTuple):
+    id: str
+    severity: str
+    icon: str
+    text: str
+
+
+class ConditionLabels(NamedTuple):
+    green: tuple[str, ...]
+    yellow: tuple[str, ...]
+    red: tuple[str, ...]
+
+
+# Tips and label sets repeat across hours, sports and spots; intern them so every
+# result refers to one shared (immutable) instance instead of allocating its own
+@lru_cache(maxsize=4096)
+def _tip(tip_id: str, severity: str, icon: str, text: str) -> Tip:
+    return Tip(tip_id, severity, icon, text)
+
+
+@lru_cache(maxsize=4096)
+def _condition_labels(green: tuple[str, ...], yellow: tuple[str, ...], red: tuple[str, ...]) -> ConditionLabels:
+    return ConditionLabels(green, yellow, red)
+
+
+class SportResult:
+    """
+    One sport's score for one hour.
+    A forecast holds ~1,900 of these and the memo / incremental caches keep them around, so
+    they are slotted and made of tuples (empty ones and interned tips / labels shared) rather
+    than nested dicts and lists. to_dict() builds the JSON shape once, at the edge.
+    """
+
+    __slots__ = ("sport", "date", "label", "score", "context", "flags", "reasons", "tips", "condition_labels")
+
+    def __init__(
+        self,
+        sport: str,
+        date: str | None,
+        label: str,
+        score: float,
+        context: tuple[tuple[str, float], ...],
+        flags: tuple[str, ...],
+        reasons: tuple[str, ...],
+        tips: tuple[Tip, ...],
+        condition_labels: ConditionLabels,
+    ):
+        self.sport = sport
+        self.date = date
+        self.label = label
+        self.score = score
+        self.context = context
+        self.flags = flags
+        self.reasons = reasons
+        self.tips = tips
+        self.condition_labels = condition_labels
+
+    def with_date(self, date: str | None) -> "SportResult":
+        """Same result for another hour (shares every field)"""
+        if date == self.date:
+            return self
+        return SportResult(
+            self.sport, date, self.label, self.score, self.context,
+            self.flags, self.reasons, self.tips, self.condition_labels,
+        )
+
+    def __reduce__(self):
+        # Positional fields pickle several times faster than the default slots state dict
+        return SportResult, (
+            self.sport, self.date, self.label, self.score, self.context,
+            self.flags, self.reasons, self.tips, self.condition_labels,
+        )
+
+    def to_dict(self, dates: bool = True) -> dict[str, Any]:
+        out: dict[str, Any] = {"sport": self.sport}
+        if dates:
+            out["date"] = self.date
+        out.update({
+            "label": self.label,
+            "score": self.score,
+            "context": dict(self.context),
+            "flags": list(self.flags),
+            "reasons": list(self.reasons),
+            "tips": [tip._asdict() for tip in self.tips],
+            "condition_labels": {
+                "green": list(self.condition_labels.green),
+                "yellow": list(self.condition_labels.yellow),
+                "red": list(self.condition_labels.red),
+            },
+        })
+        return out
+
+
+def scores_to_json(scores: list[dict[str, Any]], *, dates: bool = True) -> list[dict[str, Any]]:
+    """
+    score_forecast() rows in their JSON shape (SportResult -> dict).
+    dates=False leaves out the per-row and per-result dates (time comes from the row index).
+    """
+    if not dates:
+        return [{"sports": {s: r.to_dict(False) for s, r in row["sports"].items()}} for row in scores]
+    return [
+        {"date": row["date"], "sports": {s: r.to_dict() for s, r in row["sports"].items()}}
+        for row in scores
+    ]
 
 
 def _clamp01(x: float) -> float:
@@ -102,6 +259,20 @@ def _label_from_score(score: float, thresholds: dict[str, float]) -> str:
     return "bad"
 
 
+def hard_limit_metric(limit_key: str) -> str:
+    """Metric a hard limit is checked against: a derived metric or, for any other key, an hour field"""
+    return _HARD_LIMIT_METRICS.get(limit_key, limit_key.replace("_m", ""))
+
+
+def scoring_fields(rules: dict[str, Any], sport_key: str) -> tuple[str, ...]:
+    """
+    Hour fields score_hour_for_sport reads for a sport: SCORING_FIELDS plus any field a hard
+    limit names directly (hot-loaded rulesets and profile overlays can limit on other variables)
+    """
+    extra = {hard_limit_metric(k) for k in rules["sports"][sport_key].get("hard_limits", {})}
+    return SCORING_FIELDS + tuple(sorted(extra - _DERIVED_METRICS - set(SCORING_FIELDS)))
+
+
 def _check_hard_limits(
     metrics: dict[str, float | None],
     hard_limits: dict[str, dict[str, float]],
@@ -115,15 +286,7 @@ def _check_hard_limits(
     reasons: list[str] = []
 
     for limit_key, limit_cfg in hard_limits.items():
-        # Map limit keys to metric keys
-        metric_key_map = {
-            "wave_height_m": "wave_height",
-            "wind_wave_height_m": "wind_wave_height",
-            "current_velocity_kmh": "ocean_current_velocity_kmh",
-        }
-        metric_key = metric_key_map.get(limit_key, limit_key.replace("_m", "").replace("_kmh", "_kmh"))
-        
-        value = metrics.get(metric_key)
+        value = metrics.get(hard_limit_metric(limit_key))
         if value is None:
             continue
 
@@ -139,9 +302,16 @@ def _check_hard_limits(
             elif "wind_wave_height" in limit_key:
                 flags.append("too_choppy")
                 reasons.append(f"Wind wave height {value:.2f}m exceeds limit {bad_from:.2f}m")
+            elif "gust" in limit_key:
+                flags.append("too_gusty")
+                reasons.append(f"Gusts {value:.0f} km/h exceed safety limit {bad_from:.0f} km/h")
             elif "current" in limit_key:
                 flags.append("current_too_strong")
                 reasons.append(f"Current {value:.2f} km/h exceeds safety limit {bad_from:.2f} km/h")
+            else:
+                # Limits on other variables (e.g. from a profile overlay) clamp the score too
+                flags.append("over_limit")
+                reasons.append(f"{hard_limit_metric(limit_key)} {value:g} exceeds limit {bad_from:g}")
 
     return flags, reasons
 
@@ -183,7 +353,11 @@ def _pick_reasons(
             reasons.append("Easy current")
 
     if sport in {"windsurfing", "kitesurfing"}:
-        if wwh is not None and wwh >= 0.35:
+        ws = metrics.get("wind_speed_kmh")
+        if ws is not None:
+            if ws >= 20:
+                reasons.append(f"Wind {ws:.0f} km/h")
+        elif wwh is not None and wwh >= 0.35:
             reasons.append("Wind-sea present (proxy)")
         if curr is not None and curr <= 3.0:
             reasons.append("Mild current")
@@ -198,10 +372,10 @@ def _generate_condition_labels(
     context: dict[str, float | None],
     label: str,
     flags: list[str],
-) -> dict[str, list[str]]:
+) -> "ConditionLabels":
     """
     Generate condition labels categorized by color (green, yellow, red).
-    Returns dict with keys 'green', 'yellow', 'red' and lists of snake_case label strings.
+    Returns ConditionLabels with green/yellow/red tuples of snake_case label strings.
     """
     green_labels: list[str] = []
     yellow_labels: list[str] = []
@@ -220,7 +394,8 @@ def _generate_condition_labels(
     wave_period = context.get("wave_period_s") or metrics.get("wave_period")
     wind_wave_height = context.get("wind_wave_height_m") or metrics.get("wind_wave_height")
     current_kmh = context.get("current_kmh") or metrics.get("ocean_current_velocity_kmh")
-    wind_speed = metrics.get("wind_speed_kmh")
+    wind_speed = context.get("wind_kmh") or metrics.get("wind_speed_kmh")
+    wind_gust = context.get("gust_kmh") or metrics.get("wind_gust_kmh")
     
     # Wave conditions (for wave sports)
     if sport_key in {"surfing", "sup_surf"}:
@@ -309,6 +484,9 @@ def _generate_condition_labels(
                     add_label(yellow_labels, "light_wind")
             elif wind_speed < 10:
                 add_label(red_labels, "no_wind")
+            # Gusts well above the mean wind make sessions hard to control
+            if wind_gust is not None and wind_speed >= 10 and wind_gust >= 1.5 * wind_speed:
+                add_label(yellow_labels, "gusty")
         elif wind_wave_height is not None:
             # Use wind_wave_height as proxy
             if wind_wave_height >= 0.4 and wind_wave_height <= 1.2:
@@ -335,11 +513,7 @@ def _generate_condition_labels(
             else:
                 add_label(yellow_labels, flag)
     
-    return {
-        "green": green_labels,
-        "yellow": yellow_labels,
-        "red": red_labels,
-    }
+    return _condition_labels(tuple(green_labels), tuple(yellow_labels), tuple(red_labels))
 
 
 def _generate_tips(
@@ -347,12 +521,12 @@ def _generate_tips(
     metrics: dict[str, float | None],
     context: dict[str, float | None],
     flags: list[str],
-) -> list[dict[str, str]]:
+) -> tuple["Tip", ...]:
     """
     Generate contextual tips based on conditions.
     Returns 0-3 tips max, only when they matter.
     """
-    tips: list[dict[str, str]] = []
+    tips: list[Tip] = []
     
     # Water temperature → wetsuit recommendation
     # Check both context and metrics (context might be filtered)
@@ -373,96 +547,41 @@ def _generate_tips(
     
     if water_temp is not None:
         if water_temp >= 24:
-            tips.append({
-                "id": "wetsuit_warm",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → rashguard / trunks",
-            })
+            tips.append(_tip("wetsuit_warm", "info", "wetsuit", f"Water {water_temp:.0f}°C → rashguard / trunks"))
         elif water_temp >= 21:
-            tips.append({
-                "id": "wetsuit_spring",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → spring suit / 2mm top",
-            })
+            tips.append(_tip("wetsuit_spring", "info", "wetsuit", f"Water {water_temp:.0f}°C → spring suit / 2mm top"))
         elif water_temp >= 18:
-            tips.append({
-                "id": "wetsuit_3_2",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → 3/2mm recommended",
-            })
+            tips.append(_tip("wetsuit_3_2", "info", "wetsuit", f"Water {water_temp:.0f}°C → 3/2mm recommended"))
         elif water_temp >= 16:
-            tips.append({
-                "id": "wetsuit_4_3",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → 4/3mm recommended",
-            })
+            tips.append(_tip("wetsuit_4_3", "info", "wetsuit", f"Water {water_temp:.0f}°C → 4/3mm recommended"))
         elif water_temp >= 13:
-            tips.append({
-                "id": "wetsuit_5_4",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → 5/4mm + boots",
-            })
+            tips.append(_tip("wetsuit_5_4", "info", "wetsuit", f"Water {water_temp:.0f}°C → 5/4mm + boots"))
         else:
-            tips.append({
-                "id": "wetsuit_6_5",
-                "severity": "info",
-                "icon": "wetsuit",
-                "text": f"Water {water_temp:.0f}°C → 6/5mm + hood",
-            })
+            tips.append(_tip("wetsuit_6_5", "info", "wetsuit", f"Water {water_temp:.0f}°C → 6/5mm + hood"))
     
     # UV index (if available in metrics)
     uv_index = metrics.get("uv_index")
     if uv_index is not None:
         if uv_index >= 8:
-            tips.append({
-                "id": "uv_high",
-                "severity": "warn",
-                "icon": "sun",
-                "text": "UV high → sunscreen + shade plan",
-            })
+            tips.append(_tip("uv_high", "warn", "sun", "UV high → sunscreen + shade plan"))
         elif uv_index >= 6:
-            tips.append({
-                "id": "uv_moderate",
-                "severity": "info",
-                "icon": "sun",
-                "text": "UV moderate-high → sunscreen recommended",
-            })
+            tips.append(_tip("uv_moderate", "info", "sun", "UV moderate-high → sunscreen recommended"))
     
     # Current warnings
     current_kmh = context.get("current_kmh") or metrics.get("ocean_current_velocity_kmh")
     if current_kmh is not None:
         if current_kmh >= 6:
-            tips.append({
-                "id": "current_strong",
-                "severity": "warn",
-                "icon": "warning",
-                "text": f"Strong current ({current_kmh:.1f} km/h) → avoid solo / stay near shore",
-            })
+            tips.append(_tip("current_strong", "warn", "warning", f"Strong current ({current_kmh:.1f} km/h) → avoid solo / stay near shore"))
         elif current_kmh >= 4:
-            tips.append({
-                "id": "current_moderate",
-                "severity": "warn",
-                "icon": "warning",
-                "text": f"Current {current_kmh:.1f} km/h → stay close to shore",
-            })
+            tips.append(_tip("current_moderate", "warn", "warning", f"Current {current_kmh:.1f} km/h → stay close to shore"))
     
     # Wind wave / chop warnings
     wind_wave_h = context.get("wind_wave_height_m") or metrics.get("wind_wave_height")
     if wind_wave_h is not None and wind_wave_h > 0.3:
-        tips.append({
-            "id": "chop_warning",
-            "severity": "info",
-            "icon": "waves",
-            "text": "Choppy conditions → larger board / beginner warning",
-        })
+        tips.append(_tip("chop_warning", "info", "waves", "Choppy conditions → larger board / beginner warning"))
     
     # Keep max 3 tips
-    return tips[:3]
+    return tuple(tips[:3])
 
 
 def score_hour_for_sport(
@@ -470,22 +589,31 @@ def score_hour_for_sport(
     *,
     sport_key: str,
     rules: dict[str, Any],
-) -> dict[str, Any]:
+    normalized: bool = False,
+) -> SportResult:
     """
-    hour: one element from to_hourly_json() list (keys like wave_height, wave_period, ...)
+    hour: one hour record, e.g. an HourlyFrame row (keys like date, wave_height, wave_period, ...)
     rules: WATER_SPORT_RULES dict
+    normalized: values are already float or None (HourlyFrame rows), so skip _safe_float
     """
     sport = rules["sports"][sport_key]
     thresholds = rules["scoring"]["output"]["label_thresholds"]
 
     # normalize metrics (also derive current km/h)
-    metrics: dict[str, float | None] = {}
-    for k, v in hour.items():
-        if k == "date":
-            continue
-        metrics[k] = _safe_float(v)
+    if normalized:
+        metrics: dict[str, float | None] = dict(hour)
+        metrics.pop("date", None)
+    else:
+        metrics = {}
+        for k, v in hour.items():
+            if k == "date":
+                continue
+            metrics[k] = _safe_float(v)
 
     metrics["ocean_current_velocity_kmh"] = _kmh_from_ms(metrics.get("ocean_current_velocity"))
+    # Weather API wind is already in km/h
+    metrics["wind_speed_kmh"] = metrics.get("wind_speed_10m")
+    metrics["wind_gust_kmh"] = metrics.get("wind_gusts_10m")
 
     # helper for swell share
     wave_h = metrics.get("wave_height")
@@ -596,29 +724,40 @@ def score_hour_for_sport(
         if calm_parts:
             subscores["calmness"] = sum(calm_parts) / len(calm_parts)
 
-    # Wind proxy for windsurf/kite
+    # Wind for windsurf/kite: real 10 m wind when present, else the wind-wave proxy
     if sport_key in {"windsurfing", "kitesurfing"}:
-        proxy_parts: list[float] = []
-        if "wind_wave_height_m" in th:
-            subs = _score_range(
-                metrics.get("wind_wave_height"),
-                min_v=th["wind_wave_height_m"].get("min"),
-                ideal=th["wind_wave_height_m"].get("ideal"),
-                max_v=th["wind_wave_height_m"].get("max"),
-            )
-            if subs is not None:
-                proxy_parts.append(subs)
-        if "wind_wave_period_s" in th:
+        wind_kmh = metrics.get("wind_speed_kmh")
+        if wind_kmh is not None and "wind_speed_kmh" in th:
             subs = _score_range(
-                metrics.get("wind_wave_period"),
-                min_v=th["wind_wave_period_s"].get("min"),
-                ideal=th["wind_wave_period_s"].get("ideal"),
-                max_v=th["wind_wave_period_s"].get("max"),
+                wind_kmh,
+                min_v=th["wind_speed_kmh"].get("min"),
+                ideal=th["wind_speed_kmh"].get("ideal"),
+                max_v=th["wind_speed_kmh"].get("max"),
             )
             if subs is not None:
-                proxy_parts.append(subs)
-        if proxy_parts:
-            subscores["wind_proxy"] = sum(proxy_parts) / len(proxy_parts)
+                subscores["wind"] = subs
+        else:
+            proxy_parts: list[float] = []
+            if "wind_wave_height_m" in th:
+                subs = _score_range(
+                    metrics.get("wind_wave_height"),
+                    min_v=th["wind_wave_height_m"].get("min"),
+                    ideal=th["wind_wave_height_m"].get("ideal"),
+                    max_v=th["wind_wave_height_m"].get("max"),
+                )
+                if subs is not None:
+                    proxy_parts.append(subs)
+            if "wind_wave_period_s" in th:
+                subs = _score_range(
+                    metrics.get("wind_wave_period"),
+                    min_v=th["wind_wave_period_s"].get("min"),
+                    ideal=th["wind_wave_period_s"].get("ideal"),
+                    max_v=th["wind_wave_period_s"].get("max"),
+                )
+                if subs is not None:
+                    proxy_parts.append(subs)
+            if proxy_parts:
+                subscores["wind_proxy"] = sum(proxy_parts) / len(proxy_parts)
 
         # sea_state: prefer not-too-crazy overall wave height
         if "wave_height_m" in th:
@@ -713,6 +852,10 @@ def score_hour_for_sport(
             context["current_kmh"] = metrics.get("ocean_current_velocity_kmh")
         elif field == "uv_index":
             context["uv_index"] = metrics.get("uv_index")
+        elif field == "wind_speed_10m":
+            context["wind_kmh"] = metrics.get("wind_speed_kmh")
+        elif field == "wind_gusts_10m":
+            context["gust_kmh"] = metrics.get("wind_gust_kmh")
 
     # Generate tips (pass full metrics so tips can access all data)
     tips = _generate_tips(sport_key, metrics, context, flags)
@@ -733,36 +876,107 @@ def score_hour_for_sport(
         print(f"  - metrics has sea_surface_temperature: {'sea_surface_temperature' in metrics}")
         print(f"  - metrics has uv_index: {'uv_index' in metrics}")
 
-    return {
-        "sport": sport_key,
-        "date": hour.get("date"),
-        "label": label,
-        "score": round(score, 3),
-        "context": {k: round(v, 2) if v is not None else None for k, v in context.items() if v is not None},
-        "flags": flags,
-        "reasons": reasons,
-        "tips": tips,
-        "condition_labels": condition_labels,
-    }
+    return SportResult(
+        sport_key,
+        hour.get("date"),
+        label,
+        round(score, 3),
+        tuple((k, round(v, 2)) for k, v in context.items() if v is not None),
+        tuple(flags),
+        tuple(reasons),
+        tips,
+        condition_labels,
+    )
+
+
+class ScoreMemo:
+    """
+    Bounded LRU memo in front of score_hour_for_sport.
+    Keyed on the quantized scoring_fields of an hour (what the ruleset reads for the sport)
+    plus sport and ruleset version, so identical sea states across hours, days and spots are
+    scored once.
+    quantum should match the precision upstream reports (0.01 for Open-Meteo marine data);
+    at that precision cached results are identical to the uncached path.
+    """
+
+    def __init__(self, max_entries: int = 10000, quantum: float = 0.01):
+        self.max_entries = max_entries
+        self.quantum = quantum
+        self._entries: OrderedDict[tuple, SportResult] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fields: dict[tuple[str, str], tuple[str, ...]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, hour: dict[str, Any], sport_key: str, rules: dict[str, Any], normalized: bool) -> tuple:
+        version = ruleset_version(rules)
+        fields = self._fields.get((version, sport_key))
+        if fields is None:
+            if len(self._fields) >= _RULESET_VERSIONS_MAX:
+                self._fields.clear()
+            fields = self._fields[(version, sport_key)] = scoring_fields(rules, sport_key)
+        q = self.quantum
+        values = []
+        for field in fields:
+            v = hour.get(field) if normalized else _safe_float(hour.get(field))
+            values.append(None if v is None else round(v / q))
+        return (sport_key, version, *values)
+
+    def score_hour(
+        self, hour: dict[str, Any], *, sport_key: str, rules: dict[str, Any], normalized: bool = False,
+    ) -> SportResult:
+        key = self._key(hour, sport_key, rules, normalized)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if cached is not None:
+            return cached.with_date(hour.get("date"))
+
+        result = score_hour_for_sport(hour, sport_key=sport_key, rules=rules, normalized=normalized)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
 
 
 def score_forecast(
-    hourly_records: list[dict[str, Any]],
+    hourly_records: HourlyFrame | list[dict[str, Any]],
     *,
     rules: dict[str, Any],
     sports: Iterable[str] | None = None,
+    memo: ScoreMemo | None = None,
 ) -> list[dict[str, Any]]:
     sports_list = list(sports) if sports is not None else [
         k for k, v in rules["sports"].items() if v.get("enabled", True)
     ]
 
+    score_hour = memo.score_hour if memo is not None else score_hour_for_sport
+    normalized = isinstance(hourly_records, HourlyFrame)
+
     out: list[dict[str, Any]] = []
     for hour in hourly_records:
         # Each sport result now includes date, so we can return flat list or grouped
         # Returning grouped by date for easier consumption
         row = {
             "date": hour.get("date"),
-            "sports": {s: score_hour_for_sport(hour, sport_key=s, rules=rules) for s in sports_list},
+            "sports": {s: score_hour(hour, sport_key=s, rules=rules, normalized=normalized) for s in sports_list},
         }
         out.append(row)
     return out
@@ -0,0 +1,134 @@
+"""
+Stale-while-revalidate cache for upstream forecast data.
+
+Entries younger than fresh_seconds are served as-is. Up to stale_seconds past that they
+are still served immediately while a single background refresh runs for the key. Older
+entries (or misses) are loaded inline, and concurrent callers for the same key share one
+load. Expired entries are kept until evicted so callers can fall back to them when the
+upstream is unavailable (see peek()). A background refresh outlives the request that
+triggered it, so refresh_kwargs can replace per-request loader arguments such as its deadline.
+A caller that joins another caller's inline load waits at most until its own `deadline` loader
+argument (if any) runs out, then gets DeadlineExceeded.
+
+On Lambda the background refresh runs while the container is warm; a frozen container
+finishes it on the next invocation.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+class Cached(NamedTuple):
+    value: Any
+    age_seconds: float
+    state: str  # "fresh", "stale" or "miss"
+
+
+class SWRCache:
+    def __init__(
+        self,
+        loader: Callable[..., Any],
+        *,
+        refresh_kwargs: Callable[[dict], dict] | None = None,
+        fresh_seconds: float = 3600,
+        stale_seconds: float = 3 * 3600,
+        max_entries: int = 512,
+        refresh_workers: int = 2,
+    ):
+        self.loader = loader
+        # Maps a caller's loader kwargs to a background refresh's (e.g. a fresh deadline instead of
+        # the caller's, which has usually run out by the time the refresh runs)
+        self.refresh_kwargs = refresh_kwargs
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="swr-refresh")
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0}
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def _load(self, key: Hashable, args: tuple, kwargs: dict) -> Any:
+        try:
+            value = self.loader(*args, **kwargs)
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, key: Hashable, args: tuple, kwargs: dict) -> Any:
+        try:
+            if self.refresh_kwargs is not None:
+                kwargs = self.refresh_kwargs(kwargs)
+            value = self._load(key, args, kwargs)
+            self.stats["refreshes"] += 1
+            return value
+        except Exception as e:
+            # Keep serving the stale entry; the next stale hit retries
+            self.stats["refresh_errors"] += 1
+            print(f"Warning: background refresh failed for {key}: {e}")
+            raise
+
+    def get(self, key: Hashable, *args, **kwargs) -> Cached:
+        """Value for key, loading it with loader(*args, **kwargs) when missing or too old"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            age = now - entry[0] if entry is not None else None
+
+            if age is not None and age <= self.fresh_seconds:
+                self.stats["fresh"] += 1
+                return Cached(entry[1], age, "fresh")
+            if age is not None and age <= self.fresh_seconds + self.stale_seconds:
+                self.stats["stale"] += 1
+                if key not in self._inflight:
+                    self._inflight[key] = self._executor.submit(self._refresh, key, args, kwargs)
+                return Cached(entry[1], age, "stale")
+
+            self.stats["miss"] += 1
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            # Someone else is already loading this key; share their result, within our own budget
+            deadline = kwargs.get("deadline")
+            value = future.result() if deadline is None else deadline.wait(future)
+            return Cached(value, 0.0, "miss")
+        try:
+            value = self._load(key, args, kwargs)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return Cached(value, 0.0, "miss")
+
+    def mark_stale(self, key: Hashable) -> None:
+        """Make the entry stale now so the next get() serves it and refreshes in the background"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (min(entry[0], time.time() - self.fresh_seconds - 1e-3), entry[1])
+
+    def peek(self, key: Hashable) -> Cached | None:
+        """Cached value regardless of age (e.g. to fall back on when upstream is down)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return Cached(entry[1], time.time() - entry[0], "expired")
@@ -0,0 +1,289 @@
+"""
+Circuit breaking and hedged requests for Open-Meteo calls.
+
+UpstreamClient wraps openmeteo_requests.Client with the same weather_api() signature.
+Per host (marine and weather APIs are separate hosts):
+
+- A CircuitBreaker opens after `failure_threshold` consecutive failed calls. While open,
+  calls fail immediately with UpstreamUnavailable instead of waiting on retries, so callers
+  can fall back to cached data. After `reset_seconds` one probe call is let through; its
+  outcome closes or re-opens the circuit. Only 5xx responses, timeouts and connection errors
+  count as failures (see is_upstream_failure); a 4xx is the request's fault and shows the
+  host is answering. A 429 is a back-off signal: the circuit opens at once for the reply's
+  Retry-After (else `reset_seconds`). openmeteo_requests raises 429s with only the JSON body,
+  so sessions need the raise_rate_limited response hook for the status to be seen.
+- Once `hedge_min_samples` latencies are known, a call still running after the
+  `hedge_percentile` latency (never less than `hedge_min_seconds`) gets one duplicate; the
+  first successful response wins. The duplicate is a single attempt (`hedge_client`, without
+  the primary's retries), and hedges are capped at `max_hedge_ratio` of all calls so a slow
+  upstream never sees double load.
+
+stats() reports breaker state and call/hedge counters per host; on_call(host, seconds, ok) is
+called after every call that went upstream (e.g. to feed a latency histogram).
+"""
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+
+class UpstreamUnavailable(RuntimeError):
+    """Raised without calling upstream while its circuit is open"""
+
+
+def raise_rate_limited(response: Any, *args, **kwargs) -> None:
+    """requests response hook: raise a 429 with its response attached (see rate_limit_seconds)"""
+    if response.status_code == 429:
+        import requests
+
+        raise requests.HTTPError(f"429 Too Many Requests for {response.url}", response=response)
+
+
+def _chain(exc: BaseException):
+    seen: BaseException | None = exc
+    while seen is not None:
+        yield seen
+        seen = seen.__cause__ or seen.__context__
+
+
+def rate_limit_seconds(exc: BaseException, default: float) -> float | None:
+    """Seconds to back off if the call was rate limited (429), from Retry-After or default; else None"""
+    for seen in _chain(exc):
+        response = getattr(seen, "response", None)
+        if getattr(response, "status_code", None) != 429:
+            continue
+        value = (getattr(response, "headers", None) or {}).get("Retry-After")
+        if value is None:
+            return default
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+    return None
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Whether a failed call counts against the host: a 5xx status, a timeout or a connection
+    error. openmeteo_requests re-raises every error as OpenMeteoRequestsError with the original
+    as its cause, so the whole chain is checked.
+    """
+    for seen in _chain(exc):
+        status = getattr(getattr(seen, "response", None), "status_code", None)
+        if status is not None:
+            return status >= 500
+        # Timeouts, refused / reset connections and exhausted 5xx retries (requests' exceptions
+        # are OSErrors too)
+        if isinstance(seen, OSError):
+            return True
+    # e.g. Open-Meteo's 400 replies, raised with the JSON error body
+    return False
+
+
+class CircuitBreaker:
+    def __init__(self, *, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"  # "closed", "open" or "half_open"
+        self.failures = 0
+        self.opens = 0
+        self._opened_at = 0.0
+        self.open_seconds = reset_seconds
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (half-open lets exactly one probe through)"""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self._open(self.reset_seconds)
+
+    def back_off(self, seconds: float) -> None:
+        """Open now for `seconds` (the host asked us to slow down), whatever the failure count"""
+        with self._lock:
+            self._open(seconds)
+
+    def _open(self, seconds: float) -> None:
+        if self.state != "open":
+            self.opens += 1
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self.open_seconds = seconds
+
+
+class _HostState:
+    def __init__(self, breaker: CircuitBreaker, window: int):
+        self.breaker = breaker
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.counters = {
+            "calls": 0, "failures": 0, "client_errors": 0, "rate_limited": 0, "short_circuited": 0,
+            "hedged": 0, "hedge_wins": 0,
+        }
+        # Calls (and their hedges) update the counters from several threads
+        self._lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def snapshot(self) -> tuple[dict[str, int], list[float]]:
+        """(counters, sorted latencies), consistent with each other"""
+        with self._lock:
+            return dict(self.counters), sorted(self.latencies)
+
+
+def _percentile(ordered: list[float], p: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100.0))]
+
+
+class UpstreamClient:
+    def __init__(
+        self,
+        client: Any,
+        *,
+        hedge_client: Any | None = None,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        hedge_percentile: float = 95.0,
+        hedge_min_seconds: float = 0.25,
+        hedge_min_samples: int = 20,
+        max_hedge_ratio: float = 0.1,
+        latency_window: int = 200,
+        max_workers: int = 8,
+        on_call: Callable[[str, float, bool], None] | None = None,
+    ):
+        self.client = client
+        # Makes a single attempt (no retry adapter); the default duplicates client's retries too
+        self.hedge_client = hedge_client if hedge_client is not None else client
+        self.on_call = on_call
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        # hedge_percentile <= 0 disables hedging
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_seconds = hedge_min_seconds
+        self.hedge_min_samples = hedge_min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.latency_window = latency_window
+        self._hosts: dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upstream-hedge")
+
+    def _host(self, url: str) -> tuple[str, _HostState]:
+        host = urlparse(url).netloc or url
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                breaker = CircuitBreaker(failure_threshold=self.failure_threshold, reset_seconds=self.reset_seconds)
+                state = self._hosts[host] = _HostState(breaker, self.latency_window)
+        return host, state
+
+    def _hedge_delay(self, state: _HostState) -> float | None:
+        if self.hedge_percentile <= 0:
+            return None
+        c, latencies = state.snapshot()
+        if len(latencies) < self.hedge_min_samples or c["hedged"] >= self.max_hedge_ratio * max(c["calls"], 1):
+            return None
+        return max(self.hedge_min_seconds, _percentile(latencies, self.hedge_percentile))
+
+    def _hedged(self, state: _HostState, call: Callable[[], Any], hedge: Callable[[], Any], delay: float) -> Any:
+        primary = self._executor.submit(call)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        state.count("hedged")
+        backup = self._executor.submit(hedge)
+        pending = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    if f is backup:
+                        state.count("hedge_wins")
+                    return f.result()
+        # Both failed; surface the primary's error
+        return primary.result()
+
+    def weather_api(self, url: str, params: dict, **kwargs) -> list:
+        """openmeteo_requests.Client.weather_api behind the host's breaker, hedged when slow"""
+        host, state = self._host(url)
+        if not state.breaker.allow():
+            state.count("short_circuited")
+            raise UpstreamUnavailable(f"Circuit open for {host}; retrying in up to {state.breaker.open_seconds:g}s")
+
+        def call() -> list:
+            return self.client.weather_api(url, params=params, **kwargs)
+
+        def hedge() -> list:
+            return self.hedge_client.weather_api(url, params=params, **kwargs)
+
+        state.count("calls")
+        delay = self._hedge_delay(state)
+        start = time.perf_counter()
+        try:
+            result = call() if delay is None else self._hedged(state, call, hedge, delay)
+        except Exception as e:
+            back_off = rate_limit_seconds(e, self.reset_seconds)
+            if back_off is not None:
+                state.count("rate_limited")
+                state.breaker.back_off(back_off)
+            elif is_upstream_failure(e):
+                state.count("failures")
+                state.breaker.record_failure()
+            else:
+                # The host answered; the request itself was rejected
+                state.count("client_errors")
+                state.breaker.record_success()
+            if self.on_call is not None:
+                self.on_call(host, time.perf_counter() - start, False)
+            raise
+        elapsed = time.perf_counter() - start
+        state.record_latency(elapsed)
+        state.breaker.record_success()
+        if self.on_call is not None:
+            self.on_call(host, elapsed, True)
+        return result
+
+    def stats(self) -> dict[str, dict]:
+        out = {}
+        with self._lock:
+            hosts = list(self._hosts.items())
+        for host, state in hosts:
+            c, latencies = state.snapshot()
+            p50 = _percentile(latencies, 50)
+            p95 = _percentile(latencies, 95)
+            out[host] = {
+                "breaker": state.breaker.state,
+                "breaker_opens": state.breaker.opens,
+                **c,
+                "hedge_rate": round(c["hedged"] / c["calls"], 4) if c["calls"] else 0.0,
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        return out
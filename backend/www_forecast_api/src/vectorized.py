@@ -0,0 +1,350 @@
+"""
+Vectorized equivalent of the numeric part of score_hour_for_sport.
+
+score_columns() takes one numpy array per hourly variable (any shape, typically
+cells x hours) and returns the sport score for every element in one pass. Missing
+values are NaN. It mirrors score_hour_for_sport exactly for the score itself (hard-limit
+clamp included) but does not build labels, tips, reasons or context.
+
+Scores are computed in float64 by default or, opt-in for large region grids and archives, in
+float32 (the dtype Open-Meteo delivers). Thresholds are compared exactly in both modes, so float32
+only adds rounding error to the arithmetic: every score stays within FLOAT32_TOLERANCE of the float64
+score, which after rounding is at most one unit in the last place (0.001 for API scores, one
+uint8 step for region grids). The per-hour path (score_hour_for_sport: /api/forecast,
+best-spots, batch) always scores in Python floats; the dtype applies to this scorer only.
+
+    python vectorized.py parity [archive .npz files...]   # float32 vs float64 check
+"""
+from typing import Any
+
+import numpy as np
+
+from scoring import hard_limit_metric
+
+_EPS = 1e-9
+NUMERIC_DTYPES = {"float32": np.float32, "float64": np.float64}
+# Max |float32 - float64| score difference (observed ~2e-7)
+FLOAT32_TOLERANCE = 1e-6
+
+
+def _bound(t: float, dtype: np.dtype, *, up: bool) -> Any:
+    """
+    Threshold t in dtype, rounded up (or down) instead of to nearest, so comparing values of
+    that dtype against it decides exactly what comparing them against t in float64 does
+    """
+    b = dtype.type(t)
+    if up and float(b) < t:
+        b = np.nextafter(b, dtype.type(np.inf))
+    elif not up and float(b) > t:
+        b = np.nextafter(b, dtype.type(-np.inf))
+    return b
+
+
+def _ge(v: np.ndarray, t: float) -> np.ndarray:
+    return v >= _bound(t, v.dtype, up=True)
+
+
+def _gt(v: np.ndarray, t: float) -> np.ndarray:
+    return v > _bound(t, v.dtype, up=False)
+
+
+def _le(v: np.ndarray, t: float) -> np.ndarray:
+    return v <= _bound(t, v.dtype, up=False)
+
+
+def _lt(v: np.ndarray, t: float) -> np.ndarray:
+    return v < _bound(t, v.dtype, up=True)
+
+
+def _clamp01(x: np.ndarray) -> np.ndarray:
+    return np.where(x <= 0, 0.0, np.where(x >= 1, 1.0, x))
+
+
+def _score_range(
+    v: np.ndarray,
+    *,
+    min_v: float | None = None,
+    ideal: tuple[float, float] | None = None,
+    max_v: float | None = None,
+    great_max: float | None = None,
+    ok_max: float | None = None,
+    ideal_max: float | None = None,
+    bad_from: float | None = None,
+    bad_max: float | None = None,
+) -> np.ndarray | None:
+    """Array version of scoring._score_range; NaN where the scalar version returns None"""
+    out = np.full(v.shape, np.nan, dtype=v.dtype)
+    decided = np.isnan(v)
+
+    def take(mask: np.ndarray, values: np.ndarray | float) -> None:
+        nonlocal decided
+        mask = mask & ~decided
+        out[mask] = values[mask] if isinstance(values, np.ndarray) else values
+        decided = decided | mask
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if bad_from is not None:
+            take(_ge(v, bad_from), 0.0)
+        if bad_max is not None:
+            take(_gt(v, bad_max), 0.0)
+        if min_v is not None:
+            take(_lt(v, min_v), _clamp01(v / min_v))
+
+        if great_max is not None and ok_max is not None:
+            end = bad_from if bad_from is not None else (2.0 * ok_max)
+            take(_le(v, great_max), 1.0)
+            take(_le(v, ok_max), 1.0 - 0.4 * ((v - great_max) / max(ok_max - great_max, _EPS)))
+            take(~decided, _clamp01(0.6 * (1.0 - ((v - ok_max) / max(end - ok_max, _EPS)))))
+        elif ideal_max is not None:
+            end = bad_from if bad_from is not None else (2.0 * ideal_max)
+            take(_le(v, ideal_max), 1.0)
+            take(~decided, _clamp01(1.0 - ((v - ideal_max) / max(end - ideal_max, _EPS))))
+        elif ideal and max_v is not None:
+            lo, hi = ideal
+            left = min_v if min_v is not None else lo * 0.5
+            take(_le(v, lo), _clamp01((v - left) / max(lo - left, _EPS)))
+            take(_le(v, hi), 1.0)
+            take(~decided, _clamp01(1.0 - ((v - hi) / max(max_v - hi, _EPS))))
+        elif max_v is not None:
+            take(~decided, _clamp01(1.0 - (np.maximum(0.0, v - max_v) / max(max_v, _EPS))))
+    return out
+
+
+def _mean_parts(parts: list[np.ndarray]) -> np.ndarray | None:
+    """Per-element mean of the parts that are present (NaN if none are)"""
+    if not parts:
+        return None
+    stack = np.stack(parts)
+    count = np.sum(~np.isnan(stack), axis=0, dtype=stack.dtype)
+    with np.errstate(invalid="ignore"):
+        return np.where(count > 0, np.nansum(stack, axis=0) / np.maximum(count, 1), np.nan)
+
+
+def _metric_arrays(columns: dict[str, np.ndarray], shape: tuple[int, ...], dtype: type) -> dict[str, np.ndarray]:
+    metrics: dict[str, np.ndarray] = {}
+    for k, v in columns.items():
+        arr = np.asarray(v, dtype=dtype)
+        metrics[k] = np.where(np.isfinite(arr), arr, np.nan)
+
+    def get(name: str) -> np.ndarray:
+        return metrics.get(name, np.full(shape, np.nan, dtype=dtype))
+
+    metrics["ocean_current_velocity_kmh"] = get("ocean_current_velocity") * 3.6
+    metrics["wind_speed_kmh"] = get("wind_speed_10m")
+    metrics["wind_gust_kmh"] = get("wind_gusts_10m")
+    wave_h = get("wave_height")
+    swell_h = get("swell_wave_height")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics["swell_share"] = np.where(wave_h > 0, swell_h / np.maximum(wave_h, 1e-6), np.nan)
+    return metrics
+
+
+def score_columns(
+    columns: dict[str, np.ndarray],
+    *,
+    sport_key: str,
+    rules: dict[str, Any],
+    dtype: type = np.float64,
+) -> np.ndarray:
+    """
+    Score every element of the hourly columns for one sport (same shape as the inputs).
+    Computes in dtype: float64 by default, float32 (see FLOAT32_TOLERANCE) halves the memory
+    of the inputs' working copies and every intermediate array.
+    """
+    shape = np.shape(next(iter(columns.values())))
+    metrics = _metric_arrays(columns, shape, dtype)
+    nan = np.full(shape, np.nan, dtype=dtype)
+
+    def m(name: str) -> np.ndarray:
+        return metrics.get(name, nan)
+
+    sport = rules["sports"][sport_key]
+    th = sport.get("thresholds", {})
+    subscores: dict[str, np.ndarray] = {}
+
+    if "wave_height_m" in th:
+        t = th["wave_height_m"]
+        subscores["wave_height"] = _score_range(
+            m("wave_height"), min_v=t.get("min"), ideal=t.get("ideal"), max_v=t.get("max"),
+            great_max=t.get("great_max"), ok_max=t.get("ok_max"), bad_from=t.get("bad_from"),
+        )
+    if "wave_period_s" in th:
+        t = th["wave_period_s"]
+        subscores["wave_period"] = _score_range(
+            m("wave_period"), min_v=t.get("min"), ideal=t.get("ideal"), max_v=t.get("max"),
+        )
+
+    chop_parts: list[np.ndarray] = []
+    if "wind_wave_height_m" in th:
+        t = th["wind_wave_height_m"]
+        chop_parts.append(_score_range(
+            m("wind_wave_height"), ideal_max=t.get("ideal_max"), great_max=t.get("great_max"),
+            ok_max=t.get("ok_max"), bad_from=t.get("bad_from"),
+        ))
+    if "wind_wave_period_s" in th:
+        t = th["wind_wave_period_s"]
+        chop_parts.append(_score_range(
+            m("wind_wave_period"), bad_max=t.get("bad_max"), min_v=t.get("min"),
+            ideal=t.get("ideal"), max_v=t.get("max"),
+        ))
+    if "swell_share" in th:
+        ss = m("swell_share")
+        good_from = th["swell_share"].get("good_from", 0.6)
+        great_from = th["swell_share"].get("great_from", 0.75)
+        with np.errstate(invalid="ignore"):
+            part = np.where(
+                _ge(ss, great_from), 1.0,
+                np.where(_ge(ss, good_from),
+                         0.7 + 0.3 * ((ss - good_from) / max(great_from - good_from, _EPS)),
+                         _clamp01(ss / max(good_from, _EPS))))
+        chop_parts.append(np.where(np.isnan(ss), np.nan, part))
+    cleanliness = _mean_parts(chop_parts)
+    if cleanliness is not None:
+        subscores["cleanliness"] = cleanliness
+
+    if sport_key == "sup":
+        calm_parts: list[np.ndarray] = []
+        if "wave_height_m" in th:
+            t = th["wave_height_m"]
+            calm_parts.append(_score_range(
+                m("wave_height"), great_max=t.get("great_max"), ok_max=t.get("ok_max"), bad_from=t.get("bad_from"),
+            ))
+        if "wind_wave_height_m" in th:
+            t = th["wind_wave_height_m"]
+            calm_parts.append(_score_range(
+                m("wind_wave_height"), great_max=t.get("great_max"), ok_max=t.get("ok_max"), bad_from=t.get("bad_from"),
+            ))
+        if "wind_wave_period_s" in th:
+            calm_parts.append(_score_range(m("wind_wave_period"), bad_max=th["wind_wave_period_s"].get("bad_max")))
+        calmness = _mean_parts(calm_parts)
+        if calmness is not None:
+            subscores["calmness"] = calmness
+
+    if sport_key in {"windsurfing", "kitesurfing"}:
+        # Real wind where present; the wind-wave proxy only fills hours without wind
+        wind_kmh = m("wind_speed_kmh")
+        has_wind = ~np.isnan(wind_kmh) if "wind_speed_kmh" in th else np.zeros(shape, dtype=bool)
+        if "wind_speed_kmh" in th:
+            t = th["wind_speed_kmh"]
+            subscores["wind"] = _score_range(wind_kmh, min_v=t.get("min"), ideal=t.get("ideal"), max_v=t.get("max"))
+        proxy_parts: list[np.ndarray] = []
+        if "wind_wave_height_m" in th:
+            t = th["wind_wave_height_m"]
+            proxy_parts.append(_score_range(
+                m("wind_wave_height"), min_v=t.get("min"), ideal=t.get("ideal"), max_v=t.get("max"),
+            ))
+        if "wind_wave_period_s" in th:
+            t = th["wind_wave_period_s"]
+            proxy_parts.append(_score_range(
+                m("wind_wave_period"), min_v=t.get("min"), ideal=t.get("ideal"), max_v=t.get("max"),
+            ))
+        wind_proxy = _mean_parts(proxy_parts)
+        if wind_proxy is not None:
+            subscores["wind_proxy"] = np.where(has_wind, np.nan, wind_proxy)
+        if "wave_height_m" in th:
+            t = th["wave_height_m"]
+            subscores["sea_state"] = _score_range(
+                m("wave_height"), great_max=None, ok_max=t.get("ok_max"), bad_from=t.get("bad_from"),
+            )
+
+    curr_th = th.get("current_velocity_kmh")
+    cv = m("ocean_current_velocity_kmh")
+    if curr_th:
+        warn_from = curr_th.get("warn_from", 3.0)
+        bad_from = curr_th.get("bad_from", 6.0)
+        with np.errstate(invalid="ignore"):
+            current = np.where(
+                _le(cv, warn_from), 1.0,
+                np.where(_ge(cv, bad_from), 0.0,
+                         _clamp01(1.0 - ((cv - warn_from) / max(bad_from - warn_from, _EPS)))))
+        subscores["current"] = np.where(np.isnan(cv), np.nan, current)
+
+    # Weighted aggregation over the subscores present at each element
+    num = np.zeros(shape, dtype=dtype)
+    den = np.zeros(shape, dtype=dtype)
+    for k, w in sport.get("weights", {}).items():
+        sub = subscores.get(k)
+        if sub is None:
+            continue
+        present = ~np.isnan(sub)
+        num += np.where(present, sub, 0.0) * float(w)
+        den += np.where(present, float(w), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.where(den > 0, num / np.where(den > 0, den, 1.0), 0.0)
+
+    penalty_cfg = rules["scoring"].get("penalties", {}).get("current_velocity_kmh", {})
+    if penalty_cfg:
+        warn = penalty_cfg.get("warn_from", 3.0)
+        hard = penalty_cfg.get("hard_from", 6.0)
+        with np.errstate(invalid="ignore"):
+            factor = np.where(
+                _ge(cv, hard), 0.6,
+                np.where(_ge(cv, warn), 1.0 - 0.15 * ((cv - warn) / max(hard - warn, _EPS)), 1.0))
+        score = score * np.where(np.isnan(cv), 1.0, factor)
+    score = _clamp01(score)
+
+    # Hard limits clamp the score when violated (any key, like _check_hard_limits)
+    violated = np.zeros(shape, dtype=bool)
+    for limit_key, limit_cfg in sport.get("hard_limits", {}).items():
+        bad_from = limit_cfg.get("bad_from")
+        if bad_from is None:
+            continue
+        value = m(hard_limit_metric(limit_key))
+        with np.errstate(invalid="ignore"):
+            violated |= _ge(value, bad_from)
+    return np.where(violated, np.minimum(score, 0.2), score)
+
+
+def float32_parity(columns: dict[str, np.ndarray], rules: dict[str, Any]) -> dict[str, float]:
+    """Largest |float32 - float64| score difference per enabled sport"""
+    worst = {}
+    for sport_key, sport in rules["sports"].items():
+        if not sport.get("enabled", True):
+            continue
+        exact = score_columns(columns, sport_key=sport_key, rules=rules)
+        fast = score_columns(columns, sport_key=sport_key, rules=rules, dtype=np.float32)
+        diff = np.abs(exact - fast)
+        worst[sport_key] = float(np.nanmax(diff)) if diff.size else 0.0
+    return worst
+
+
+def _sample_columns(hours: int, seed: int = 0) -> dict[str, np.ndarray]:
+    """Random hours on Open-Meteo's 0.01 grid (so inputs often sit exactly on thresholds), 5% missing"""
+    scale = {
+        "wave_height": 5, "wave_period": 20, "wind_wave_height": 2, "wind_wave_period": 8,
+        "swell_wave_height": 4, "ocean_current_velocity": 3, "sea_surface_temperature": 30,
+        "uv_index": 10, "wind_speed_10m": 50, "wind_gusts_10m": 70,
+    }
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, s in scale.items():
+        values = np.round(rng.random(hours) * s, 2).astype(np.float32)
+        values[rng.random(hours) < 0.05] = np.nan
+        columns[name] = values
+    return columns
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "parity":
+        print("usage: python vectorized.py parity [archive .npz files...]")
+        sys.exit(2)
+    from forecast_api import ForecastAPI
+    from ruleset import compile_ruleset
+
+    if sys.argv[2:]:
+        parts = [np.load(path) for path in sys.argv[2:]]
+        # Variables present in every file (the fetched set follows the ruleset)
+        names = sorted(set.intersection(*({k for k in p.files if k.startswith("col.")} for p in parts)))
+        sample = {n[4:]: np.concatenate([p[n] for p in parts]) for n in names}
+    else:
+        sample = _sample_columns(200_000)
+    result = float32_parity(sample, compile_ruleset(ForecastAPI.CONDITION_RULESET))
+    hours = len(next(iter(sample.values())))
+    for sport_key, diff in result.items():
+        print(f"{sport_key:12s} max |float32 - float64| = {diff:.2e} over {hours} hours")
+    if max(result.values()) > FLOAT32_TOLERANCE:
+        print(f"FAIL: above tolerance {FLOAT32_TOLERANCE:g}")
+        sys.exit(1)
+    print(f"OK: within tolerance {FLOAT32_TOLERANCE:g}")
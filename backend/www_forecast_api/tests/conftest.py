@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The API modules import each other as top-level modules from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from forecast_api import ForecastAPI  # noqa: E402
+from hourly import HourlyFrame  # noqa: E402
+from ruleset import compile_ruleset  # noqa: E402
+from scoring import SCORING_FIELDS  # noqa: E402
+
+START = 1760000000 // 3600 * 3600
+# Largest generated value per variable (others 0..3)
+SCALES = {"wind_speed_10m": 40, "wind_gusts_10m": 60, "sea_surface_temperature": 30, "uv_index": 10}
+
+
+def _make_frame(
+    fields: tuple[str, ...] = SCORING_FIELDS,
+    *,
+    hours: int = 500,
+    seed: int = 0,
+    states: int | None = None,
+    missing: float = 0.1,
+) -> HourlyFrame:
+    """
+    Upstream-like float32 columns at 0.01 precision with a `missing` share of gaps. With `states`,
+    hours are drawn from that many sea states, so identical hours repeat (as in real forecasts).
+    """
+    rng = np.random.default_rng(seed)
+    n = states or hours
+    pick = rng.integers(0, n, hours) if states else slice(None)
+    columns = {}
+    for field in fields:
+        values = np.round(rng.random(n) * SCALES.get(field, 3), 2).astype(np.float32)
+        values[rng.random(n) < missing] = np.nan
+        columns[field] = values[pick]
+    return HourlyFrame(columns, (START, 3600, hours))
+
+
+@pytest.fixture(scope="session")
+def rules():
+    return compile_ruleset(ForecastAPI.CONDITION_RULESET)
+
+
+@pytest.fixture(scope="session")
+def make_frame():
+    """Synthetic HourlyFrame factory (see _make_frame)"""
+    return _make_frame
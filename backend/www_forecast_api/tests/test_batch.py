@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+import batch
+from forecast_api import ForecastAPI
+
+HOURS = 24
+MARINE = ("wave_height", "wave_period", "wind_wave_height", "wind_wave_period", "swell_wave_height",
+          "ocean_current_velocity", "sea_surface_temperature")
+WEATHER = ("wind_speed_10m", "wind_gusts_10m", "uv_index")
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch, make_frame):
+    """ForecastAPI without disk state, serving generated frames; weather fails for `failing` latitudes"""
+    monkeypatch.chdir(tmp_path)
+    for name, value in {"FORECAST_STORE_RUNS": "0", "ARCHIVE_DIR": "off", "SHARED_SCORE_SLOTS": "0"}.items():
+        monkeypatch.setenv(name, value)
+    api = ForecastAPI()
+    api.failing = set()
+
+    def frame(location: tuple[float, float], names: tuple[str, ...]):
+        return make_frame(names, hours=HOURS, seed=int(location[0] * 100), missing=0.0)
+
+    def get_weather_forecasts(locations, *, variables=None, deadline=None):
+        if any(lat in api.failing for lat, _ in locations):
+            raise RuntimeError("weather API down")
+        return [frame(loc, WEATHER) for loc in locations]
+
+    api.get_forecasts = lambda locations, *, variables=None, deadline=None: [frame(loc, MARINE) for loc in locations]
+    api.get_weather_forecasts = get_weather_forecasts
+    api.parse_api_response = api.parse_weather_response = lambda f: f
+    return api
+
+
+def spots(n: int) -> list[dict]:
+    return [{"id": f"s{i}", "latitude": 30.0 + i, "longitude": 34.0, "_index": i} for i in range(n)]
+
+
+def run(api, tmp_path, writer_cls, output, *, resume=False):
+    checkpoint = batch.Checkpoint(str(tmp_path / "run.checkpoint"), resume=resume)
+    writer = writer_cls(str(tmp_path / output), api.rulesets.current().version, checkpoint)
+    try:
+        return batch.run_batch(api, spots(6), writer, checkpoint, chunk_size=2, concurrency=2)
+    finally:
+        writer.close()
+        checkpoint.close()
+
+
+def test_weather_failure_leaves_chunk_for_resume(api, tmp_path):
+    api.failing = {32.0}
+    stats = run(api, tmp_path, batch.NdjsonWriter, "scores.ndjson")
+    assert (stats["written"], stats["failed"]) == (4, 2)
+    lines = (tmp_path / "scores.ndjson").read_text().splitlines()
+    assert sorted(json.loads(line)["spot"]["id"] for line in lines) == ["s0", "s1", "s4", "s5"]
+
+    api.failing = set()
+    stats = run(api, tmp_path, batch.NdjsonWriter, "scores.ndjson", resume=True)
+    assert (stats["already_done"], stats["written"], stats["failed"]) == (4, 2, 0)
+    records = [json.loads(line) for line in (tmp_path / "scores.ndjson").read_text().splitlines()]
+    assert sorted(r["spot"]["id"] for r in records) == [f"s{i}" for i in range(6)]
+    # Resumed spots were scored with their wind like the rest
+    assert all(len(r["scores"]) == HOURS for r in records)
+    for r in records:
+        winds = [hour["sports"]["kitesurfing"]["context"].get("wind_kmh") for hour in r["scores"]]
+        assert all(w is not None for w in winds), r["spot"]["id"]
+
+
+def test_resume_without_the_output_fails_clearly(api, tmp_path):
+    run(api, tmp_path, batch.NdjsonWriter, "scores.ndjson")
+    (tmp_path / "scores.ndjson").unlink()
+    with pytest.raises(RuntimeError, match="rerun without --resume"):
+        run(api, tmp_path, batch.NdjsonWriter, "scores.ndjson", resume=True)
+
+
+def test_parquet_output(api, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    stats = run(api, tmp_path, batch.ParquetWriter, "scores.parquet")
+    assert (stats["written"], stats["failed"]) == (6, 0)
+    parts = sorted((tmp_path / "scores.parquet").iterdir())
+    assert [p.name for p in parts] == [f"part-{i:08d}.parquet" for i in (0, 2, 4)]
+    table = pq.read_table(parts[0])
+    sports = [k for k, v in api.rulesets.current().rules["sports"].items() if v.get("enabled", True)]
+    assert table.num_rows == 2 * HOURS * len(sports)
+    assert table.schema.metadata[b"ruleset_version"].decode() == api.rulesets.current().version
+    assert set(table.column("sport").to_pylist()) == set(sports)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from deadline import Deadline
+from hourly import HourlyFrame
+from incremental import IncrementalScorer
+
+
+def test_deadline_cut_keeps_previous_rows_for_unvisited_hours(rules, make_frame):
+    frame = make_frame(hours=48, seed=2)
+    scorer = IncrementalScorer()
+    full = scorer.score("spot:a", frame, rules=rules)
+    assert scorer.stats["hours_scored"] == 48
+
+    # The first hour changed and the budget is already spent: nothing is scored
+    columns = {name: values.copy() for name, values in frame.columns.items()}
+    columns["wave_height"][0] = np.float32(4.2)
+    changed = HourlyFrame(columns, frame.time_axis)
+    assert scorer.score("spot:a", changed, rules=rules, deadline=Deadline(0)) == []
+
+    # The next request rescores only the changed hour and reuses the other 47
+    rows = scorer.score("spot:a", changed, rules=rules)
+    assert scorer.stats["hours_scored"] == 49
+    assert rows[1:] == full[1:]
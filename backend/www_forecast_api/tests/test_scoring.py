@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from hourly import HourlyFrame
+from profiles import apply_overlay
+from scoring import ScoreMemo, score_forecast, scores_to_json
+
+
+def test_memo_matches_uncached(rules, make_frame):
+    frame = make_frame(states=40)
+    memo = ScoreMemo()
+    expected = scores_to_json(score_forecast(frame, rules=rules))
+    assert scores_to_json(score_forecast(frame, rules=rules, memo=memo)) == expected
+    assert memo.hits > 0
+    # Plain dict rows (not normalized) share the memo entries and still match
+    assert scores_to_json(score_forecast(frame.records(), rules=rules, memo=memo)) == expected
+
+
+def test_memo_key_includes_fields_hard_limits_read(rules, make_frame):
+    # A profile limiting on a variable outside SCORING_FIELDS: hours differing only there
+    # must not share a memo entry
+    frame = make_frame(hours=1, seed=1)
+    columns = {name: np.repeat(values, 100) for name, values in frame.columns.items()}
+    columns["wind_gusts_100m"] = np.array([10.0, 60.0] * 50, dtype=np.float32)
+    frame = HourlyFrame(columns, (1760000000, 3600, 100))
+    profile = apply_overlay(rules, {"kitesurfing": {"hard_limits": {"wind_gusts_100m": {"bad_from": 40}}}})
+    memo = ScoreMemo()
+    expected = scores_to_json(score_forecast(frame, rules=profile))
+    assert scores_to_json(score_forecast(frame, rules=profile, memo=memo)) == expected
+    flagged = ["too_gusty" in row["sports"]["kitesurfing"]["flags"] for row in expected]
+    assert flagged == [False, True] * 50
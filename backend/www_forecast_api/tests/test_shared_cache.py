@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from shared_cache import SharedScoreCache
+
+pytest.importorskip("fcntl")
+
+
+def test_other_layouts_and_corrupt_files_never_shrink_a_mapped_table(tmp_path):
+    path = str(tmp_path / "scores")
+    old = SharedScoreCache(path, slots=8, slot_bytes=4096)
+    assert old.put("a", {"score": 1})
+
+    # A worker started with another layout gets its own file
+    other = SharedScoreCache(path, slots=16, slot_bytes=4096)
+    assert other.path != old.path and other.get("a") is None
+    assert old.get("a") == {"score": 1}
+    # The same layout shares the table
+    assert SharedScoreCache(path, slots=8, slot_bytes=4096).get("a") == {"score": 1}
+
+    # A corrupt header is replaced by a fresh file; the worker still mapping the old one keeps working
+    with open(old.path, "r+b") as f:
+        f.write(b"garbage!")
+    fresh = SharedScoreCache(path, slots=8, slot_bytes=4096)
+    assert os.stat(fresh.path).st_ino != os.fstat(old._fd).st_ino
+    assert fresh.get("a") is None and fresh.put("b", 2)
+    assert old.get("a") == {"score": 1}
+    assert SharedScoreCache(path, slots=8, slot_bytes=4096).get("b") == 2
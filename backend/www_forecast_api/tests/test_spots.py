@@ -0,0 +1,47 @@
+import time
+
+import numpy as np
+import pytest
+
+from spots import SpotCatalog, haversine_km
+
+
+def catalog(n: int, seed: int = 0) -> SpotCatalog:
+    rng = np.random.default_rng(seed)
+    # Clustered around a few places, some of them polar
+    centers = [(32.3, 34.8), (-33.9, 151.3), (89.9, 0.0), (-89.8, 120.0), (0.0, 179.9)]
+    spots = []
+    for k in range(n):
+        lat, lon = centers[k % len(centers)]
+        lat = float(np.clip(lat + rng.normal(0, 0.3), -90, 90))
+        lon = float((lon + rng.normal(0, 3.0) + 180) % 360 - 180)
+        spots.append({"id": f"s{k}", "name": f"Spot {k}", "latitude": lat, "longitude": lon})
+    return SpotCatalog(spots)
+
+
+QUERIES = [(32.3, 34.8), (89.95, -170.0), (-89.9, 10.0), (0.0, -179.95), (60.0, 20.0), (90.0, 0.0)]
+
+
+@pytest.mark.parametrize("radius_km", [2.0, 25.0, 200.0, 2000.0])
+def test_within_and_nearest_match_brute_force(radius_km):
+    cat = catalog(2000)
+    spots = [cat.get(f"s{k}") for k in range(2000)]
+    for lat, lon in QUERIES:
+        expected = sorted(
+            (haversine_km(lat, lon, s["latitude"], s["longitude"]), s["id"]) for s in spots
+        )
+        got = cat.within(lat, lon, radius_km)
+        assert sorted((d, s["id"]) for d, s in got) == [(d, i) for d, i in expected if d <= radius_km]
+        assert [d for d, _ in got] == sorted(d for d, _ in got)
+        match = cat.nearest(lat, lon, max_km=radius_km)
+        assert (match[0] if match else None) == (expected[0][0] if expected[0][0] <= radius_km else None)
+        assert cat.nearest(lat, lon)[0] == expected[0][0]
+
+
+def test_snap_lookup_is_bounded_near_poles_and_on_sparse_catalogs():
+    sparse = SpotCatalog([{"id": "a", "name": "A", "latitude": -40.0, "longitude": 0.0}])
+    start = time.perf_counter()
+    for lat, lon in QUERIES:
+        for _ in range(20):
+            assert sparse.nearest(lat, lon, max_km=2.0) is None
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,23 @@
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from swr import SWRCache
+
+
+def test_joined_load_is_bounded_by_the_callers_deadline():
+    release = threading.Event()
+    cache = SWRCache(lambda deadline=None: release.wait(5) and "value")
+    owner = threading.Thread(target=cache.get, args=("k",), kwargs={"deadline": Deadline(5)})
+    owner.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        cache.get("k", deadline=Deadline(0.1))
+    assert time.monotonic() - start < 1.0
+    # Joiners still within their budget share the owner's result
+    release.set()
+    owner.join()
+    assert cache.get("k", deadline=Deadline(1)).value == "value"
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+import requests
+
+from upstream import UpstreamClient, UpstreamUnavailable, raise_rate_limited
+
+URL = "https://marine-api.open-meteo.com/v1/marine"
+
+
+def rate_limited_response(retry_after: str | None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 429
+    response.url = URL
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return response
+
+
+class FakeClient:
+    """openmeteo_requests.Client stand-in: runs `reply` per call and wraps errors like weather_api does"""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def weather_api(self, url, params, **kwargs):
+        self.calls += 1
+        try:
+            return self.reply()
+        except Exception as e:
+            raise RuntimeError(str(e)) from e
+
+
+@pytest.mark.parametrize("retry_after, open_seconds", [("120", 120.0), (None, 30.0)])
+def test_rate_limit_opens_the_breaker(retry_after, open_seconds):
+    client = FakeClient(lambda: raise_rate_limited(rate_limited_response(retry_after)))
+    upstream = UpstreamClient(client, failure_threshold=5, reset_seconds=30.0)
+    with pytest.raises(RuntimeError):
+        upstream.weather_api(URL, params={})
+    # One 429 is enough; the host is not called again until it said we may
+    with pytest.raises(UpstreamUnavailable):
+        upstream.weather_api(URL, params={})
+    assert client.calls == 1
+    stats = upstream.stats()["marine-api.open-meteo.com"]
+    assert stats["rate_limited"] == 1 and stats["client_errors"] == 0
+    assert upstream._hosts["marine-api.open-meteo.com"].breaker.open_seconds == open_seconds
+
+
+def test_hedge_is_a_single_attempt_on_the_hedge_client():
+    release = threading.Event()
+    primary = FakeClient(lambda: primary.calls == 1 and ["warm-up"] or release.wait(5) and ["primary"])
+    backup = FakeClient(lambda: ["backup"])
+    upstream = UpstreamClient(primary, hedge_client=backup, hedge_min_samples=1, hedge_min_seconds=0.05)
+    assert upstream.weather_api(URL, params={}) == ["warm-up"]
+    try:
+        assert upstream.weather_api(URL, params={}) == ["backup"]
+    finally:
+        release.set()
+    assert (primary.calls, backup.calls) == (2, 1)
+    assert upstream.stats()["marine-api.open-meteo.com"]["hedge_wins"] == 1
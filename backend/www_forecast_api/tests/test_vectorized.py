@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+import pytest
+
+from forecast_api import ForecastAPI
+from profiles import apply_overlay
+from scoring import score_hour_for_sport
+from vectorized import FLOAT32_TOLERANCE, _sample_columns, score_columns
+
+# score_hour_for_sport rounds its score to 3 decimals
+ROUNDING = 5e-4 + 1e-9
+
+
+def scalar_scores(columns: dict[str, np.ndarray], sport_key: str, rules: dict) -> np.ndarray:
+    hours = len(next(iter(columns.values())))
+    out = np.empty(hours)
+    for i in range(hours):
+        hour = {name: (None if math.isnan(v[i]) else float(v[i])) for name, v in columns.items()}
+        out[i] = score_hour_for_sport(hour, sport_key=sport_key, rules=rules, normalized=True).score
+    return out
+
+
+@pytest.mark.parametrize("sport_key", [k for k, v in ForecastAPI.CONDITION_RULESET["sports"].items() if v.get("enabled", True)])
+def test_vectorized_matches_scalar_in_both_dtypes(rules, sport_key):
+    columns = _sample_columns(5000, seed=3)
+    expected = scalar_scores(columns, sport_key, rules)
+    exact = score_columns(columns, sport_key=sport_key, rules=rules)
+    fast = score_columns(columns, sport_key=sport_key, rules=rules, dtype=np.float32)
+    assert exact.dtype == np.float64 and fast.dtype == np.float32
+    assert np.max(np.abs(exact - expected)) <= ROUNDING
+    assert np.max(np.abs(fast.astype(np.float64) - exact)) <= FLOAT32_TOLERANCE
+    assert np.max(np.abs(fast.astype(np.float64) - expected)) <= ROUNDING + FLOAT32_TOLERANCE
+
+
+def test_hard_limits_on_other_variables_clamp_like_the_scalar_scorer(rules):
+    # Profile overlays can limit on variables outside the built-in hard-limit keys
+    profile = apply_overlay(rules, {
+        "kitesurfing": {"hard_limits": {"wind_gusts_100m": {"bad_from": 40}}},
+        "surfing": {"hard_limits": {"uv_index": {"bad_from": 7}}},
+    })
+    columns = _sample_columns(2000, seed=4)
+    columns["wind_gusts_100m"] = np.round(np.random.default_rng(4).random(2000) * 70, 2).astype(np.float32)
+    for sport_key in ("kitesurfing", "surfing"):
+        expected = scalar_scores(columns, sport_key, profile)
+        got = score_columns(columns, sport_key=sport_key, rules=profile)
+        assert np.max(np.abs(got - expected)) <= ROUNDING
+        # The limit actually bites: plenty of otherwise-good hours are clamped
+        plain = score_columns(columns, sport_key=sport_key, rules=rules)
+        assert np.sum((plain > 0.2) & (got <= 0.2)) > 100